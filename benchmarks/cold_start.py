@@ -0,0 +1,89 @@
+"""
+冷启动回归基准
+
+stdio 客户端每个会话都会重新启动服务器进程，启动耗时直接影响首次调用延迟。
+本脚本在全新的解释器中多次导入每个服务器模块，检查：
+
+- 相对基线（导入 FastMCP 并创建空服务器）的额外耗时中位数不超过预算
+- 数据库驱动、HTTP 客户端等应延迟加载的模块在导入服务器时没有被真正加载
+
+任一检查失败时以退出码 1 结束，可用于 CI。
+
+用法:
+    uv run python benchmarks/cold_start.py
+    uv run python benchmarks/cold_start.py --runs 10 --budget-ms 100 --json
+"""
+
+import json
+import statistics
+import sys
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from common.startup import measure_cold_start, profile_imports  # noqa: E402
+
+# 服务器模块 -> 导入时不应被加载的模块
+SERVERS = {
+    "fs_mcp.server": [],
+    "mysql_mcp.server": ["mysql.connector", "mysql_mcp.gen.gen", "mysql_mcp.gen.utils"],
+    "template_mcp.server": [],
+    "knowledge_mcp.server": ["psycopg", "requests"],
+    "element_plus_mcp.server": ["requests"],
+    "demo_mcp.server": [],
+}
+
+# 基线：导入 FastMCP 并创建一个空服务器，这部分开销所有服务器都无法避免
+BASELINE = "from mcp.server.fastmcp import FastMCP; FastMCP('baseline')"
+
+
+@click.command()
+@click.option("--runs", type=click.IntRange(min=1), default=5, help="Cold starts per server")
+@click.option(
+    "--budget-ms", type=float, default=150.0, help="Allowed median overhead over an empty FastMCP server (ms)"
+)
+@click.option("--server", "servers", multiple=True, type=click.Choice(list(SERVERS)), help="Only check these servers")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print results as JSON")
+def main(runs: int, budget_ms: float, servers: tuple, as_json: bool):
+    """测量各服务器的冷启动耗时并与预算比较"""
+    modules = list(servers or SERVERS)
+    # 基线与各服务器交替运行，机器负载的波动对两者影响相同
+    timings = {code: [] for code in [BASELINE] + [f"import {module}" for module in modules]}
+    for _ in range(runs):
+        for code in timings:
+            timings[code].extend(measure_cold_start(code, 1))
+    baseline = statistics.median(timings[BASELINE])
+
+    results = []
+    for module in modules:
+        median = statistics.median(timings[f"import {module}"])
+        loaded = profile_imports(module, SERVERS[module])["loaded"]
+        overhead_ms = (median - baseline) * 1000
+        results.append(
+            {
+                "module": module,
+                "median_ms": round(median * 1000, 1),
+                "overhead_ms": round(overhead_ms, 1),
+                "eager_modules": loaded,
+                "ok": overhead_ms <= budget_ms and not loaded,
+            }
+        )
+
+    if as_json:
+        print(
+            json.dumps({"baseline_ms": round(baseline * 1000, 1), "budget_ms": budget_ms, "results": results}, indent=2)
+        )
+    else:
+        print(f"baseline (empty FastMCP server): {baseline * 1000:.1f} ms, budget: +{budget_ms:.0f} ms")
+        for r in results:
+            status = "ok" if r["ok"] else "FAIL"
+            eager = f"  eagerly loaded: {', '.join(r['eager_modules'])}" if r["eager_modules"] else ""
+            print(f"  {status:4}  {r['module']:26} {r['median_ms']:8.1f} ms  ({r['overhead_ms']:+.1f} ms){eager}")
+
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
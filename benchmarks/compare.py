@@ -0,0 +1,70 @@
+"""
+对比两次 benchmarks/load.py 的结果
+
+按 (负载, 传输, 并发数) 对齐两份 JSON，输出吞吐量、p50/p99 延迟和峰值 RSS 的变化。
+吞吐量下降或 p99 上升超过 --threshold 时视为回归，以退出码 1 结束，可用于 CI。
+
+用法:
+    uv run python benchmarks/compare.py base.json head.json
+    uv run python benchmarks/compare.py base.json head.json --threshold 0.15
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import click
+
+Key = Tuple[str, str, int]
+
+
+def _load(path: str) -> Tuple[Dict[str, Any], Dict[Key, Dict[str, Any]]]:
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    results = {(r["workload"], r["transport"], r["concurrency"]): r for r in report["results"]}
+    return report, results
+
+
+def _change(base: float, head: float) -> float:
+    return (head - base) / base if base else 0.0
+
+
+@click.command()
+@click.argument("base", type=click.Path(exists=True, dir_okay=False))
+@click.argument("head", type=click.Path(exists=True, dir_okay=False))
+@click.option("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+def main(base: str, head: str, threshold: float):
+    """对比 BASE 与 HEAD 两份基准结果"""
+    base_report, base_results = _load(base)
+    head_report, head_results = _load(head)
+    print(
+        f"base: {(base_report.get('commit') or 'unknown')[:12]}  head: {(head_report.get('commit') or 'unknown')[:12]}"
+    )
+    print(f"{'workload':10} {'transport':10} {'c':>4} {'req/s':>18} {'p50 ms':>18} {'p99 ms':>18} {'rss MB':>14}")
+
+    regressions = []
+    for key in sorted(base_results.keys() & head_results.keys()):
+        b, h = base_results[key], head_results[key]
+        throughput = _change(b["throughput_rps"], h["throughput_rps"])
+        p50 = _change(b["p50_ms"], h["p50_ms"])
+        p99 = _change(b["p99_ms"], h["p99_ms"])
+        cells = [
+            f"{h['throughput_rps']:9.1f} ({throughput:+6.1%})",
+            f"{h['p50_ms']:9.2f} ({p50:+6.1%})",
+            f"{h['p99_ms']:9.2f} ({p99:+6.1%})",
+            f"{h['rss_peak_mb']:6.0f} ({h['rss_peak_mb'] - b['rss_peak_mb']:+5.0f})",
+        ]
+        flag = ""
+        if throughput < -threshold or p99 > threshold or h["errors"] > b["errors"]:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key[0]:10} {key[1]:10} {key[2]:>4} " + " ".join(f"{c:>18}" for c in cells) + flag)
+
+    missing = sorted(base_results.keys() ^ head_results.keys())
+    if missing:
+        print(f"only in one report: {', '.join('/'.join(map(str, k)) for k in missing)}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
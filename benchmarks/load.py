@@ -0,0 +1,399 @@
+"""
+工具调用负载基准
+
+在当前进程内启动服务器，分别通过 stdio 和 streamable 传输建立真实的 MCP 会话，
+以指定的并发数循环调用每个负载中的工具，统计吞吐量、p50/p99 延迟、错误数和进程 RSS，
+结果以 JSON 输出，可用 benchmarks/compare.py 对比两次提交的结果。
+
+负载：
+- fs：read_text_file / list_directory / search_files / get_file_info，作用于临时目录中生成的文件
+- mysql：list_tables / describe_table / read_query，数据库为内存 SQLite 实现的 MySQL 替身
+- knowledge：search_knowledge，向量库为内存中的 pgvector 替身，向量化请求发往本地 Ollama 替身
+- template：get_template_content / get_sample_content / list_template_categories
+
+stdio 传输在进程内用两对管道代替标准输入输出，服务器端使用与正式运行相同的 stdio_server；
+streamable 传输由 uvicorn 在后台线程中监听 127.0.0.1 的随机端口，中间件与正式运行一致。
+客户端与服务器在同一进程中，RSS 包含两者，适合纵向比较，不代表单独部署时的内存占用。
+
+用法:
+    uv run python benchmarks/load.py --output bench.json
+    uv run python benchmarks/load.py --workload fs --transport streamable --concurrency 1 --concurrency 32
+"""
+
+import contextlib
+import importlib
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+import anyio
+import click
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mcp import ClientSession, types  # noqa: E402
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+Call = Tuple[str, Dict[str, Any]]
+
+TRANSPORTS = ("stdio", "streamable")
+
+
+def _fs_workload(workdir: Path) -> Tuple[str, List[Call]]:
+    """生成 8 个目录、每个目录 25 个约 8KB 的文本文件"""
+    root = workdir / "fs"
+    files = []
+    for d in range(8):
+        directory = root / f"pkg_{d}"
+        directory.mkdir(parents=True)
+        for f in range(25):
+            path = directory / f"module_{f}.py"
+            path.write_text("".join(f"line {i}: value = {d * 1000 + f * 10 + i}\n" for i in range(300)), "utf-8")
+            files.append(str(path))
+    os.environ["MCP_ALLOWED_DIRECTORIES"] = str(root)
+    calls: List[Call] = []
+    for i, path in enumerate(files[::5]):
+        calls.append(("read_text_file", {"path": path}))
+        calls.append(("read_text_file", {"path": path, "head": 20}))
+        calls.append(("get_file_info", {"path": path}))
+        if i % 4 == 0:
+            calls.append(("list_directory", {"path": os.path.dirname(path)}))
+        if i % 8 == 0:
+            calls.append(("search_files", {"path": str(root), "pattern": f"module_{i % 25}"}))
+    return "fs_mcp.server", calls
+
+
+def _mysql_workload(workdir: Path) -> Tuple[str, List[Call]]:
+    from standins import MysqlStandIn
+
+    standin = MysqlStandIn()
+    os.environ.update(standin.environment())
+    module = importlib.import_module("mysql_mcp.server")
+    module.mysql_connector = standin
+    calls: List[Call] = [("list_tables", {})]
+    for t in range(0, 20, 2):
+        calls.append(("describe_table", {"table_name": f"biz_table_{t:02d}"}))
+        calls.append(("read_query", {"query": f"SELECT id, name, amount FROM biz_table_{t:02d} WHERE id <= 50"}))
+        calls.append(
+            ("read_query", {"query": f"SELECT status, COUNT(*), SUM(amount) FROM biz_table_{t:02d} GROUP BY status"})
+        )
+    return "mysql_mcp.server", calls
+
+
+def _knowledge_workload(workdir: Path) -> Tuple[str, List[Call]]:
+    from standins import OllamaStub, PgvectorStandIn
+
+    module = importlib.import_module("knowledge_mcp.server")
+    module.psycopg = PgvectorStandIn()
+    ollama = OllamaStub()
+    module.CONFIG["ollama_url"] = ollama.url
+    queries = ["按钮的用法", "表单校验", "表格分页", "弹窗关闭回调", "日期选择器格式"]
+    return "knowledge_mcp.server", [("search_knowledge", {"request": {"query": q, "top_k": 3}}) for q in queries]
+
+
+def _template_workload(workdir: Path) -> Tuple[str, List[Call]]:
+    module = importlib.import_module("template_mcp.server")
+    calls: List[Call] = [("list_template_categories", {})]
+    for name in module.TEMPLATE_FILES:
+        calls.append(("get_template_content", {"template_name": name}))
+        if module.get_sample_file_path(name).exists():
+            calls.append(("get_sample_content", {"template_name": name}))
+    return "template_mcp.server", calls
+
+
+WORKLOADS: Dict[str, Callable[[Path], Tuple[str, List[Call]]]] = {
+    "fs": _fs_workload,
+    "mysql": _mysql_workload,
+    "knowledge": _knowledge_workload,
+    "template": _template_workload,
+}
+
+
+def rss_bytes() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # 非 Linux 平台退化为峰值 RSS（macOS 以字节为单位，其余为 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """线性插值的分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def stdio_sessions(mcp: FastMCP, count: int) -> AsyncIterator[List[ClientSession]]:
+    """
+    通过管道以 stdio 传输连接进程内的服务器。stdio 一个进程只有一个会话，
+    count > 1 时为每个会话各启动一个服务器循环（共享同一个 FastMCP 实例）
+    """
+    from mcp.server.stdio import stdio_server
+
+    def serve(stdin_fd: int, stdout_fd: int) -> None:
+        async def run() -> None:
+            # 与进程退出时一样关闭输出，客户端读到 EOF
+            with open(stdin_fd, "r", encoding="utf-8") as stdin, open(stdout_fd, "w", encoding="utf-8") as stdout:
+                async with stdio_server(anyio.wrap_file(stdin), anyio.wrap_file(stdout)) as (read, write):
+                    await mcp._mcp_server.run(read, write, mcp._mcp_server.create_initialization_options())
+
+        anyio.run(run)
+
+    async with contextlib.AsyncExitStack() as stack:
+        sessions = []
+        threads = []
+        for i in range(count):
+            to_server_r, to_server_w = os.pipe()
+            to_client_r, to_client_w = os.pipe()
+            thread = threading.Thread(target=serve, args=(to_server_r, to_client_w), name=f"stdio-server-{i}")
+            thread.start()
+            threads.append(thread)
+            client_in = anyio.wrap_file(open(to_client_r, "r", encoding="utf-8"))
+            client_out = anyio.wrap_file(open(to_server_w, "w", encoding="utf-8"))
+            # 按行收发 JSON-RPC 消息的逻辑对客户端同样适用
+            read, write = await stack.enter_async_context(stdio_server(client_in, client_out))
+            # 退出时关闭写端，服务器读到 EOF 后结束
+            stack.push_async_callback(client_out.aclose)
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+        yield sessions
+    for thread in threads:
+        await anyio.to_thread.run_sync(thread.join, 10)
+
+
+@contextlib.asynccontextmanager
+async def streamable_sessions(mcp: FastMCP, count: int) -> AsyncIterator[List[ClientSession]]:
+    """在后台线程中以 uvicorn 运行 streamable HTTP 应用，建立 count 个会话"""
+    import uvicorn
+    from mcp.client.streamable_http import streamablehttp_client
+
+    from common.mcp_cli import create_http_app, uvicorn_options, wrap_http_app
+
+    port = _free_port()
+    app = wrap_http_app(create_http_app(mcp, "streamable"))
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on", **uvicorn_options())
+    )
+    thread = threading.Thread(target=server.run, name="streamable-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("streamable 服务器启动失败")
+        await anyio.sleep(0.02)
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            sessions = []
+            for _ in range(count):
+                read, write, _ = await stack.enter_async_context(
+                    streamablehttp_client(f"http://127.0.0.1:{port}{mcp.settings.streamable_http_path}")
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                sessions.append(session)
+            yield sessions
+    finally:
+        server.should_exit = True
+        await anyio.to_thread.run_sync(thread.join, 10)
+
+
+async def call_tool(session: ClientSession, name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+    """
+    发送 tools/call 请求。ClientSession.call_tool 会在客户端用 jsonschema 校验结构化输出，
+    耗时往往超过服务器处理本身，这里跳过校验，只测量服务器与传输
+    """
+    request = types.ClientRequest(
+        types.CallToolRequest(params=types.CallToolRequestParams(name=name, arguments=arguments))
+    )
+    return await session.send_request(request, types.CallToolResult)
+
+
+async def drive(
+    sessions: List[ClientSession], calls: List[Call], requests: int, concurrency: int, seed: int
+) -> Dict[str, Any]:
+    """
+    以 concurrency 个并发任务发出 requests 次调用，任务按轮询分配到各个会话
+
+    Returns:
+        调用次数、错误次数、耗时、吞吐量、延迟分位数与运行期间的 RSS
+    """
+    order = calls * (requests // len(calls) + 1)
+    random.Random(seed).shuffle(order)
+    order = order[:requests]
+    latencies: List[float] = []
+    errors = 0
+    cursor = 0
+    peak_rss = rss_bytes()
+    running = True
+
+    async def sample_rss() -> None:
+        nonlocal peak_rss
+        while running:
+            peak_rss = max(peak_rss, rss_bytes())
+            await anyio.sleep(0.02)
+
+    async def worker(session: ClientSession) -> None:
+        nonlocal cursor, errors
+        while cursor < len(order):
+            name, arguments = order[cursor]
+            cursor += 1
+            started = time.perf_counter()
+            try:
+                result = await call_tool(session, name, arguments)
+                failed = result.isError
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(sample_rss)
+        async with anyio.create_task_group() as workers:
+            for i in range(concurrency):
+                workers.start_soon(worker, sessions[i % len(sessions)])
+        running = False
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "rss_before_mb": round(rss_before / 1048576, 1),
+        "rss_peak_mb": round(peak_rss / 1048576, 1),
+        "rss_after_mb": round(rss_bytes() / 1048576, 1),
+    }
+
+
+def _git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+async def run_benchmark(
+    workloads: List[str],
+    transports: List[str],
+    concurrencies: List[int],
+    requests: int,
+    warmup: int,
+    sessions: int,
+    workdir: Path,
+) -> List[Dict[str, Any]]:
+    from common.mcp_cli import prepare_server
+
+    results = []
+    for workload in workloads:
+        module_name, calls = WORKLOADS[workload](workdir)
+        mcp = importlib.import_module(module_name).mcp
+        prepare_server(mcp)
+        for transport in transports:
+            # streamable 的会话管理器每个实例只能启动一次，同一传输下的各并发级别共用一次启动
+            connect = stdio_sessions if transport == "stdio" else streamable_sessions
+            async with connect(mcp, sessions) as clients:
+                if warmup:
+                    await drive(clients, calls, warmup, min(4, warmup), seed=0)
+                for concurrency in concurrencies:
+                    stats = await drive(clients, calls, requests, concurrency, seed=concurrency)
+                    results.append(
+                        {
+                            "workload": workload,
+                            "transport": transport,
+                            "concurrency": concurrency,
+                            "sessions": sessions,
+                            **stats,
+                        }
+                    )
+                    print(
+                        f"{workload:10} {transport:10} c={concurrency:<4} {stats['throughput_rps']:9.1f} req/s  "
+                        f"p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+                        f"errors {stats['errors']:<4} rss {stats['rss_peak_mb']:.0f} MB",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+@click.command()
+@click.option("--workload", "workloads", multiple=True, type=click.Choice(list(WORKLOADS)), help="Only run these")
+@click.option("--transport", "transports", multiple=True, type=click.Choice(TRANSPORTS), help="Only use these")
+@click.option(
+    "--concurrency",
+    "concurrencies",
+    multiple=True,
+    type=click.IntRange(min=1),
+    help="Concurrency levels (default 1,8,32)",
+)
+@click.option("--requests", type=click.IntRange(min=1), default=500, help="Tool calls per concurrency level")
+@click.option("--warmup", type=click.IntRange(min=0), default=50, help="Warm-up calls before measuring")
+@click.option("--sessions", type=click.IntRange(min=1), default=1, help="Client sessions the concurrent tasks share")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write JSON here instead of stdout")
+def main(workloads, transports, concurrencies, requests, warmup, sessions, output):
+    """在进程内启动各服务器，测量工具调用的吞吐量、延迟与内存"""
+    # 服务器的日志会写到 stdout 并拖慢调用，失败的调用已计入 errors
+    logging.disable(logging.CRITICAL)
+    workloads = list(workloads or WORKLOADS)
+    transports = list(transports or TRANSPORTS)
+    concurrencies = sorted(set(concurrencies or (1, 8, 32)))
+
+    with tempfile.TemporaryDirectory(prefix="mcp-bench-") as workdir:
+        results = anyio.run(
+            run_benchmark, workloads, transports, concurrencies, requests, warmup, sessions, Path(workdir)
+        )
+
+    report = {
+        **_git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"requests": requests, "warmup": warmup, "sessions": sessions},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+基准测试使用的本地替身
+
+- MySQL：DB-API 层面兼容 mysql.connector 的替身，数据放在内存 SQLite 中，
+  information_schema.TABLES / COLUMNS 以附加数据库的形式提供，服务器里的 SQL 原样执行
+- pgvector：按 knowledge_mcp 使用的两条 SQL（相似度检索、父块查询）在内存中计算余弦相似度
+- Ollama：本地 HTTP 服务，/api/embeddings 按文本哈希返回确定的向量，请求仍经过 requests 和真实的 TCP 连接
+
+替身只替换服务器模块中的驱动对象（mysql_connector、psycopg）和配置，工具代码本身不做任何修改。
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# knowledge_mcp 期望的向量维度
+EMBEDDING_DIM = 1536
+
+ER_NO_SUCH_TABLE = 1146
+
+
+class MysqlStandInError(Exception):
+    """与 mysql.connector.Error 一样带有 errno"""
+
+    def __init__(self, msg: str, errno: Optional[int] = None):
+        super().__init__(msg)
+        self.errno = errno
+        self.msg = msg
+
+
+class _MysqlCursor:
+    def __init__(self, conn: sqlite3.Connection):
+        self._cursor = conn.cursor()
+        self.description = None
+
+    def execute(self, query: str, params: Any = None) -> None:
+        match = re.match(r"\s*SHOW\s+FULL\s+COLUMNS\s+FROM\s+`?(\w+)`?", query, re.IGNORECASE)
+        if match:
+            # 与 MySQL 相同的 9 列：Field, Type, Collation, Null, Key, Default, Extra, Privileges, Comment
+            query = (
+                "SELECT COLUMN_NAME, COLUMN_TYPE, NULL, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA, "
+                "'select', COLUMN_COMMENT FROM information_schema.COLUMNS WHERE TABLE_NAME = ? ORDER BY ORDINAL_POSITION"
+            )
+            params = (match.group(1),)
+            self._cursor.execute("SELECT 1 FROM information_schema.TABLES WHERE TABLE_NAME = ?", params)
+            if self._cursor.fetchone() is None:
+                raise MysqlStandInError(f"Table '{match.group(1)}' doesn't exist", ER_NO_SUCH_TABLE)
+        try:
+            self._cursor.execute(query.replace("%s", "?"), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise MysqlStandInError(str(e)) from e
+        self.description = self._cursor.description
+
+    def fetchall(self) -> List[tuple]:
+        return self._cursor.fetchall()
+
+    def fetchone(self) -> Optional[tuple]:
+        return self._cursor.fetchone()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _MysqlConnection:
+    def __init__(self, path: str, schema_path: str):
+        # 共享缓存的内存数据库：每次 connect 都是新连接，数据在连接之间共享
+        self._conn = sqlite3.connect(path, uri=True, check_same_thread=False)
+        self._conn.execute("ATTACH DATABASE ? AS information_schema", (schema_path,))
+
+    def cursor(self, dictionary: bool = False, **kwargs) -> _MysqlCursor:
+        return _MysqlCursor(self._conn)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class MysqlStandIn:
+    """
+    mysql.connector 的替身：connect()、Error、errorcode 与服务器代码的用法一致
+
+    Args:
+        tables: 生成的业务表数量
+        rows: 每张表的行数
+    """
+
+    def __init__(self, tables: int = 20, rows: int = 200, database: str = "bench"):
+        self.database = database
+        self.Error = MysqlStandInError
+        self.errorcode = SimpleNamespace(ER_NO_SUCH_TABLE=ER_NO_SUCH_TABLE)
+        token = f"{id(self):x}"
+        self._path = f"file:bench_{token}?mode=memory&cache=shared"
+        self._schema_path = f"file:bench_{token}_schema?mode=memory&cache=shared"
+        # 保持连接打开，内存数据库才不会被释放
+        self._keep = [
+            sqlite3.connect(self._path, uri=True, check_same_thread=False),
+            sqlite3.connect(self._schema_path, uri=True, check_same_thread=False),
+        ]
+        self._populate(tables, rows)
+
+    def _populate(self, tables: int, rows: int) -> None:
+        main, schema = self._keep
+        schema.executescript(
+            """
+            CREATE TABLE TABLES (TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_COMMENT TEXT);
+            CREATE TABLE COLUMNS (
+                TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER,
+                COLUMN_TYPE TEXT, IS_NULLABLE TEXT, COLUMN_KEY TEXT, COLUMN_DEFAULT TEXT, EXTRA TEXT,
+                COLUMN_COMMENT TEXT
+            );
+            """
+        )
+        columns = [
+            ("id", "bigint", "NO", "PRI", None, "auto_increment", "主键"),
+            ("name", "varchar(64)", "YES", "", None, "", "名称"),
+            ("amount", "decimal(10,2)", "YES", "", "0.00", "", "金额"),
+            ("status", "char(1)", "YES", "", "0", "", "状态"),
+            ("create_time", "datetime", "YES", "", None, "", "创建时间"),
+        ]
+        rng = random.Random(42)
+        for t in range(tables):
+            table = f"biz_table_{t:02d}"
+            main.execute(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT, amount REAL, status TEXT, create_time TEXT)"
+            )
+            main.executemany(
+                f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?)",
+                [
+                    (i, f"name-{i}", round(rng.uniform(0, 1000), 2), str(i % 2), f"2024-01-{i % 28 + 1:02d} 00:00:00")
+                    for i in range(1, rows + 1)
+                ],
+            )
+            schema.execute("INSERT INTO TABLES VALUES (?, ?, ?)", (self.database, table, f"业务表 {t}"))
+            schema.executemany(
+                "INSERT INTO COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.database, table, c[0], pos, *c[1:]) for pos, c in enumerate(columns, 1)],
+            )
+        main.commit()
+        schema.commit()
+
+    def connect(self, **config) -> _MysqlConnection:
+        return _MysqlConnection(self._path, self._schema_path)
+
+    def environment(self) -> Dict[str, str]:
+        """让 mysql_mcp 的 get_db_config 通过校验的环境变量"""
+        return {
+            "MYSQL_HOST": "127.0.0.1",
+            "MYSQL_USER": "bench",
+            "MYSQL_PASSWORD": "bench",
+            "MYSQL_DATABASE": self.database,
+        }
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """按文本哈希生成的确定向量（已归一化）"""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector]
+
+
+class _PgCursor:
+    def __init__(self, store: "PgvectorStandIn"):
+        self._store = store
+        self._rows: List[tuple] = []
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        if "<=>" in sql:
+            # 参数依次为：查询向量、查询向量、相似度阈值、查询向量、top_k
+            query, _, threshold, _, top_k = params
+            self._rows = self._store.search(query, threshold, top_k)
+        elif "chunk_type = 'parent'" in sql:
+            parent = self._store.parents.get(params[0])
+            self._rows = [(parent,)] if parent is not None else []
+        else:
+            raise ValueError(f"pgvector 替身不支持的 SQL: {sql.strip()[:80]}")
+
+    def fetchall(self) -> List[tuple]:
+        return self._rows
+
+    def fetchone(self) -> Optional[tuple]:
+        return self._rows[0] if self._rows else None
+
+    def close(self) -> None:
+        pass
+
+
+class PgvectorStandIn:
+    """
+    psycopg + pgvector 的替身，connect() 返回的连接支持 knowledge_mcp 中的两条查询
+
+    Args:
+        chunks: 子块数量（每 4 个子块共享一个父块）
+    """
+
+    def __init__(self, chunks: int = 64):
+        self.rows: List[tuple] = []
+        self.parents: Dict[str, str] = {}
+        for i in range(chunks):
+            parent_id = f"parent-{i // 4}"
+            self.parents.setdefault(parent_id, f"父块 {i // 4} 的完整内容。" * 20)
+            content = f"知识片段 {i}：关于组件 {i % 10} 的用法说明。"
+            self.rows.append((f"chunk-{i}", content, "child", f"docs/doc_{i // 4}.md", i % 4, parent_id))
+        self.embeddings = [fake_embedding(row[1]) for row in self.rows]
+
+    def search(self, query: List[float], threshold: float, top_k: int) -> List[tuple]:
+        scored = []
+        for row, embedding in zip(self.rows, self.embeddings):
+            similarity = sum(a * b for a, b in zip(query, embedding))
+            # 哈希向量之间几乎正交，替身忽略阈值，始终返回 top_k 个结果，保证后续的父块查询被执行
+            scored.append(row + (similarity,))
+        scored.sort(key=lambda r: r[-1], reverse=True)
+        return scored[:top_k]
+
+    def connect(self, conninfo: str = "", **kwargs) -> SimpleNamespace:
+        return SimpleNamespace(cursor=lambda: _PgCursor(self), close=lambda: None)
+
+
+class OllamaStub:
+    """本地的 Ollama 替身，在后台线程中监听 127.0.0.1 的随机端口"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        dim_ = dim
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                body = json.dumps({"embedding": fake_embedding(payload.get("prompt", ""), dim_)}).encode()
+                self.send_response(200)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ollama-stub", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
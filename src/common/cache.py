@@ -1,24 +1,781 @@
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
 import time
-from typing import Optional, Dict, Any
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    估算缓存值占用的内存字节数（近似值）。
+    对常见容器递归累加，嵌套过深时只计算外层对象，避免估算本身过慢。
+    """
+    size = sys.getsizeof(value, 0)
+    if _depth >= 4:
+        return size
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _estimate_size(k, _depth + 1) + _estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _estimate_size(item, _depth + 1)
+    elif hasattr(value, "__dict__"):
+        size += _estimate_size(vars(value), _depth + 1)
+    return size
+
+
+class _CacheEntry:
+    """缓存条目：值、过期时间点、有效期、估算的字节数、计算该值花费的秒数以及是否为负结果"""
+
+    __slots__ = ("value", "expires_at", "ttl", "size", "cost", "negative")
+
+    def __init__(self, value: Any, expires_at: float, ttl: float, size: int, cost: float = 0.0, negative: bool = False):
+        self.value = value
+        self.expires_at = expires_at
+        self.ttl = ttl
+        self.size = size
+        self.cost = cost
+        self.negative = negative
+
+
+class SqliteCacheStore:
+    """
+    基于 SQLite 的持久化缓存层，作为 Cache 的第二级存储。
+
+    值使用 pickle 序列化，超过 1KB 时再用 zlib 压缩；
+    过期时间以墙钟时间保存，进程重启后仍然有效。
+    磁盘层是可选的：SQLite 出错（多个进程共用目录时数据库被锁、磁盘已满等）时记录日志，
+    读取按未命中处理、写入被跳过，缓存退回到只使用内存。写入或删除失败的键在磁盘上可能还是旧值，
+    之后读取这些键时按未命中处理，直到删除成功。
+    """
+
+    _COMPRESS_THRESHOLD = 1024
+    _RAW = b"\x00"
+    _ZLIB = b"\x01"
+    # 等待其他进程释放数据库锁的秒数，超时按出错处理，不让缓存拖慢工具调用
+    _BUSY_TIMEOUT = 0.5
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # 写入或删除失败、磁盘上可能还是旧值的键；清空失败时为 None，表示所有键都不可信
+        self._stale: Optional[set] = set()
+        self._conn = sqlite3.connect(path, timeout=self._BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, cost REAL NOT NULL DEFAULT 0)"
+        )
+        self.purge_expired()
+
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Cursor]:
+        """执行一条语句，SQLite 出错时记录日志并返回 None"""
+        try:
+            with self._lock:
+                return self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning(f"持久化缓存操作失败，退回到内存缓存: {self.path}, 错误: {e}")
+            return None
+
+    @classmethod
+    def _dumps(cls, value: Any) -> bytes:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > cls._COMPRESS_THRESHOLD:
+            return cls._ZLIB + zlib.compress(data, 6)
+        return cls._RAW + data
+
+    @classmethod
+    def _loads(cls, blob: bytes) -> Any:
+        if blob[:1] == cls._ZLIB:
+            return pickle.loads(zlib.decompress(blob[1:]))
+        return pickle.loads(blob[1:])
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        读取未过期的条目。
+
+        Returns:
+            Optional[Tuple[Any, float, float]]: (值, 剩余有效秒数, 计算耗时)，不存在或已过期时返回 None
+        """
+        if self._stale is None:
+            self.clear()
+            return None
+        if key in self._stale:
+            self.delete(key)
+            return None
+        cursor = self._execute("SELECT value, expires_at, cost FROM cache_entries WHERE key = ?", (key,))
+        row = cursor.fetchone() if cursor is not None else None
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            self.delete(key)
+            return None
+        try:
+            return self._loads(row[0]), remaining, row[2]
+        except Exception as e:
+            logger.warning(f"缓存条目反序列化失败，已丢弃: {key}, 错误: {e}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any, ttl: float, cost: float = 0.0) -> None:
+        try:
+            blob = self._dumps(value)
+        except Exception as e:
+            # 无法序列化的值只保留在内存中
+            logger.debug(f"缓存值无法序列化，跳过持久化: {key}, 错误: {e}")
+            return
+        cursor = self._execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, cost) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(blob), time.time() + ttl, cost),
+        )
+        self._mark(key, cursor is not None)
+
+    def delete(self, key: str) -> None:
+        self._mark(key, self._execute("DELETE FROM cache_entries WHERE key = ?", (key,)) is not None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """删除键以 prefix 开头的全部条目；失败时无法确定哪些键还是旧值，所有键都按不可信处理"""
+        deleted = self._execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        with self._lock:
+            if deleted is None:
+                self._stale = None
+            elif self._stale is not None:
+                self._stale = {key for key in self._stale if not key.startswith(prefix)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stale = None
+        if self._execute("DELETE FROM cache_entries") is not None:
+            with self._lock:
+                self._stale = set()
+
+    def _mark(self, key: str, synced: bool) -> None:
+        with self._lock:
+            if self._stale is None:
+                return
+            if synced:
+                self._stale.discard(key)
+            else:
+                self._stale.add(key)
+
+    def purge_expired(self) -> int:
+        """删除所有已过期的条目，返回删除数量"""
+        cursor = self._execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount if cursor is not None else 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# 全局缓存注册表：名称 -> Cache，实例被回收后自动移除
+_registry: "weakref.WeakValueDictionary[str, Cache]" = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+_anonymous_ids = itertools.count(1)
+
+
+def _register(cache: "Cache", name: Optional[str], exclusive: bool = False) -> str:
+    with _registry_lock:
+        if exclusive and name in _registry:
+            # 持久化文件按名称命名，重名时加后缀会让文件名取决于创建顺序
+            raise ValueError(f"A persistent cache named '{name}' already exists")
+        base = name or f"cache_{next(_anonymous_ids)}"
+        unique = base
+        suffix = 2
+        while unique in _registry:
+            unique = f"{base}_{suffix}"
+            suffix += 1
+        _registry[unique] = cache
+        return unique
+
+
+# 后台刷新（stale-while-revalidate / refresh-ahead）共用的线程池，按需创建
+_refresh_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _refresh_executor() -> ThreadPoolExecutor:
+    global _refresh_pool
+    with _registry_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        return _refresh_pool
+
+
+# 持久化目录，None 表示只使用内存缓存
+_persist_dir: Optional[str] = None
+
+
+def _store_path(name: str) -> str:
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(_persist_dir, f"{safe_name}.sqlite3")
+
+
+def _open_store(name: str) -> Optional[SqliteCacheStore]:
+    """打开名为 name 的磁盘存储层，失败时记录日志并返回 None（只使用内存缓存）"""
+    path = _store_path(name)
+    try:
+        return SqliteCacheStore(path)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"无法打开持久化缓存，只使用内存缓存: {path}, 错误: {e}")
+        return None
+
+
+def configure_persistence(cache_dir: Optional[str]) -> None:
+    """
+    为进程内所有（包括之后创建的）允许持久化的 Cache 启用 SQLite 磁盘层。
+    每个缓存按名称使用 cache_dir 下的独立数据库文件。
+
+    Args:
+        cache_dir: 持久化目录，为 None 时不做任何处理
+    """
+    global _persist_dir
+    if not cache_dir:
+        return
+    _persist_dir = os.path.abspath(cache_dir)
+    for name, cache in get_caches().items():
+        if cache.persistent and cache.store is None:
+            store = _open_store(name)
+            if store is not None:
+                cache.attach_store(store)
+    logger.info(f"缓存持久化已启用: {_persist_dir}")
+
+
+def get_persist_dir() -> Optional[str]:
+    """返回 configure_persistence 配置的持久化目录，未启用时为 None"""
+    return _persist_dir
+
+
+def get_caches() -> Dict[str, "Cache"]:
+    """返回当前进程中所有存活的 Cache 实例（名称 -> 实例）"""
+    with _registry_lock:
+        return dict(_registry.items())
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """汇总当前进程中所有 Cache 实例的统计信息"""
+    return {name: cache.stats() for name, cache in sorted(get_caches().items())}
 
 
 # 缓存类
 class Cache:
-    def __init__(self, ttl: int = 300):  # 默认缓存5分钟
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    """
+    有界的 LRU + TTL 缓存。
+
+    - 条目数量和近似字节数都有上限，超出时按最近最少使用顺序淘汰（O(1)）
+    - 过期条目在读取时淘汰，并按 sweep_interval 周期性地批量清扫
+    - set 时可以通过 ttl 参数为单个键覆盖默认过期时间
+    - 所有操作都在锁内完成，可在多线程中共享同一个实例
+    - get_or_compute / aget_or_compute 对同一个键的并发未命中只执行一次计算，
+      其余调用方等待该次计算的结果（single-flight）
+    - 记录命中、未命中、过期、淘汰等计数，并以 name 注册到全局注册表，
+      可通过 cache_stats() 统一查看
+    - 可选的第二级磁盘存储（SqliteCacheStore）：内存未命中时先查磁盘，
+      重启后无需重新计算即可命中；只有 persistent=True 的实例会被持久化，这类实例必须指定唯一的 name，
+      持久化文件按 name 命名
+    - stale_ttl > 0 时开启 stale-while-revalidate：过期后 stale_ttl 秒内，
+      get_or_compute 直接返回旧值，同时在后台刷新；负结果不适用，过期后立即重新计算
+    - refresh_ahead 为 0~1 的比例：命中时剩余有效期不足 ttl * refresh_ahead，
+      就提前在后台刷新，热点键不会真正过期
+    - lookup 返回 (是否命中, 值)，可以缓存 None、空字符串、空列表等假值；
+      negative=True 写入的"负结果"（如表不存在、结果为空）使用较短的 negative_ttl，且只保存在内存中
+    """
+
+    def __init__(
+        self,
+        ttl: int = 300,  # 默认缓存5分钟
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60,
+        name: Optional[str] = None,
+        persistent: bool = False,
+        store: Optional[SqliteCacheStore] = None,
+        stale_ttl: float = 0,
+        refresh_ahead: float = 0,
+        negative_ttl: float = 30,
+    ):
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sweep_interval = sweep_interval
+        self._stale_ttl = stale_ttl
+        self._refresh_ahead = refresh_ahead
+        self._negative_ttl = negative_ttl
+        self._bytes = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.RLock()
+        # 正在计算中的键 -> 计算结果的 Future，同步与异步调用方共用
+        self._flights: Dict[str, Future] = {}
+        # 统计计数
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._computes = 0
+        self._compute_seconds = 0.0
+        self._saved_seconds = 0.0
+        self._disk_hits = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+        self._negative_sets = 0
+        # 协程后台刷新任务的强引用，避免任务被提前回收
+        self._refresh_tasks: set = set()
+        if persistent and not name:
+            # 匿名缓存的名称按创建顺序编号，导入顺序变化后会读到其他缓存的持久化数据
+            raise ValueError("A persistent cache requires a name")
+        self.persistent = persistent
+        self.store = store
+        self.name = _register(self, name, exclusive=persistent)
+        if self.store is None and persistent and _persist_dir:
+            store = _open_store(self.name)
+            if store is not None:
+                self.attach_store(store)
+
+    def attach_store(self, store: SqliteCacheStore) -> None:
+        """挂载磁盘存储层"""
+        self.store = store
 
     def get(self, key: str) -> Optional[Any]:
-        if key in self._cache:
-            data = self._cache[key]
-            if time.time() - data["timestamp"] < self._ttl:
-                return data["value"]
-            else:
-                del self._cache[key]
-        return None
+        """读取缓存，未命中返回 None；需要区分"缓存了 None"和"未命中"时请使用 lookup"""
+        _, value = self.lookup(key)
+        return value
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """
+        读取缓存，只查找一次。
+
+        Returns:
+            Tuple[bool, Any]: (是否命中, 值)；未命中时值为 None
+        """
+        with self._lock:
+            now = time.monotonic()
+            swept = self._maybe_sweep(now)
+            entry = self._live_entry(key, now)
+            hit = entry is not None and entry.expires_at > now
+            if hit:
+                self._record_hit(key, entry)
+        if swept:
+            self._purge_store()
+        if hit:
+            return True, entry.value
+        found, value = self._load_from_store(key)
+        if found:
+            return True, value
+        with self._lock:
+            self._misses += 1
+        return False, None
 
-    def set(self, key: str, value: Any) -> None:
-        self._cache[key] = {"value": value, "timestamp": time.time()}
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, cost: float = 0.0, negative: bool = False) -> None:
+        """
+        写入缓存。
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 覆盖默认过期时间（秒）
+            cost: 计算该值花费的秒数，用于统计命中节省的时间
+            negative: 是否为负结果，未指定 ttl 时使用 negative_ttl
+        """
+        if negative:
+            if ttl is None:
+                ttl = self._negative_ttl
+            with self._lock:
+                self._negative_sets += 1
+        size = _estimate_size(value)
+        ttl = self._ttl if ttl is None else ttl
+        with self._lock:
+            now = time.monotonic()
+            swept = self._maybe_sweep(now)
+            # 单个值就超过容量上限时不缓存，同时丢弃旧值
+            fits = size <= self._max_bytes
+            self._remove(key)
+            if fits:
+                self._cache[key] = _CacheEntry(value, now + ttl, ttl, size, cost, negative)
+                self._bytes += size
+                self._evict()
+        if swept:
+            self._purge_store()
+        if self.store is None or not fits:
+            return
+        if negative:
+            # 负结果只在内存中短暂保留，同时删除磁盘上可能存在的旧值
+            self.store.delete(key)
+        else:
+            self.store.set(key, value, ttl, cost)
+
+    def get_or_compute(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float] = None,
+        negative: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 fn 计算并写入缓存。
+        同一个键同时只有一个线程执行 fn，其余线程阻塞等待并共享结果（或异常）。
+        开启 stale_ttl / refresh_ahead 时，fn 也会被用于后台刷新。
+
+        Args:
+            key: 缓存键
+            fn: 无参的计算函数
+            ttl: 覆盖默认过期时间（秒）
+            negative: 判断计算结果是否为负结果的函数，负结果按 negative_ttl 缓存
+
+        Returns:
+            Any: 缓存值或新计算出的值
+        """
+        kind, payload, refresh = self._join_flight(key)
+        if kind == "hit":
+            if refresh is not None:
+                self._refresh_in_background(key, fn, ttl, negative, refresh)
+            return payload
+        if kind == "wait":
+            return payload.result()
+        found, value = self._load_from_store(key)
+        if found:
+            self._finish_flight(key, payload, value=value, from_store=True)
+            return value
+        return self._run_flight(key, fn, ttl, negative, payload)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float] = None,
+        negative: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        get_or_compute 的 asyncio 版本，等待期间不阻塞事件循环。
+        fn 可以是协程函数；普通函数会被放到线程中执行。
+        与同步调用方共享同一份 single-flight 状态。
+        """
+        kind, payload, refresh = self._join_flight(key)
+        if kind == "hit":
+            if refresh is not None:
+                if inspect.iscoroutinefunction(fn):
+                    task = asyncio.get_running_loop().create_task(self._arefresh(key, fn, ttl, negative, refresh))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                else:
+                    self._refresh_in_background(key, fn, ttl, negative, refresh)
+            return payload
+        if kind == "wait":
+            return await asyncio.wrap_future(payload)
+        if self.store is not None:
+            found, value = await asyncio.to_thread(self._load_from_store, key)
+            if found:
+                self._finish_flight(key, payload, value=value, from_store=True)
+                return value
+        if inspect.iscoroutinefunction(fn):
+            return await self._arun_flight(key, fn, ttl, negative, payload)
+        return await asyncio.to_thread(self._run_flight, key, fn, ttl, negative, payload)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """删除键以 prefix 开头的全部条目，包括磁盘层"""
+        with self._lock:
+            for key in [key for key in self._cache if key.startswith(prefix)]:
+                self._remove(key)
+        if self.store is not None:
+            self.store.delete_prefix(prefix)
 
     def clear(self) -> None:
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回缓存的统计信息。
+
+        Returns:
+            Dict[str, Any]: 命中/未命中/过期/淘汰次数、条目数、字节数、命中率，
+            以及平均计算耗时和命中累计节省的时间（秒）
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "ttl": self._ttl,
+                "computes": self._computes,
+                "avg_compute_seconds": round(self._compute_seconds / self._computes, 6) if self._computes else 0.0,
+                "saved_seconds": round(self._saved_seconds, 6),
+                "avg_saved_seconds": round(self._saved_seconds / self._hits, 6) if self._hits else 0.0,
+                "disk_hits": self._disk_hits,
+                "stale_hits": self._stale_hits,
+                "refreshes": self._refreshes,
+                "negative_sets": self._negative_sets,
+                "negative_ttl": self._negative_ttl,
+                "store": self.store.path if self.store is not None else None,
+            }
+
+    def reset_stats(self) -> None:
+        """清零统计计数（不影响缓存内容）"""
+        with self._lock:
+            self._hits = self._misses = self._expirations = self._evictions = self._computes = 0
+            self._disk_hits = self._stale_hits = self._refreshes = self._negative_sets = 0
+            self._compute_seconds = self._saved_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    @property
+    def size_bytes(self) -> int:
+        """当前缓存条目的近似总字节数"""
+        return self._bytes
+
+    def sweep(self) -> int:
+        """
+        清除所有已过期的条目。
+
+        Returns:
+            int: 被清除的条目数量
+        """
+        with self._lock:
+            expired = self._sweep_memory(time.monotonic())
+        self._purge_store()
+        return expired
+
+    def _sweep_memory(self, now: float) -> int:
+        # 调用方持有锁；磁盘层的清理由调用方在释放锁之后执行
+        self._next_sweep = now + self._sweep_interval
+        expired = [key for key, entry in self._cache.items() if entry.expires_at + self._grace(entry) <= now]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+        return len(expired)
+
+    def _purge_store(self) -> None:
+        if self.store is not None:
+            self.store.purge_expired()
+
+    def _grace(self, entry: _CacheEntry) -> float:
+        # 负结果（如表不存在）过期后不再作为旧值返回，否则新建的对象在 stale_ttl 内仍被报告为不存在
+        return 0 if entry.negative else self._stale_ttl
+
+    def _live_entry(self, key: str, now: float) -> Optional[_CacheEntry]:
+        # 返回未过期或仍在 stale 宽限期内的条目；超出宽限期的条目顺带删除
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at + self._grace(entry) <= now:
+            self._remove(key)
+            self._expirations += 1
+            return None
+        return entry
+
+    def _record_hit(self, key: str, entry: _CacheEntry) -> None:
+        # 命中后移动到队尾，表示最近使用
+        self._cache.move_to_end(key)
+        self._hits += 1
+        self._saved_seconds += entry.cost
+
+    def _load_from_store(self, key: str) -> Tuple[bool, Any]:
+        """
+        从磁盘层读取条目并回填到内存，命中时计入 hits 与 disk_hits。
+        调用方在单飞计算中已计入一次 miss，这里命中时将其更正为 hit。
+        """
+        if self.store is None:
+            return False, None
+        loaded = self.store.get(key)
+        if loaded is None:
+            return False, None
+        value, remaining, cost = loaded
+        size = _estimate_size(value)
+        with self._lock:
+            if size <= self._max_bytes:
+                self._remove(key)
+                self._cache[key] = _CacheEntry(value, time.monotonic() + remaining, remaining, size, cost)
+                self._bytes += size
+                self._evict()
+            self._hits += 1
+            self._disk_hits += 1
+            self._saved_seconds += cost
+        return True, value
+
+    def _store_computed(
+        self, key: str, value: Any, ttl: Optional[float], negative: Optional[Callable[[Any], bool]], cost: float
+    ) -> None:
+        with self._lock:
+            self._computes += 1
+            self._compute_seconds += cost
+        self.set(key, value, ttl, cost=cost, negative=bool(negative and negative(value)))
+
+    def _join_flight(self, key: str) -> Tuple[str, Any, Optional[Future]]:
+        """
+        返回 (kind, payload, refresh)：
+        - ("hit", 缓存值, refresh)：命中（可能是宽限期内的旧值），
+          refresh 不为 None 时调用方需要在后台完成这次刷新
+        - ("wait", flight, None)：其他调用方正在计算，等待 flight 的结果
+        - ("lead", flight, None)：由当前调用方计算并完成 flight
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                fresh = entry.expires_at > now
+                self._record_hit(key, entry)
+                if not fresh:
+                    self._stale_hits += 1
+                refresh = None
+                if key not in self._flights and (not fresh or entry.expires_at - now < entry.ttl * self._refresh_ahead):
+                    refresh = self._flights[key] = Future()
+                return "hit", entry.value, refresh
+            flight = self._flights.get(key)
+            if flight is not None:
+                # 等待其他调用方的计算结果，同样避免了一次计算
+                self._hits += 1
+                return "wait", flight, None
+            self._misses += 1
+            flight = self._flights[key] = Future()
+            return "lead", flight, None
+
+    def _run_flight(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float],
+        negative: Optional[Callable[[Any], bool]],
+        flight: Future,
+    ) -> Any:
+        # 执行计算、写入缓存并完成 flight；异常会传递给所有等待方
+        started = time.perf_counter()
+        try:
+            value = fn()
+        except BaseException as e:
+            self._finish_flight(key, flight, error=e)
+            raise
+        self._store_computed(key, value, ttl, negative, time.perf_counter() - started)
+        self._finish_flight(key, flight, value=value)
+        return value
+
+    async def _arun_flight(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float],
+        negative: Optional[Callable[[Any], bool]],
+        flight: Future,
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            value = await fn()
+        except BaseException as e:
+            self._finish_flight(key, flight, error=e)
+            raise
+        self._store_computed(key, value, ttl, negative, time.perf_counter() - started)
+        self._finish_flight(key, flight, value=value)
+        return value
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float],
+        negative: Optional[Callable[[Any], bool]],
+        flight: Future,
+    ) -> None:
+        with self._lock:
+            self._refreshes += 1
+
+        def refresh() -> None:
+            try:
+                self._run_flight(key, fn, ttl, negative, flight)
+            except Exception as e:
+                # 刷新失败时保留旧值，下次访问会再次尝试
+                logger.warning(f"缓存后台刷新失败: {self.name}/{key}, 错误: {e}")
+
+        _refresh_executor().submit(refresh)
+
+    async def _arefresh(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        ttl: Optional[float],
+        negative: Optional[Callable[[Any], bool]],
+        flight: Future,
+    ) -> None:
+        with self._lock:
+            self._refreshes += 1
+        try:
+            await self._arun_flight(key, fn, ttl, negative, flight)
+        except Exception as e:
+            logger.warning(f"缓存后台刷新失败: {self.name}/{key}, 错误: {e}")
+
+    def _finish_flight(
+        self,
+        key: str,
+        flight: Future,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+        from_store: bool = False,
+    ) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if from_store:
+                # 单飞入口已按未命中计数，磁盘命中时撤销这次 miss
+                self._misses -= 1
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(value)
+
+    def _maybe_sweep(self, now: float) -> bool:
+        # 摊还清扫：距离上次清扫超过 sweep_interval 才执行一次全量扫描；
+        # 返回 True 时调用方需在释放锁之后调用 _purge_store
+        if now >= self._next_sweep:
+            self._sweep_memory(now)
+            return True
+        return False
+
+    def _evict(self) -> None:
+        # 按 LRU 顺序从队首淘汰，直到条目数与字节数都回到上限之内
+        while self._cache and (len(self._cache) > self._max_entries or self._bytes > self._max_bytes):
+            _, entry = self._cache.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
+
+    def _remove(self, key: str) -> Optional[_CacheEntry]:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
@@ -0,0 +1,255 @@
+"""
+HTTP 响应压缩
+
+按请求的 Accept-Encoding 协商 zstd / br / gzip（brotli、zstandard 为可选依赖，未安装时只提供 gzip），
+只压缩文本类响应（JSON、SSE、text/*）：
+
+- 完整响应体小于阈值时原样返回
+- 完整响应体较大时分块压缩、分块发送（chunked），客户端无需等待整个结果压缩完成
+- 流式响应（SSE）逐条压缩并 flush，事件不会被压缩器缓冲
+"""
+
+import functools
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 可压缩的内容类型
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+_COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+# 多个编码的 q 值相同时，按此顺序选择
+_PREFERENCE = ("zstd", "br", "gzip")
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        try:
+            # Python 3.14+ 标准库
+            from compression import zstd
+
+            self._compressor = zstd.ZstdCompressor(level=3)
+            self._flush_block = zstd.ZstdCompressor.FLUSH_BLOCK
+            self._stdlib = True
+        except ImportError:
+            import zstandard
+
+            self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+            self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._stdlib = False
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+@functools.lru_cache(maxsize=1)
+def available_encodings() -> Dict[str, Callable[[], object]]:
+    """返回当前环境可用的编码及其压缩器工厂"""
+    encoders: Dict[str, Callable[[], object]] = {"gzip": _GzipEncoder}
+    try:
+        import brotli  # noqa: F401
+
+        encoders["br"] = _BrotliEncoder
+    except ImportError:
+        pass
+    try:
+        from compression import zstd  # noqa: F401
+
+        encoders["zstd"] = _ZstdEncoder
+    except ImportError:
+        try:
+            import zstandard  # noqa: F401
+
+            encoders["zstd"] = _ZstdEncoder
+        except ImportError:
+            pass
+    return encoders
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择编码：先比较 q 值，相同时按 zstd > br > gzip
+
+    Returns:
+        选中的编码，没有可用编码时返回 None
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    available = available_encodings()
+    best, best_q = None, 0.0
+    for encoding in _PREFERENCE:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith(_COMPRESSIBLE_TYPES) or content_type.endswith(_COMPRESSIBLE_SUFFIXES)
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    Args:
+        app: 被包装的 ASGI 应用
+        minimum_size: 完整响应体小于该字节数时不压缩
+        chunk_size: 大响应体分块发送时每块的字节数，响应体超过 4 倍 chunk_size 时分块发送
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, chunk_size: int = 64 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.chunk_size = chunk_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _CompressionResponder(self, encoding, send).send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        # None: 尚未决定；"identity": 原样转发；"stream": 流式压缩中
+        self._mode: Optional[str] = None
+        self._encoder = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            if (
+                self.encoding is None
+                or "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type", ""))
+            ):
+                self._mode = "identity"
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._mode is None:
+            if more_body:
+                # 流式响应：逐条压缩并 flush
+                self._mode = "stream"
+                self._encoder = available_encodings()[self.encoding]()
+                await self._send(self._encoded_start(None))
+            elif len(body) < self.middleware.minimum_size:
+                self._mode = "identity"
+            else:
+                await self._send_compressed(body)
+                return
+
+        if self._mode == "identity":
+            if self._start is not None:
+                start, self._start = self._start, None
+                await self._send(start)
+                if not more_body and len(body) > self.middleware.chunk_size * 4:
+                    await self._send_chunked(body, None)
+                    return
+            await self._send(message)
+            return
+
+        data = self._encoder.compress(body) if body else b""
+        data += self._encoder.flush() if more_body else self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _encoded_start(self, content_length: Optional[int]) -> Message:
+        start, self._start = self._start, None
+        headers = MutableHeaders(raw=list(start["headers"]))
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            headers["content-length"] = str(content_length)
+        return {**start, "headers": headers.raw}
+
+    async def _send_compressed(self, body: bytes) -> None:
+        encoder = available_encodings()[self.encoding]()
+        if len(body) <= self.middleware.chunk_size * 4:
+            data = encoder.compress(body) + encoder.finish()
+            await self._send(self._encoded_start(len(data)))
+            await self._send({"type": "http.response.body", "body": data})
+            return
+        await self._send(self._encoded_start(None))
+        await self._send_chunked(body, encoder)
+
+    async def _send_chunked(self, body: bytes, encoder) -> None:
+        """把大响应体分块（压缩后）发送，每块都等待传输层背压"""
+        view = memoryview(body)
+        size = self.middleware.chunk_size
+        for offset in range(0, len(body), size):
+            chunk = bytes(view[offset : offset + size])
+            if encoder is not None:
+                chunk = encoder.compress(chunk)
+                if not chunk:
+                    continue
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+        tail = encoder.finish() if encoder is not None else b""
+        await self._send({"type": "http.response.body", "body": tail, "more_body": False})
@@ -0,0 +1,192 @@
+"""
+同步工具的线程池执行层
+
+仓库中的工具几乎都是阻塞 I/O 的普通函数（MySQL 查询、GitHub 请求、文件读写、压缩等），
+FastMCP 会直接在事件循环中调用它们，一个慢查询就会卡住同一进程内所有会话。
+install_executor 把服务器上的同步工具改为在有界线程池中执行，并支持：
+
+- 线程池大小可配置
+- 按工具限制并发数（超出的调用在事件循环中排队等待，不占用线程）
+- 限制排队中的调用数量，队列满时立即返回错误而不是无限堆积
+
+修改共享状态、不能并发执行的同步工具用 @not_thread_safe 标记（放在 @mcp.tool() 下方），
+install_executor 不会把它们放入线程池，仍在事件循环中逐个执行。
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+
+class ExecutorBusyError(RuntimeError):
+    """排队中的工具调用数量已达上限"""
+
+
+class ToolExecutor:
+    """
+    有界线程池执行器
+
+    Args:
+        max_workers: 线程池大小，默认 min(32, CPU 数 + 4)
+        max_queue: 最多允许多少个调用处于排队状态（等待并发名额或等待线程），None 表示不限制
+        default_limit: 每个工具默认的最大并发数，None 表示不限制
+        tool_limits: 按工具名单独指定的最大并发数
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = 256,
+        default_limit: Optional[int] = None,
+        tool_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_queue = max_queue
+        self.default_limit = default_limit
+        self.tool_limits = dict(tool_limits or {})
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="mcp-tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _semaphore(self, name: str) -> Optional[asyncio.Semaphore]:
+        limit = self.tool_limits.get(name, self.default_limit)
+        if not limit:
+            return None
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def run(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在线程池中执行 fn，受该工具的并发限制和全局排队上限约束
+
+        Args:
+            name: 工具名称，用于查找并发限制
+            fn: 要执行的同步函数
+
+        Returns:
+            fn 的返回值
+        """
+        with self._lock:
+            if self.max_queue is not None and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusyError(f"服务器繁忙：排队中的工具调用已达上限 ({self.max_queue})，请稍后重试")
+            self._queued += 1
+
+        # queued -> running / cancelled，由锁保护，保证计数只调整一次
+        state = ["queued"]
+        context = contextvars.copy_context()
+
+        def call() -> Any:
+            with self._lock:
+                if state[0] != "queued":
+                    return None
+                state[0] = "running"
+                self._queued -= 1
+                self._running += 1
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(name)
+        try:
+            if semaphore is None:
+                return await loop.run_in_executor(self._pool, call)
+            async with semaphore:
+                return await loop.run_in_executor(self._pool, call)
+        finally:
+            with self._lock:
+                if state[0] == "queued":
+                    state[0] = "cancelled"
+                    self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回线程池的运行统计"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "default_limit": self.default_limit,
+                "tool_limits": dict(self.tool_limits),
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# 进程内共享的执行器，由 configure_executor 配置，get_executor 按需创建
+_executor: Optional[ToolExecutor] = None
+
+
+def configure_executor(
+    max_workers: Optional[int] = None,
+    max_queue: Optional[int] = 256,
+    default_limit: Optional[int] = None,
+    tool_limits: Optional[Dict[str, int]] = None,
+) -> ToolExecutor:
+    """
+    替换进程内共享的执行器，参数同 ToolExecutor。已安装到服务器的工具会在下次调用时使用新的执行器。
+    """
+    global _executor
+    previous = _executor
+    _executor = ToolExecutor(max_workers, max_queue, default_limit, tool_limits)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _executor
+
+
+def get_executor() -> ToolExecutor:
+    """获取进程内共享的执行器，未配置时使用默认参数创建"""
+    global _executor
+    if _executor is None:
+        _executor = ToolExecutor()
+    return _executor
+
+
+def not_thread_safe(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """标记不能并发执行的同步工具，install_executor 会跳过它"""
+    fn.__mcp_thread_unsafe__ = True
+    return fn
+
+
+def _offload(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await get_executor().run(name, fn, *args, **kwargs)
+
+    wrapper.__mcp_offloaded__ = True
+    return wrapper
+
+
+def install_executor(mcp: FastMCP) -> None:
+    """
+    把服务器上已注册的同步工具改为在共享线程池中执行。
+    参数校验仍由 FastMCP 完成，只替换最终被调用的函数；async 工具和 @not_thread_safe 标记的工具保持不变。
+    应在所有工具注册完成后调用，重复调用是安全的。
+    """
+    for tool in mcp._tool_manager.list_tools():
+        if tool.is_async or getattr(tool.fn, "__mcp_offloaded__", False):
+            continue
+        if getattr(tool.fn, "__mcp_thread_unsafe__", False):
+            continue
+        tool.fn = _offload(tool.name, tool.fn)
+        tool.is_async = True
@@ -0,0 +1,42 @@
+"""
+延迟导入
+
+数据库驱动、HTTP 客户端等模块导入较慢，而 stdio 客户端每个会话都会重新启动服务器进程。
+lazy_import 返回的模块对象在第一次访问属性时才真正执行导入，服务器启动时不再为用不到的依赖付出代价。
+"""
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    延迟导入模块，第一次访问属性时才执行模块代码
+
+    Args:
+        name: 完整的模块名，例如 "mysql.connector"
+
+    Returns:
+        模块对象（已导入时直接返回 sys.modules 中的模块）
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    parent_name, _, child_name = name.rpartition(".")
+    parent = importlib.import_module(parent_name) if parent_name else None
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    if parent is not None:
+        # 与常规导入一致，子模块同时作为父包的属性
+        setattr(parent, child_name, module)
+    return module
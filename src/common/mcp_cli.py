@@ -1,4 +1,7 @@
+import json
+import sys
 from functools import wraps
+from typing import Any, Callable, Dict
 
 import click
 from mcp.server import FastMCP
@@ -6,10 +9,76 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.types import ASGIApp
 
 
+# 由 with_mcp_options 解析、run_mcp_server 使用的运行时选项
+_runtime_options: Dict[str, Any] = {
+    "cache_dir": None,
+    "workers": 1,
+    "limit_concurrency": None,
+    "backlog": 2048,
+    "timeout_keep_alive": 5,
+    "tool_threads": None,
+    "tool_queue": 256,
+    "tool_concurrency": None,
+    "tool_limit": {},
+    "metrics": False,
+    "compression": True,
+    "compression_min_size": 1024,
+    "ip_rate_limit": 0.0,
+    "session_rate_limit": 0.0,
+    "ip_max_concurrent": None,
+    "session_max_concurrent": None,
+}
+
+
+def _parse_tool_limits(ctx, param, values) -> Dict[str, int]:
+    """解析 --tool-limit name=N"""
+    limits = {}
+    for value in values:
+        name, sep, limit = value.partition("=")
+        if not sep or not name or not limit.isdigit() or int(limit) < 1:
+            raise click.BadParameter(f"格式应为 工具名=并发数，实际为 {value!r}")
+        limits[name] = int(limit)
+    return limits
+
+
+def apply_runtime_options(options: Dict[str, Any]) -> None:
+    """
+    更新运行时选项（多进程模式下工作进程也会调用）
+
+    Args:
+        options: 选项名到取值的映射
+    """
+    _runtime_options.update(options)
+    if _runtime_options["cache_dir"]:
+        from common.cache import configure_persistence
+
+        configure_persistence(_runtime_options["cache_dir"])
+
+    from common.executor import configure_executor
+
+    configure_executor(
+        max_workers=_runtime_options["tool_threads"],
+        max_queue=_runtime_options["tool_queue"] or None,
+        default_limit=_runtime_options["tool_concurrency"],
+        tool_limits=_runtime_options["tool_limit"],
+    )
+
+
+def _module_name(f) -> str:
+    """被装饰函数所在模块的可导入名称（以 python -m 运行时 __module__ 为 __main__）"""
+    if f.__module__ == "__main__":
+        spec = getattr(sys.modules["__main__"], "__spec__", None)
+        if spec is None:
+            raise click.UsageError("--profile-startup 需要通过入口脚本或 python -m 启动")
+        return spec.name
+    return f.__module__
+
+
 def with_mcp_options(default_port=3001):
     """
     一个封装了常用 click 选项的自定义装饰器，
     可以设置 --port 的默认值。
+    --cache-dir、--workers、--profile-startup 等运行时选项由装饰器自身处理，不会传给被装饰的函数。
 
     Args:
         default_port (int): 用于设置 --port 选项的默认值。
@@ -24,8 +93,115 @@ def with_mcp_options(default_port=3001):
             help="Transport type",
         )
         @click.option("--port", type=int, default=default_port, help="Port to listen on")
+        @click.option(
+            "--cache-dir",
+            type=click.Path(file_okay=False),
+            default=None,
+            envvar="MCP_CACHE_DIR",
+            help="Directory for the persistent SQLite cache tier (memory only if omitted)",
+        )
+        @click.option(
+            "--workers",
+            type=click.IntRange(min=1),
+            default=1,
+            envvar="MCP_WORKERS",
+            help="Number of worker processes for HTTP transports (sessions stick to one worker)",
+        )
+        @click.option(
+            "--limit-concurrency",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Maximum concurrent connections per process before responding with 503",
+        )
+        @click.option("--backlog", type=click.IntRange(min=1), default=2048, help="Socket listen backlog")
+        @click.option(
+            "--timeout-keep-alive",
+            type=click.IntRange(min=0),
+            default=5,
+            help="Seconds to keep idle HTTP keep-alive connections open",
+        )
+        @click.option(
+            "--tool-threads",
+            type=click.IntRange(min=1),
+            default=None,
+            envvar="MCP_TOOL_THREADS",
+            help="Thread pool size for synchronous tools (default: min(32, CPUs + 4))",
+        )
+        @click.option(
+            "--tool-queue",
+            type=click.IntRange(min=0),
+            default=256,
+            help="Maximum queued tool calls before rejecting new ones as busy (0 = unlimited)",
+        )
+        @click.option(
+            "--tool-concurrency",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Default maximum concurrent calls per tool",
+        )
+        @click.option(
+            "--tool-limit",
+            multiple=True,
+            callback=_parse_tool_limits,
+            metavar="NAME=N",
+            help="Maximum concurrent calls for a specific tool, e.g. --tool-limit read_query=4 (repeatable)",
+        )
+        @click.option(
+            "--metrics",
+            is_flag=True,
+            default=False,
+            envvar="MCP_METRICS",
+            help="Record per-tool latency/size/error metrics (server_metrics tool, /metrics on HTTP)",
+        )
+        @click.option(
+            "--compression/--no-compression",
+            default=True,
+            help="Negotiate zstd/br/gzip compression for HTTP responses",
+        )
+        @click.option(
+            "--compression-min-size",
+            type=click.IntRange(min=0),
+            default=1024,
+            help="Minimum response body size in bytes before compressing",
+        )
+        @click.option(
+            "--ip-rate-limit",
+            type=click.FloatRange(min=0),
+            default=0.0,
+            help="Requests per second allowed per client IP, bursts up to 2x (0 = unlimited)",
+        )
+        @click.option(
+            "--session-rate-limit",
+            type=click.FloatRange(min=0),
+            default=0.0,
+            help="Requests per second allowed per Mcp-Session-Id, bursts up to 2x (0 = unlimited)",
+        )
+        @click.option(
+            "--ip-max-concurrent",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Maximum in-flight requests per client IP before answering 429",
+        )
+        @click.option(
+            "--session-max-concurrent",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Maximum in-flight requests per Mcp-Session-Id before answering 429",
+        )
+        @click.option(
+            "--profile-startup",
+            is_flag=True,
+            default=False,
+            help="Print an import-time breakdown of this server in a fresh interpreter and exit",
+        )
         @wraps(f)
-        def decorated_function(*args, **kwargs):
+        def decorated_function(*args, profile_startup=False, **kwargs):
+            if profile_startup:
+                from common.startup import report_startup
+
+                report_startup(_module_name(f))
+                return None
+            apply_runtime_options({name: kwargs.pop(name) for name in list(_runtime_options) if name in kwargs})
             return f(*args, **kwargs)
 
         return decorated_function
@@ -33,16 +209,137 @@ def with_mcp_options(default_port=3001):
     return decorator
 
 
-def run_server_with_cors(app: ASGIApp, host: str = "0.0.0.0", port: int = 3001):
-    starlette_app = CORSMiddleware(
-        app,
-        allow_origins=["*"],  # Allow all origins - adjust as needed for production
-        allow_methods=["GET", "POST", "DELETE"],  # MCP streamable HTTP methods
-        expose_headers=["Mcp-Session-Id"],
-    )
+def create_http_app(mcp: FastMCP, transport: str) -> ASGIApp:
+    """
+    按传输方式创建服务器的 ASGI 应用
+
+    Args:
+        mcp: FastMCP服务器实例
+        transport: 传输方式 ("sse", "streamable")
+    """
+    if transport == "sse":
+        return mcp.sse_app()
+    return mcp.streamable_http_app()
+
+
+def wrap_http_app(app: ASGIApp, edge: bool = True) -> ASGIApp:
+    """
+    按运行时选项为 ASGI 应用加上压缩、限流和 CORS 中间件
+
+    Args:
+        app: ASGI 应用
+        edge: 是否直接面对客户端；多进程模式下的工作进程为 False，限流与 CORS 由主进程的代理负责
+    """
+    if _runtime_options["compression"]:
+        from common.compression import CompressionMiddleware
+
+        # 已压缩的响应（例如多进程模式下工作进程返回的响应）会原样通过
+        app = CompressionMiddleware(app, minimum_size=_runtime_options["compression_min_size"])
+    limits = {
+        "ip_rate": _runtime_options["ip_rate_limit"],
+        "session_rate": _runtime_options["session_rate_limit"],
+        "ip_max_concurrent": _runtime_options["ip_max_concurrent"],
+        "session_max_concurrent": _runtime_options["session_max_concurrent"],
+    }
+    if edge and any(limits.values()):
+        from common.ratelimit import RateLimitMiddleware
+
+        app = RateLimitMiddleware(app, **limits)
+    if edge:
+        app = CORSMiddleware(
+            app,
+            allow_origins=["*"],  # Allow all origins - adjust as needed for production
+            allow_methods=["GET", "POST", "DELETE"],  # MCP streamable HTTP methods
+            expose_headers=["Mcp-Session-Id"],
+        )
+    return app
+
+
+def uvicorn_options() -> Dict[str, Any]:
+    """uvicorn 的连接参数（--limit-concurrency、--backlog、--timeout-keep-alive）"""
+    return {
+        "limit_concurrency": _runtime_options["limit_concurrency"],
+        "backlog": _runtime_options["backlog"],
+        "timeout_keep_alive": _runtime_options["timeout_keep_alive"],
+    }
+
+
+def run_server_with_cors(app: ASGIApp, host: str = "0.0.0.0", port: int = 3001, edge: bool = True):
+    """
+    以 uvicorn 运行 ASGI 应用，按运行时选项加上压缩、限流和 CORS 中间件
+
+    Args:
+        app: ASGI 应用
+        host: 服务器主机地址
+        port: 服务器端口
+        edge: 是否直接面对客户端；多进程模式下的工作进程为 False，限流与 CORS 由主进程的代理负责
+    """
     import uvicorn
 
-    uvicorn.run(starlette_app, host=host, port=port)
+    uvicorn.run(wrap_http_app(app, edge), host=host, port=port, **uvicorn_options())
+
+
+def install_cache_stats(mcp: FastMCP) -> None:
+    """
+    为服务器注册 cache_stats 工具和 cache://stats 资源，
+    用于查看本进程内所有 Cache 实例的命中率等统计信息。
+    """
+    from common.cache import cache_stats
+
+    if mcp._tool_manager.get_tool("cache_stats") is not None:
+        return
+
+    @mcp.tool(name="cache_stats")
+    def cache_stats_tool() -> Dict[str, Any]:
+        """
+        查看当前服务器进程内所有缓存的统计信息：
+        命中/未命中次数、命中率、过期与淘汰次数、占用字节数、平均计算耗时及命中节省的时间。
+        """
+        return {"caches": cache_stats()}
+
+    @mcp.resource("cache://stats", mime_type="application/json")
+    def cache_stats_resource() -> str:
+        """当前服务器进程内所有缓存的统计信息（JSON）"""
+        return json.dumps(cache_stats(), ensure_ascii=False, indent=2)
+
+
+def prepare_server(mcp: FastMCP) -> None:
+    """
+    安装各服务器共用的运行时组件（缓存统计、工具线程池、调用指标），在启动传输层之前调用
+
+    Args:
+        mcp: FastMCP服务器实例
+    """
+    from common.executor import install_executor
+
+    install_cache_stats(mcp)
+    # 线程池在所有工具注册后安装；指标包装在最外层，记录的延迟包含排队时间
+    install_executor(mcp)
+    if _runtime_options["metrics"]:
+        from common.metrics import install_metrics
+
+        install_metrics(mcp)
+
+
+def run_http_app(factory: Callable[..., ASGIApp], transport: str, host: str, port: int, *args) -> None:
+    """
+    以 factory(transport, *args) 创建 ASGI 应用并运行，--workers 大于 1 时每个工作进程各自调用工厂。
+    factory 必须是模块级函数，以便工作进程重新导入。
+
+    Args:
+        factory: ASGI 应用工厂
+        transport: 传输方式 ("sse", "streamable")
+        host: 服务器主机地址
+        port: 服务器端口
+        *args: 传给工厂的额外参数（需可 pickle）
+    """
+    workers = _runtime_options["workers"]
+    if workers > 1:
+        from common.workers import find_app_reference, run_workers
+
+        run_workers(find_app_reference(factory), transport, host, port, workers, dict(_runtime_options), args)
+    else:
+        run_server_with_cors(factory(transport, *args), host=host, port=port)
 
 
 def run_mcp_server(mcp: FastMCP, transport: str, host: str = "0.0.0.0", port: int = 3001):
@@ -55,10 +352,16 @@ def run_mcp_server(mcp: FastMCP, transport: str, host: str = "0.0.0.0", port: in
         host: 服务器主机地址
         port: 服务器端口
     """
-    if transport == "sse":
-        run_server_with_cors(mcp.sse_app(), host=host, port=port)
-    elif transport == "streamable":
-        run_server_with_cors(mcp.streamable_http_app(), host=host, port=port)
+    prepare_server(mcp)
+
+    if transport in ("sse", "streamable"):
+        workers = _runtime_options["workers"]
+        if workers > 1:
+            from common.workers import find_app_reference, run_workers
+
+            run_workers(find_app_reference(mcp), transport, host, port, workers, dict(_runtime_options))
+        else:
+            run_server_with_cors(create_http_app(mcp, transport), host=host, port=port)
     else:
         # 在Windows系统上使用stdio时，需要处理stdout flush的问题
         import sys
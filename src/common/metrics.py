@@ -0,0 +1,351 @@
+"""
+工具 / 资源 / 提示词的调用指标
+
+install_metrics 会包装服务器上已注册的所有工具、资源（含资源模板）和提示词，记录：
+
+- 调用次数与错误次数
+- 延迟直方图（按桶统计，p50/p95/p99 由桶内线性插值估算，与 Prometheus histogram_quantile 一致）
+- 请求参数与返回结果的字节数
+
+HTTP 传输下通过 /metrics 暴露 Prometheus 文本格式，任意传输下都可以调用 server_metrics 工具查看。
+"""
+
+import inspect
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """固定桶的累计直方图"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶线性插值估算分位数，落在 +Inf 桶时返回最大的有限上界"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count > 0:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class _CallMetrics:
+    __slots__ = ("calls", "errors", "latency", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class MetricsRegistry:
+    """按 (服务器, 类型, 名称) 汇总调用指标，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, str, str], _CallMetrics] = {}
+
+    def record(
+        self, server: str, kind: str, name: str, seconds: float, bytes_in: int, bytes_out: int, error: bool
+    ) -> None:
+        with self._lock:
+            key = (server, kind, name)
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = _CallMetrics()
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.latency.observe(seconds)
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """返回各调用目标的汇总指标，延迟单位为毫秒"""
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        with self._lock:
+            result = []
+            for (server, kind, name), m in sorted(self._metrics.items()):
+                result.append(
+                    {
+                        "server": server,
+                        "kind": kind,
+                        "name": name,
+                        "calls": m.calls,
+                        "errors": m.errors,
+                        "avg_ms": ms(m.latency.sum / m.calls) if m.calls else None,
+                        "p50_ms": ms(m.latency.quantile(0.5)),
+                        "p95_ms": ms(m.latency.quantile(0.95)),
+                        "p99_ms": ms(m.latency.quantile(0.99)),
+                        "bytes_in": m.bytes_in,
+                        "bytes_out": m.bytes_out,
+                    }
+                )
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def render_prometheus(self) -> str:
+        """导出 Prometheus 文本格式（附带缓存与工具线程池的状态）"""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            items = [
+                (_labels(server=server, kind=kind, name=name), m)
+                for (server, kind, name), m in sorted(self._metrics.items())
+            ]
+            family("mcp_calls_total", "counter", "Number of tool/resource/prompt calls")
+            lines.extend(f"mcp_calls_total{{{labels}}} {m.calls}" for labels, m in items)
+            family("mcp_errors_total", "counter", "Number of calls that raised an error")
+            lines.extend(f"mcp_errors_total{{{labels}}} {m.errors}" for labels, m in items)
+            family("mcp_call_duration_seconds", "histogram", "Call latency in seconds")
+            for labels, m in items:
+                cumulative = 0
+                for bound, count in zip(m.latency.buckets + (float("inf"),), m.latency.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'mcp_call_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"mcp_call_duration_seconds_sum{{{labels}}} {m.latency.sum}")
+                lines.append(f"mcp_call_duration_seconds_count{{{labels}}} {m.latency.count}")
+            family("mcp_request_bytes_total", "counter", "Serialized size of call arguments")
+            lines.extend(f"mcp_request_bytes_total{{{labels}}} {m.bytes_in}" for labels, m in items)
+            family("mcp_response_bytes_total", "counter", "Serialized size of call results")
+            lines.extend(f"mcp_response_bytes_total{{{labels}}} {m.bytes_out}" for labels, m in items)
+
+        from common.cache import cache_stats
+        from common.executor import get_executor
+
+        caches = cache_stats()
+        for key, kind, help_text in (
+            ("hits", "counter", "Cache hits"),
+            ("misses", "counter", "Cache misses"),
+            ("evictions", "counter", "Cache evictions"),
+            ("entries", "gauge", "Entries held in memory"),
+            ("bytes", "gauge", "Estimated bytes held in memory"),
+        ):
+            metric = f"mcp_cache_{key}_total" if kind == "counter" else f"mcp_cache_{key}"
+            family(metric, kind, help_text)
+            for name, stats in caches.items():
+                lines.append(f"{metric}{{{_labels(cache=name)}}} {stats[key]}")
+
+        executor = get_executor().stats()
+        for key, kind, help_text in (
+            ("running", "gauge", "Tool calls running on the thread pool"),
+            ("queued", "gauge", "Tool calls waiting for a thread or concurrency slot"),
+            ("completed", "counter", "Tool calls completed on the thread pool"),
+            ("rejected", "counter", "Tool calls rejected because the queue was full"),
+        ):
+            metric = f"mcp_executor_{key}_total" if kind == "counter" else f"mcp_executor_{key}"
+            family(metric, kind, help_text)
+            lines.append(f"{metric} {executor[key]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+_SAMPLE_PATTERN = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?(\s.*)$")
+
+
+def merge_prometheus(texts: Iterable[str], label: str = "worker") -> str:
+    """
+    合并多个进程导出的 Prometheus 文本，为每条样本加上 label="序号"，
+    并把同一指标族的样本归到一起（文本格式要求同一族的样本连续出现）。
+    """
+    families: "OrderedDict[str, List[str]]" = OrderedDict()
+    headers: Dict[str, List[str]] = {}
+    for index, text in enumerate(texts):
+        current = ""
+        for line in text.splitlines():
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    current = parts[2]
+                    families.setdefault(current, [])
+                    if line not in headers.setdefault(current, []):
+                        headers[current].append(line)
+                continue
+            match = _SAMPLE_PATTERN.match(line)
+            if not match:
+                continue
+            name, labels, rest = match.groups()
+            labels = f'{label}="{index}"' + (f",{labels}" if labels else "")
+            families.setdefault(current or name, []).append(f"{name}{{{labels}}}{rest}")
+
+    lines: List[str] = []
+    for name, samples in families.items():
+        lines.extend(headers.get(name, []))
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+# 进程内共享的指标注册表
+registry = MetricsRegistry()
+
+
+def _payload_size(value: Any) -> int:
+    """估算参数或返回值序列化后的字节数"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="replace"))
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def _instrument(
+    server: str, kind: str, name: str, fn: Callable[..., Any], context_kwarg: Optional[str]
+) -> Callable[..., Any]:
+    def arguments_size(kwargs: Dict[str, Any]) -> int:
+        if context_kwarg:
+            kwargs = {k: v for k, v in kwargs.items() if k != context_kwarg}
+        return _payload_size(kwargs) if kwargs else 0
+
+    if inspect.iscoroutinefunction(fn):
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, error = None, True
+            try:
+                result = await fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                registry.record(
+                    server,
+                    kind,
+                    name,
+                    time.perf_counter() - start,
+                    arguments_size(kwargs),
+                    _payload_size(result),
+                    error,
+                )
+
+    else:
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, error = None, True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                registry.record(
+                    server,
+                    kind,
+                    name,
+                    time.perf_counter() - start,
+                    arguments_size(kwargs),
+                    _payload_size(result),
+                    error,
+                )
+
+    wrapper.__mcp_instrumented__ = True
+    return wrapper
+
+
+def install_metrics(mcp: FastMCP) -> None:
+    """
+    为服务器注册 server_metrics 工具和 /metrics 路由，并包装所有已注册的工具、资源、提示词。
+    应在工具线程池安装之后调用，这样记录的延迟包含排队时间；重复调用是安全的。
+    """
+    if mcp._tool_manager.get_tool("server_metrics") is None:
+
+        @mcp.tool(name="server_metrics")
+        def server_metrics() -> Dict[str, Any]:
+            """
+            查看当前服务器进程内各工具、资源、提示词的调用指标：
+            调用次数、错误次数、延迟 p50/p95/p99（毫秒）以及请求/响应字节数。
+            """
+            from common.executor import get_executor
+
+            return {"calls": registry.snapshot(), "executor": get_executor().stats()}
+
+        @mcp.custom_route("/metrics", methods=["GET"])
+        async def metrics_endpoint(request):
+            from starlette.responses import PlainTextResponse
+
+            return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    targets = [("tool", tool.name, tool) for tool in mcp._tool_manager.list_tools()]
+    targets += [("resource", str(uri), r) for uri, r in mcp._resource_manager._resources.items() if hasattr(r, "fn")]
+    targets += [("resource", uri, template) for uri, template in mcp._resource_manager._templates.items()]
+    targets += [("prompt", prompt.name, prompt) for prompt in mcp._prompt_manager.list_prompts()]
+    for kind, name, target in targets:
+        if getattr(target.fn, "__mcp_instrumented__", False):
+            continue
+        target.fn = _instrument(mcp.name, kind, name, target.fn, getattr(target, "context_kwarg", None))
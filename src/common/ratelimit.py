@@ -0,0 +1,195 @@
+"""
+HTTP 传输的准入控制
+
+按客户端 IP 和 MCP 会话（Mcp-Session-Id 请求头，SSE 为 session_id 查询参数）分别做：
+
+- 令牌桶限流：每秒补充 rate 个令牌，桶容量为 2 倍 rate（至少 1），允许短时突发
+- 最大并发请求数：超出时立即拒绝，不排队
+
+被拒绝的请求直接返回 HTTP 429 和 JSON-RPC 错误（带 Retry-After），不会进入服务器，
+单个客户端刷请求时其他客户端的尾延迟不受影响。
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# JSON-RPC 服务器自定义错误码
+RATE_LIMITED_ERROR_CODE = -32000
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def acquire(self) -> float:
+        """
+        取出一个令牌
+
+        Returns:
+            0 表示成功，否则为需要等待的秒数
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Limiter:
+    """一类客户端（IP 或会话）的令牌桶与并发计数，按最近使用保留有限数量的键"""
+
+    def __init__(self, rate: float, max_concurrent: Optional[int], max_keys: int = 10_000):
+        self.rate = rate
+        self.max_concurrent = max_concurrent
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+
+    def check_rate(self, key: str) -> float:
+        if not self.rate:
+            return 0.0
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, max(1.0, 2 * self.rate))
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.acquire()
+
+    def enter(self, key: str) -> bool:
+        active = self._active.get(key, 0)
+        if self.max_concurrent and active >= self.max_concurrent:
+            return False
+        self._active[key] = active + 1
+        return True
+
+    def leave(self, key: str) -> None:
+        active = self._active.get(key, 0) - 1
+        if active > 0:
+            self._active[key] = active
+        else:
+            self._active.pop(key, None)
+
+
+class RateLimitMiddleware:
+    """
+    按客户端 IP 与会话限流的 ASGI 中间件
+
+    Args:
+        app: 被包装的 ASGI 应用
+        ip_rate: 每个 IP 每秒允许的请求数，0 表示不限制
+        session_rate: 每个会话每秒允许的请求数，0 表示不限制
+        ip_max_concurrent: 每个 IP 的最大并发请求数，None 表示不限制
+        session_max_concurrent: 每个会话的最大并发请求数，None 表示不限制
+        exempt_paths: 不受限制的路径（例如指标采集）
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        ip_rate: float = 0,
+        session_rate: float = 0,
+        ip_max_concurrent: Optional[int] = None,
+        session_max_concurrent: Optional[int] = None,
+        exempt_paths: Tuple[str, ...] = ("/metrics",),
+    ):
+        self.app = app
+        self.ip = _Limiter(ip_rate, ip_max_concurrent)
+        self.session = _Limiter(session_rate, session_max_concurrent)
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        session_id = headers.get("mcp-session-id")
+        if session_id is None and scope.get("query_string"):
+            session_id = next(iter(parse_qs(scope["query_string"].decode("latin-1")).get("session_id", [])), None)
+
+        retry_after = self.ip.check_rate(ip)
+        if not retry_after and session_id:
+            retry_after = self.session.check_rate(session_id)
+        if retry_after:
+            await _reject(receive, send, "请求过于频繁，请稍后重试", retry_after)
+            return
+
+        # GET 建立的 SSE 长连接不计入并发数，否则会一直占用名额
+        if scope["method"] == "GET" and "text/event-stream" in headers.get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.ip.enter(ip):
+            await _reject(receive, send, f"客户端 {ip} 的并发请求数已达上限", 1)
+            return
+        if session_id and not self.session.enter(session_id):
+            self.ip.leave(ip)
+            await _reject(receive, send, "当前会话的并发请求数已达上限", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.ip.leave(ip)
+            if session_id:
+                self.session.leave(session_id)
+
+
+async def _reject(receive: Receive, send: Send, message: str, retry_after: float) -> None:
+    """返回 429 和 JSON-RPC 错误，错误的 id 与请求的 id 对应，客户端可以直接关联到原请求"""
+    request_id = None
+    body = bytearray()
+    while True:
+        event: Message = await receive()
+        if event["type"] != "http.request":
+            break
+        body.extend(event.get("body", b""))
+        if not event.get("more_body", False) or len(body) > 65536:
+            break
+    try:
+        payload = json.loads(body)
+        if isinstance(payload, dict):
+            request_id = payload.get("id")
+    except ValueError:
+        pass
+
+    retry_after = max(1, math.ceil(retry_after))
+    content = json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": RATE_LIMITED_ERROR_CODE, "message": message, "data": {"retry_after": retry_after}},
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(content)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": content})
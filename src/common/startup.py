@@ -0,0 +1,147 @@
+"""
+启动耗时分析
+
+在全新的解释器中以 python -X importtime 导入服务器模块，汇总导入耗时：
+按顶层包统计的自身耗时，以及服务器模块直接导入的各模块的累计耗时。
+--profile-startup 与 benchmarks/cold_start.py 都基于这里的结果。
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+def _child_env() -> Dict[str, str]:
+    """子解释器沿用当前进程的模块搜索路径"""
+    env = dict(os.environ)
+    paths = [p for p in sys.path if p]
+    if env.get("PYTHONPATH"):
+        paths.append(env["PYTHONPATH"])
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    return env
+
+
+def parse_importtime(output: str, module: str) -> Dict[str, Any]:
+    """
+    解析 -X importtime 的输出
+
+    Args:
+        output: 子进程的 stderr
+        module: 被分析的模块名
+
+    Returns:
+        total_us: 模块导入的累计耗时（微秒）
+        packages: 按顶层包汇总的自身耗时 [(包名, 微秒)]，降序
+        direct: 模块直接导入的子模块及其累计耗时 [(模块名, 微秒)]，降序
+    """
+    packages: Dict[str, int] = defaultdict(int)
+    pending: List[tuple] = []
+    direct: List[tuple] = []
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        self_us, cumulative_us = int(parts[0]), int(parts[1])
+        raw_name = parts[2].rstrip()
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        packages[name.split(".")[0]] += self_us
+        # 子模块先于父模块输出：记录第一层的导入，遇到顶层模块时归属给它
+        if depth == 1:
+            pending.append((name, cumulative_us))
+        elif depth == 0:
+            if name == module:
+                total = cumulative_us
+                direct = pending
+            pending = []
+    return {
+        "total_us": total,
+        "packages": sorted(packages.items(), key=lambda item: item[1], reverse=True),
+        "direct": sorted(direct, key=lambda item: item[1], reverse=True),
+    }
+
+
+def profile_imports(module: str, check_modules: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    在新的解释器中导入模块并分析导入耗时
+
+    Args:
+        module: 要导入的模块名
+        check_modules: 需要检查是否被真正加载的模块（延迟导入未触发的不算）
+
+    Returns:
+        parse_importtime 的结果，另含 wall_seconds（含解释器启动的总耗时）与 loaded（check_modules 中已加载的模块）
+    """
+    check_modules = check_modules or []
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {check_modules!r} "
+        f"if m in sys.modules and type(sys.modules[m]).__name__ != '_LazyModule']))"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=_child_env(),
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+
+    profile = parse_importtime(result.stderr, module)
+    profile["wall_seconds"] = wall
+    last_line = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else "[]"
+    try:
+        profile["loaded"] = json.loads(last_line)
+    except ValueError:
+        profile["loaded"] = []
+    return profile
+
+
+def measure_cold_start(code: str, runs: int = 5) -> List[float]:
+    """
+    多次在新的解释器中执行代码（通常是导入服务器模块），返回每次的总耗时（秒，含解释器启动和退出）
+
+    Args:
+        code: 要执行的 Python 代码，例如 "import fs_mcp.server"
+        runs: 运行次数
+    """
+    env = _child_env()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, env=env)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"执行 {code!r} 失败:\n{result.stderr.decode(errors='replace')[-2000:]}")
+    return timings
+
+
+def format_profile(module: str, profile: Dict[str, Any], top: int = 15) -> str:
+    """把分析结果格式化为文本报告"""
+    lines = [
+        f"Startup profile for {module}",
+        f"  interpreter + import wall time: {profile['wall_seconds'] * 1000:.1f} ms",
+        f"  import {module}: {profile['total_us'] / 1000:.1f} ms (cumulative)",
+        "",
+        f"  Top {top} packages by self time:",
+    ]
+    for name, us in profile["packages"][:top]:
+        lines.append(f"    {us / 1000:9.1f} ms  {name}")
+    lines += ["", f"  Direct imports of {module} (cumulative):"]
+    for name, us in profile["direct"][:top]:
+        lines.append(f"    {us / 1000:9.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def report_startup(module: str) -> None:
+    """输出模块的启动耗时报告（写到 stderr，避免干扰 stdio 传输）"""
+    print(format_profile(module, profile_imports(module)), file=sys.stderr)
@@ -0,0 +1,225 @@
+"""
+工具结果缓存
+
+很多工具在短时间内是参数的纯函数（组件列表、模板内容、表清单等）。cached_tool 以声明的方式为这类工具
+缓存结果，替代在工具函数体内手写的缓存逻辑：
+
+    @mcp.tool()
+    @cached_tool(ttl=600)
+    def list_template_categories() -> List[TextContent]:
+        ...
+
+- 缓存键由服务名、工具名和规范化后的参数组成：按签名绑定并补齐默认值，忽略 Context 参数，按键名排序后序列化，
+  位置参数、关键字参数和省略默认值的调用命中同一个键；结果取决于请求凭据（Context 中的请求头）时，
+  需要用 key 函数把凭据的摘要加入缓存键；服务名默认取工具所在的顶层包名（如 mysql_mcp），
+  使用同一个 --cache-dir 的多个服务共用持久化文件时互不干扰
+- 结果以 pickle 序列化后缓存，每次命中都反序列化出新的对象，调用方修改返回值不会污染缓存；
+  字节数统计也更准确，并可直接写入持久化层
+- 底层复用 Cache：single-flight、LRU/TTL、持久化、负结果缓存与 cache_stats 统计都照常生效
+- 失效：被装饰的函数带有 invalidate(*args, **kwargs) / invalidate_all() 方法，invalidate_all 同时清除
+  持久化层中该工具的全部条目，重启后不会再读到失效前的结果；
+  按标签失效使用 invalidate_tools(*tags)，工具名本身也是标签；on_invalidate 可注册失效回调
+"""
+
+import functools
+import inspect
+import json
+import logging
+import pickle
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from mcp.server.fastmcp import Context
+
+from common.cache import Cache
+
+logger = logging.getLogger(__name__)
+
+# 未指定 cache 时所有工具共用的缓存实例，按需创建
+_default_cache: Optional[Cache] = None
+_lock = threading.Lock()
+# 标签 -> 打了该标签的被装饰函数
+_tagged: Dict[str, List[Callable]] = {}
+# 失效回调，参数为工具名和被失效的参数（None 表示全部失效）
+_invalidation_hooks: List[Callable[[str, Optional[str]], None]] = []
+
+
+def _shared_cache() -> Cache:
+    global _default_cache
+    with _lock:
+        if _default_cache is None:
+            _default_cache = Cache(name="tool_results", persistent=True)
+        return _default_cache
+
+
+def canonical_arguments(
+    signature: inspect.Signature, args: tuple, kwargs: dict, names: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    按签名绑定一次调用的参数并补齐默认值
+
+    Args:
+        signature: 工具函数的签名
+        args: 位置参数
+        kwargs: 关键字参数
+        names: 只保留这些参数，默认保留全部
+
+    Returns:
+        参数名到值的映射，不含 Context 参数
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return {
+        name: value
+        for name, value in bound.arguments.items()
+        if (names is None or name in names)
+        and signature.parameters[name].annotation is not Context
+        and not isinstance(value, Context)
+    }
+
+
+def cached_tool(
+    ttl: Optional[float] = None,
+    key: Union[None, Sequence[str], Callable[..., Any]] = None,
+    cache: Optional[Cache] = None,
+    negative: Optional[Callable[[Any], bool]] = None,
+    tags: Iterable[str] = (),
+    namespace: Optional[str] = None,
+) -> Callable[[Callable], Callable]:
+    """
+    缓存工具结果的装饰器，放在 @mcp.tool() 下方
+
+    Args:
+        ttl: 结果有效期（秒），默认使用 cache 的有效期
+        key: 参与缓存键的参数名列表；或以工具参数（不含 Context）调用、返回缓存键的函数，
+            例如按当前连接的数据库区分结果；函数声明了与工具的 Context 参数同名的参数时也会收到 Context，
+            用于按请求携带的凭据区分结果（invalidate 时为 None）；默认使用全部参数
+        cache: 使用的 Cache 实例，默认为所有工具共用的 tool_results 缓存
+        negative: 判断结果是否为负结果（如查询失败、结果为空）的函数，负结果按 cache 的 negative_ttl 缓存
+        tags: 失效标签，invalidate_tools(tag) 会清除所有带该标签的工具的结果
+        namespace: 缓存键的服务名前缀，默认为工具函数所在的顶层包名
+    """
+    tags = tuple(tags)
+
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+        context_params = [name for name, param in signature.parameters.items() if param.annotation is Context]
+        is_async = inspect.iscoroutinefunction(fn)
+        state = {"generation": 0}
+        # 同一工具所有缓存键的公共前缀，invalidate_all 按前缀清除
+        prefix = f"tool:{namespace or fn.__module__.split('.')[0]}:{fn.__name__}:"
+        # key 函数需要接收的 Context 参数
+        key_context = (
+            [name for name in context_params if name in inspect.signature(key).parameters] if callable(key) else []
+        )
+
+        def cache_key(args: tuple, kwargs: dict) -> str:
+            if callable(key):
+                arguments = canonical_arguments(signature, args, kwargs)
+                if key_context:
+                    bound = signature.bind(*args, **kwargs)
+                    arguments.update({name: bound.arguments.get(name) for name in key_context})
+                arguments = key(**arguments)
+            else:
+                arguments = canonical_arguments(signature, args, kwargs, key)
+            # 按键名排序后序列化，无法 JSON 序列化的值使用 repr
+            text = json.dumps(arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=repr)
+            # 代数随 invalidate_all 递增，失效前已开始的计算写入的旧代条目不会再命中
+            return f"{prefix}{state['generation']}:{text}"
+
+        def target() -> Cache:
+            return cache if cache is not None else _shared_cache()
+
+        def negative_of(outcome: dict) -> Optional[Callable[[Any], bool]]:
+            if negative is None:
+                return None
+            return lambda _: outcome.get("negative", False)
+
+        def serialize(result: Any, outcome: dict) -> bytes:
+            if negative is not None:
+                outcome["negative"] = bool(negative(result))
+            return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if is_async:
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                outcome: dict = {}
+
+                async def compute() -> bytes:
+                    return serialize(await fn(*args, **kwargs), outcome)
+
+                blob = await target().aget_or_compute(
+                    cache_key(args, kwargs), compute, ttl=ttl, negative=negative_of(outcome)
+                )
+                return pickle.loads(blob)
+
+        else:
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                outcome: dict = {}
+
+                def compute() -> bytes:
+                    return serialize(fn(*args, **kwargs), outcome)
+
+                blob = target().get_or_compute(cache_key(args, kwargs), compute, ttl=ttl, negative=negative_of(outcome))
+                return pickle.loads(blob)
+
+        def invalidate(*args, **kwargs) -> None:
+            """清除一组参数对应的缓存结果，参数与调用工具时相同（Context 参数可省略）"""
+            for name in context_params:
+                kwargs.setdefault(name, None)
+            cache_key_ = cache_key(args, kwargs)
+            target().delete(cache_key_)
+            _run_hooks(fn.__name__, cache_key_)
+
+        def invalidate_all() -> None:
+            """清除该工具的全部缓存结果，包括持久化层中的条目"""
+            state["generation"] += 1
+            target().delete_prefix(prefix)
+            _run_hooks(fn.__name__, None)
+
+        wrapper.invalidate = invalidate
+        wrapper.invalidate_all = invalidate_all
+        wrapper.__mcp_cached__ = True
+        with _lock:
+            for tag in (fn.__name__,) + tags:
+                _tagged.setdefault(tag, []).append(wrapper)
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tools(*tags: str) -> int:
+    """
+    清除带有任一标签（或名为该标签）的工具的全部缓存结果
+
+    Returns:
+        被清除的工具数量
+    """
+    with _lock:
+        targets = {id(w): w for tag in tags for w in _tagged.get(tag, [])}
+    for wrapper in targets.values():
+        wrapper.invalidate_all()
+    return len(targets)
+
+
+def on_invalidate(hook: Callable[[str, Optional[str]], None]) -> Callable[[str, Optional[str]], None]:
+    """
+    注册失效回调，可作为装饰器使用。回调参数为工具名和被清除的缓存键（全部失效时为 None），
+    例如用于同步清除其他进程或上游的缓存
+    """
+    with _lock:
+        _invalidation_hooks.append(hook)
+    return hook
+
+
+def _run_hooks(tool_name: str, cache_key: Optional[str]) -> None:
+    with _lock:
+        hooks = list(_invalidation_hooks)
+    for hook in hooks:
+        try:
+            hook(tool_name, cache_key)
+        except Exception as e:
+            logger.warning(f"工具缓存失效回调出错: {tool_name}, 错误: {e}")
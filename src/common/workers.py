@@ -0,0 +1,346 @@
+"""
+多进程 HTTP 服务支持
+
+--workers 大于 1 时，主进程在 127.0.0.1 的随机端口上启动多个 uvicorn 工作进程，
+自身运行一个反向代理对外提供服务。代理按 Mcp-Session-Id 请求头（streamable）
+或 session_id 查询参数（SSE）把同一个会话的请求始终转发到创建它的工作进程。
+"""
+
+import asyncio
+import importlib
+import itertools
+import logging
+import multiprocessing
+import re
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import anyio
+import httpx
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# 逐跳请求头，不能原样转发（Host 保留原值，使工作进程生成的重定向地址指向代理）
+_HOP_BY_HOP_HEADERS = {
+    b"connection",
+    b"keep-alive",
+    b"proxy-authenticate",
+    b"proxy-authorization",
+    b"te",
+    b"trailers",
+    b"transfer-encoding",
+    b"upgrade",
+}
+
+# SSE 传输建立连接后的第一个事件：event: endpoint / data: /messages/?session_id=xxx
+_SSE_SESSION_PATTERN = re.compile(rb"session_id=([0-9a-fA-F\-]+)")
+
+
+def find_app_reference(obj: Any) -> str:
+    """
+    查找对象所在的模块与属性名，返回 "module:attr" 形式的引用，
+    供 spawn 方式启动的工作进程重新导入同一个 FastMCP 实例。
+    """
+    for module_name, module in list(sys.modules.items()):
+        try:
+            items = list(vars(module).items())
+        except TypeError:
+            continue
+        for attr, value in items:
+            if value is not obj:
+                continue
+            if module_name in ("__main__", "__mp_main__"):
+                # 通过 python -m 启动时可以拿到真实模块名；直接运行脚本文件则无法在子进程中导入
+                spec = getattr(module, "__spec__", None)
+                if spec is None:
+                    continue
+                module_name = spec.name
+            return f"{module_name}:{attr}"
+    raise RuntimeError("无法定位 MCP 服务器实例所在的模块，--workers 需要通过入口脚本或 python -m 启动")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_ports(ports: List[int], timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"工作进程未能在 {timeout} 秒内启动 (端口 {port})")
+                time.sleep(0.1)
+
+
+def _worker_main(app_ref: str, transport: str, port: int, options: Dict[str, Any], app_args: tuple = ()) -> None:
+    """
+    工作进程入口：重新导入服务器实例（或 ASGI 应用工厂），在本地端口上提供 HTTP 服务。
+    app_ref 指向 FastMCP 实例时按常规方式创建应用，指向函数时以 factory(transport, *app_args) 创建。
+    """
+    from mcp.server.fastmcp import FastMCP
+
+    from common import mcp_cli
+
+    mcp_cli.apply_runtime_options(options)
+    module_name, attr = app_ref.split(":", 1)
+    target = getattr(importlib.import_module(module_name), attr)
+    if isinstance(target, FastMCP):
+        mcp_cli.prepare_server(target)
+        app = mcp_cli.create_http_app(target, transport)
+    else:
+        app = target(transport, *app_args)
+    # CORS 与限流由主进程的代理统一处理
+    mcp_cli.run_server_with_cors(app, host="127.0.0.1", port=port, edge=False)
+
+
+class SessionAffinityProxy:
+    """
+    会话亲和的 ASGI 反向代理。
+
+    - 新会话按轮询分配工作进程
+    - 工作进程返回的 Mcp-Session-Id 响应头、SSE endpoint 事件中的 session_id
+      会被记录下来，之后同一会话的请求都转发到同一个工作进程
+    - 响应以流的方式原样转发，SSE 长连接在客户端断开时一并关闭
+    """
+
+    def __init__(self, upstreams: List[str], max_sessions: int = 100_000):
+        self._upstreams = upstreams
+        self._max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._round_robin = itertools.count()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["method"] == "GET" and scope["path"] == "/metrics":
+                await self._merged_metrics(send)
+            else:
+                await self._proxy(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # SSE 连接会长期占用连接，不限制连接总数
+                self._client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(None, connect=10),
+                    limits=httpx.Limits(max_connections=None, max_keepalive_connections=100),
+                )
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._client is not None:
+                    await self._client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _remember(self, session_id: str, index: int) -> None:
+        self._sessions[session_id] = index
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _pick_upstream(self, session_id: Optional[str]) -> int:
+        if session_id is not None:
+            index = self._sessions.get(session_id)
+            if index is not None:
+                self._sessions.move_to_end(session_id)
+                return index
+        return next(self._round_robin) % len(self._upstreams)
+
+    async def _merged_metrics(self, send: Send) -> None:
+        """汇总所有工作进程的 /metrics，样本带 worker 标签"""
+        from common.metrics import merge_prometheus
+
+        async def fetch(upstream: str) -> Optional[str]:
+            try:
+                response = await self._client.get(upstream + "/metrics")
+            except httpx.HTTPError:
+                return None
+            return response.text if response.status_code == 200 else None
+
+        texts = await asyncio.gather(*(fetch(upstream) for upstream in self._upstreams))
+        if all(text is None for text in texts):
+            await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Not Found"})
+            return
+        body = merge_prometheus(text or "" for text in texts).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _proxy(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope)
+        query_string = scope.get("query_string", b"")
+        session_id = headers.get("mcp-session-id")
+        if session_id is None and query_string:
+            session_id = next(iter(parse_qs(query_string.decode("latin-1")).get("session_id", [])), None)
+        index = self._pick_upstream(session_id)
+
+        # MCP 请求体是单条 JSON-RPC 消息，直接读完整个请求体
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        url = self._upstreams[index] + scope.get("raw_path", scope["path"].encode()).decode("latin-1")
+        if query_string:
+            url += "?" + query_string.decode("latin-1")
+        request_headers = [
+            (k, v)
+            for k, v in scope["headers"]
+            if k.lower() not in _HOP_BY_HOP_HEADERS and k.lower() != b"accept-encoding"
+        ]
+        # 显式转发 Accept-Encoding：缺少该头时 httpx 会自动加上 gzip/br/zstd，工作进程就会压缩响应，
+        # 而客户端并不接受压缩。新建的 SSE 连接也要求明文，代理需要从中读取会话 ID，由代理自己的压缩层按客户端协商压缩
+        accept_encoding = headers.get("accept-encoding")
+        if not accept_encoding or (session_id is None and scope["method"] == "GET"):
+            accept_encoding = "identity"
+        request_headers.append((b"accept-encoding", accept_encoding.encode("latin-1")))
+        client = scope.get("client")
+        if client:
+            request_headers.append((b"x-forwarded-for", client[0].encode("latin-1")))
+        request = self._client.build_request(scope["method"], url, headers=request_headers, content=bytes(body))
+
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            logger.error(f"转发到工作进程 {index} 失败: {e}")
+            await send({"type": "http.response.start", "status": 502, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Bad Gateway"})
+            return
+
+        sse_session: Optional[str] = None
+        try:
+            new_session = response.headers.get("mcp-session-id")
+            if new_session:
+                self._remember(new_session, index)
+            if scope["method"] == "DELETE" and session_id and response.status_code < 300:
+                self._sessions.pop(session_id, None)
+
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in _HOP_BY_HOP_HEADERS],
+                }
+            )
+            sniff = (
+                session_id is None
+                and scope["method"] == "GET"
+                and response.headers.get("content-type", "").startswith("text/event-stream")
+            )
+            sniffed = bytearray()
+
+            async with anyio.create_task_group() as tg:
+
+                async def watch_disconnect() -> None:
+                    # 客户端断开时取消转发，释放到工作进程的 SSE 连接
+                    while True:
+                        message = await receive()
+                        if message["type"] == "http.disconnect":
+                            tg.cancel_scope.cancel()
+                            return
+
+                tg.start_soon(watch_disconnect)
+                async for chunk in response.aiter_raw():
+                    if sniff:
+                        sniffed.extend(chunk)
+                        match = _SSE_SESSION_PATTERN.search(sniffed)
+                        if match:
+                            sse_session = match.group(1).decode()
+                            self._remember(sse_session, index)
+                            sniff = False
+                        elif len(sniffed) > 4096:
+                            sniff = False
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                tg.cancel_scope.cancel()
+        finally:
+            await response.aclose()
+            if sse_session is not None:
+                # SSE 会话随长连接结束
+                self._sessions.pop(sse_session, None)
+
+
+def run_workers(
+    app_ref: str,
+    transport: str,
+    host: str,
+    port: int,
+    workers: int,
+    options: Dict[str, Any],
+    app_args: tuple = (),
+) -> None:
+    """
+    启动多个工作进程并在 host:port 上运行会话亲和代理，退出时终止所有工作进程。
+    工作进程意外退出时会在原端口上自动重启（该进程上的会话需要客户端重新初始化）。
+
+    Args:
+        app_ref: "module:attr" 形式的 FastMCP 实例或 ASGI 应用工厂引用
+        transport: 传输方式 ("sse", "streamable")
+        host: 对外监听地址
+        port: 对外监听端口
+        workers: 工作进程数量
+        options: 传递给工作进程的运行时选项
+        app_args: 应用工厂的额外参数
+    """
+    from common.mcp_cli import run_server_with_cors
+
+    context = multiprocessing.get_context("spawn")
+    ports = [_free_port() for _ in range(workers)]
+    stopping = threading.Event()
+
+    def start(worker_port: int) -> multiprocessing.Process:
+        process = context.Process(
+            target=_worker_main,
+            args=(app_ref, transport, worker_port, options, app_args),
+            name=f"mcp-worker-{worker_port}",
+        )
+        process.start()
+        return process
+
+    processes = [start(p) for p in ports]
+
+    def supervise() -> None:
+        while not stopping.wait(1):
+            for i, process in enumerate(processes):
+                if not process.is_alive() and not stopping.is_set():
+                    logger.error(f"工作进程 {process.name} 已退出 (exitcode={process.exitcode})，正在重启")
+                    processes[i] = start(ports[i])
+
+    try:
+        _wait_for_ports(ports)
+        logger.info(f"已启动 {workers} 个工作进程: {ports}")
+        threading.Thread(target=supervise, name="mcp-worker-supervisor", daemon=True).start()
+        proxy = SessionAffinityProxy([f"http://127.0.0.1:{p}" for p in ports])
+        run_server_with_cors(proxy, host=host, port=port)
+    finally:
+        stopping.set()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(5)
@@ -6,6 +6,7 @@ from mcp.server import FastMCP
 from mcp.types import TextContent
 from pydantic import Field
 
+from common.executor import not_thread_safe
 from common.mcp_cli import with_mcp_options, run_mcp_server
 
 # 配置日志
@@ -196,6 +197,8 @@ MOCK_DEVICES = {
 }
 
 @mcp.tool()
+# 直接修改 MOCK_DEVICES 中的设备状态，不能并发执行
+@not_thread_safe
 def exec_action(
     product_id: str = Field(..., description="产品ID"),
     device_id: str = Field(..., description="设备ID"),
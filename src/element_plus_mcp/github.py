@@ -1,7 +1,17 @@
+import hashlib
 import os
 from urllib.parse import quote
 from typing import List, Dict, Any
-import requests
+
+from common.cache import Cache
+from common.lazy import lazy_import
+
+# requests 在第一次请求 GitHub 时才导入
+requests = lazy_import("requests")
+
+# GitHub API 响应缓存，按请求 URL 和所用令牌的摘要缓存
+# 仓库内容变化很慢：过期后 1 小时内先返回旧响应并在后台刷新，热点 URL 过期前提前刷新
+cache = Cache(name="element_plus_mcp", persistent=True, stale_ttl=3600, refresh_ahead=0.2)
 
 
 def get_config(default: str = "") -> Dict[str, Any]:
@@ -22,19 +32,35 @@ class GitHubAPIError(Exception):
 def get_github_headers(api_key:str=None) -> Dict[str, str]:
     """获取GitHub API请求头"""
     headers = {"Accept": "application/vnd.github.v3+json", "User-Agent": "ElementPlus-MCP-Server"}
-    if get_config()["github_api_key"]:
-        headers["Authorization"] = f"token {get_config(api_key)['github_api_key']}"
+    # 请求携带的令牌优先，未携带时使用环境变量中的令牌
+    token = api_key or get_config()["github_api_key"]
+    if token:
+        headers["Authorization"] = f"token {token}"
     return headers
 
 
+def token_fingerprint(api_key: str = None) -> str:
+    """请求实际使用的令牌的摘要，用于区分不同令牌的缓存结果；不使用令牌时为空字符串"""
+    authorization = get_github_headers(api_key).get("Authorization")
+    if not authorization:
+        return ""
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+
+
 def make_github_request(url: str,api_key:str=None) -> Dict[str, Any]:
-    """发送GitHub API请求"""
-    try:
-        response = requests.get(url, headers=get_github_headers(api_key), timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise GitHubAPIError(f"GitHub API请求失败: {e}")
+    """发送GitHub API请求，成功的响应按 URL 和令牌缓存（失败不缓存）"""
+
+    def fetch() -> Dict[str, Any]:
+        try:
+            response = requests.get(url, headers=get_github_headers(api_key), timeout=30)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise GitHubAPIError(f"GitHub API请求失败: {e}")
+
+    # 不同令牌能访问的仓库不同，私有仓库的响应不能返回给使用其他令牌的客户端
+    fingerprint = token_fingerprint(api_key)
+    return cache.get_or_compute(f"{url}#{fingerprint}" if fingerprint else url, fetch)
 
 
 def get_file_content(path: str, branch: str = None,api_key:str=None) -> str:
@@ -59,13 +85,14 @@ def get_file_content(path: str, branch: str = None,api_key:str=None) -> str:
         return f"无法获取文件内容: {path}"
 
 
-def get_directory_contents(path: str = "", branch: str = None,api_key:str=None) -> List[Dict[str, Any]]:
-    """获取GitHub仓库目录内容"""
-    if branch is None:
-        branch = get_config()["element_plus_repo"]["branch"]
-
-    owner = get_config()["element_plus_repo"]["owner"]
-    repo = get_config()["element_plus_repo"]["repo"]
+def get_directory_contents(
+    path: str = "", branch: str = None, api_key: str = None, owner: str = None, repo: str = None
+) -> List[Dict[str, Any]]:
+    """获取GitHub仓库目录内容，owner / repo / branch 未指定时使用 element-plus 仓库的配置"""
+    repo_config = get_config()["element_plus_repo"]
+    branch = branch or repo_config["branch"]
+    owner = owner or repo_config["owner"]
+    repo = repo or repo_config["repo"]
 
     url = f"{get_config()['github_api_base']}/repos/{owner}/{repo}/contents/{quote(path)}?ref={branch}"
 
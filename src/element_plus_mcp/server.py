@@ -9,7 +9,8 @@ from mcp.server.fastmcp import FastMCP, Context
 from pydantic import Field
 
 from common.mcp_cli import with_mcp_options, run_mcp_server
-from element_plus_mcp.github import get_config, get_directory_contents, get_file_content
+from common.tool_cache import cached_tool
+from element_plus_mcp.github import get_directory_contents, get_file_content, token_fingerprint
 from element_plus_mcp.models import (
     DirectoryStructure,
     DirectoryItem,
@@ -43,8 +44,9 @@ def get_api_key_from_context(ctx: Optional[Context]) -> str:
     """
     从上下文中获取API密钥，如果使用 stdio 通信层，则从环境变量中读取
     """
-    if ctx:
-        api_key = ctx.request_context.request.headers.get("X-GITHUB-API-KEY")
+    request = ctx.request_context.request if ctx else None
+    if request is not None:
+        api_key = request.headers.get("X-GITHUB-API-KEY")
         logger.info(f"获取到api_key： {api_key}")
         if not api_key:
             logger.error("请求头中未找到API密钥")
@@ -53,6 +55,14 @@ def get_api_key_from_context(ctx: Optional[Context]) -> str:
     else:
         return os.getenv("GITHUB_API_KEY", "")
 
+
+def github_cache_key(ctx: Optional[Context] = None, **arguments) -> dict:
+    """
+    工具结果缓存的键：工具参数加上请求所用 GitHub 令牌的摘要，不同令牌（可访问的私有仓库不同）的结果互不共享
+    """
+    return {**arguments, "token": token_fingerprint(get_api_key_from_context(ctx))}
+
+
 @mcp.tool()
 def get_component(
     component_name: Annotated[str, Field(description="Name of the element-plus component (e.g., 'avatar', 'button')")],
@@ -175,6 +185,7 @@ def get_component_demo(
 
 
 @mcp.tool()
+@cached_tool(ttl=600, key=github_cache_key, negative=lambda r: not r.found)
 def list_components(ctx: Context) -> ComponentList:
     """
     列出所有可用的element-plus组件
@@ -264,6 +275,7 @@ def get_component_metadata(
 
 
 @mcp.tool()
+@cached_tool(ttl=600, key=github_cache_key, negative=lambda r: not r.found)
 def get_directory_structure(
     path: Annotated[str, Field(description="Path within the repository (default: packages/components)")],
     owner: Annotated[str, Field(description="Repository owner (default: element-plus)")],
@@ -275,17 +287,9 @@ def get_directory_structure(
     获取element-plus仓库的目录结构
     """
     try:
-        # 临时更新配置以支持自定义仓库
-        original_config = get_config()["element_plus_repo"].copy()
-        get_config()["element_plus_repo"]["owner"] = owner
-        get_config()["element_plus_repo"]["repo"] = repo
-        get_config()["element_plus_repo"]["branch"] = branch
-
+        # 仓库参数显式传递，不修改全局配置，并发调用互不影响
         api_key = get_api_key_from_context(ctx)
-        contents = get_directory_contents(path, branch, api_key=api_key)
-
-        # 恢复原始配置
-        get_config()["element_plus_repo"] = original_config
+        contents = get_directory_contents(path, branch, api_key=api_key, owner=owner, repo=repo)
 
         if not contents:
             return DirectoryStructure(
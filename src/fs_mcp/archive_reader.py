@@ -0,0 +1,313 @@
+"""
+读取和解压 zip / tar 包
+
+list_archive、read_archive_member、extract_archive 的实现。所有格式都按成员流式读取，不会先把整个包解压到磁盘：
+
+- zip 通过 zipfile 随机访问成员
+- tar、tar.gz、tar.bz2、tar.xz 以 tarfile 的流模式（"r|*"）顺序读取，只解压一遍
+- tar.zst 使用 Python 3.14+ 的 compression.zstd，或可选依赖 zstandard（pip install .[compression]）
+
+防御压缩炸弹：解压时按实际写出的字节数累计，超过 max_total_bytes、超过包大小的 max_ratio 倍或
+成员数超过 max_entries 时立即中止。每个成员先写入同目录下的临时文件，完整写出后才替换目标文件；
+因任何原因中止时都会删除临时文件以及本次新建的文件和目录，解压前已存在的文件和目录保持原样。
+"""
+
+import os
+import stat
+import tarfile
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+# 解压的默认限制
+DEFAULT_MAX_TOTAL_BYTES = int(os.getenv("MCP_FS_ARCHIVE_MAX_BYTES", str(1024 * 1024 * 1024)))
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_RATIO = 200
+# 计算压缩比时对很小的包放宽的字节数，避免几 KB 的包解出一个稍大的文本就被判定为炸弹
+_RATIO_ALLOWANCE = 16 * 1024 * 1024
+_COPY_SIZE = 1024 * 1024
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class ArchiveError(Exception):
+    """包无法读取，或解压超出了限制"""
+
+
+class ArchiveEntry(NamedTuple):
+    name: str
+    # "file"、"dir"、"symlink"、"other"
+    kind: str
+    size: int
+    # 压缩后的大小，只有 zip 包有
+    compressed_size: Optional[int]
+    mtime: float
+
+
+def _open_zstd(path: str) -> BinaryIO:
+    try:
+        # Python 3.14+ 标准库
+        from compression import zstd
+
+        return zstd.open(path, "rb")
+    except ImportError:
+        try:
+            import zstandard
+        except ImportError:
+            raise ArchiveError("Reading .tar.zst requires Python 3.14+ or the zstandard package") from None
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+def _is_zstd(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(4) == _ZSTD_MAGIC
+
+
+def _tar_kind(member: tarfile.TarInfo) -> str:
+    if member.isfile():
+        return "file"
+    if member.isdir():
+        return "dir"
+    if member.issym() or member.islnk():
+        return "symlink"
+    return "other"
+
+
+@contextmanager
+def open_archive(path: str) -> Iterator[Iterator[Tuple[ArchiveEntry, Callable[[], BinaryIO]]]]:
+    """
+    打开 zip 或 tar 包，按包中的顺序逐个产出 (成员信息, 打开成员数据的函数)。
+    tar 包按流读取，打开函数只在产出该成员的这一步内有效。
+
+    Raises:
+        ArchiveError: 不是支持的包格式
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+
+            def zip_entries():
+                for info in zf.infolist():
+                    mode = info.external_attr >> 16
+                    if info.is_dir():
+                        kind = "dir"
+                    elif stat.S_ISLNK(mode):
+                        kind = "symlink"
+                    else:
+                        kind = "file"
+                    mtime = _zip_mtime(info)
+                    entry = ArchiveEntry(info.filename, kind, info.file_size, info.compress_size, mtime)
+                    yield entry, (lambda info=info: zf.open(info))
+
+            yield zip_entries()
+        return
+
+    fileobj = _open_zstd(path) if _is_zstd(path) else None
+    try:
+        try:
+            tf = tarfile.open(path, "r|*") if fileobj is None else tarfile.open(fileobj=fileobj, mode="r|")
+        except tarfile.TarError as e:
+            raise ArchiveError(f"Not a zip or tar archive: {e}") from None
+        with tf:
+
+            def tar_entries():
+                for member in tf:
+                    entry = ArchiveEntry(member.name, _tar_kind(member), member.size, None, float(member.mtime))
+                    yield entry, (lambda member=member: tf.extractfile(member))
+
+            yield tar_entries()
+    finally:
+        if fileobj is not None:
+            fileobj.close()
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> float:
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
+
+
+def _normalize_name(name: str) -> str:
+    """去掉成员名开头的 "./" 和末尾的 "/"，tar 包中常见 "./dir/file" 形式的名称"""
+    name = name.replace("\\", "/").rstrip("/")
+    while name.startswith("./"):
+        name = name[2:]
+    return "" if name == "." else name
+
+
+def list_entries(path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> Tuple[List[ArchiveEntry], bool]:
+    """
+    列出包中的成员
+
+    Returns:
+        (成员列表, 是否因超过 max_entries 而截断)
+    """
+    entries = []
+    with open_archive(path) as members:
+        for entry, _ in members:
+            if len(entries) >= max_entries:
+                return entries, True
+            entries.append(entry)
+    return entries, False
+
+
+def read_member(path: str, name: str, max_bytes: int) -> Tuple[ArchiveEntry, bytes]:
+    """
+    读取单个成员的前 max_bytes 字节
+
+    Raises:
+        KeyError: 包中没有该成员
+        ArchiveError: 成员不是普通文件
+    """
+    wanted = _normalize_name(name)
+    with open_archive(path) as members:
+        for entry, opener in members:
+            if _normalize_name(entry.name) != wanted:
+                continue
+            if entry.kind != "file":
+                raise ArchiveError(f"'{name}' is a {entry.kind}, not a regular file")
+            with opener() as f:
+                return entry, f.read(max_bytes)
+    raise KeyError(name)
+
+
+def safe_member_path(output_dir: str, name: str) -> Optional[str]:
+    """成员在 output_dir 下的目标路径；绝对路径、含 .. 或盘符等会越出 output_dir 的名称返回 None"""
+    name = name.replace("\\", "/")
+    parts = [p for p in name.split("/") if p not in ("", ".")]
+    if not parts or name.startswith("/") or ".." in parts or ":" in parts[0]:
+        return None
+    target = os.path.normpath(os.path.join(output_dir, *parts))
+    if os.path.commonpath([target, output_dir]) != output_dir:
+        return None
+    return target
+
+
+class ExtractResult:
+    def __init__(self):
+        self.files: List[str] = []
+        self.directories: List[str] = []
+        self.skipped: List[str] = []
+        self.total_bytes = 0
+
+
+def extract(
+    path: str,
+    output_dir: str,
+    validate: Callable[[str], str],
+    members: Optional[List[str]] = None,
+    overwrite: bool = False,
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    max_ratio: float = DEFAULT_MAX_RATIO,
+) -> ExtractResult:
+    """
+    把包解压到 output_dir
+
+    Args:
+        path: 包路径
+        output_dir: 输出目录（绝对路径），不存在时创建
+        validate: 校验每个输出路径的函数（fs_mcp 的 validate_path），不允许时抛出 PermissionError
+        members: 只解压这些成员（及以 "成员/" 开头的子成员），为 None 时解压全部
+        overwrite: 是否覆盖已存在的文件，否则跳过
+        max_total_bytes: 解压出的数据总量上限
+        max_entries: 成员数量上限
+        max_ratio: 解压出的数据总量与包大小之比的上限
+
+    Raises:
+        ArchiveError: 超出限制；中止时本次新建的文件和目录会被删除，解压前已存在的不会被删除
+    """
+    result = ExtractResult()
+    # 本次新建的文件、目录和正在写入的临时文件，中止时删除
+    created: List[str] = []
+    created_dirs: List[str] = []
+    partial: Optional[str] = None
+    limit = min(max_total_bytes, os.path.getsize(path) * max_ratio + _RATIO_ALLOWANCE)
+    wanted = [_normalize_name(m) for m in members] if members else None
+    try:
+        _makedirs(output_dir, created_dirs)
+        with open_archive(path) as entries:
+            for count, (entry, opener) in enumerate(entries, 1):
+                if count > max_entries:
+                    raise ArchiveError(f"Archive has more than {max_entries} entries")
+                name = _normalize_name(entry.name)
+                if not name:
+                    # tar 包的根目录 "."
+                    continue
+                if wanted is not None and not any(name == m or name.startswith(m + "/") for m in wanted):
+                    continue
+                target = safe_member_path(output_dir, entry.name)
+                if target is None:
+                    result.skipped.append(f"{entry.name} (unsafe path)")
+                    continue
+                validate(target)
+                if entry.kind == "dir":
+                    _makedirs(target, created_dirs)
+                    result.directories.append(target)
+                    continue
+                if entry.kind != "file":
+                    # 不解压符号链接、硬链接和设备文件，避免借助链接写到输出目录之外
+                    result.skipped.append(f"{entry.name} ({entry.kind})")
+                    continue
+                if os.path.lexists(target) and not overwrite:
+                    result.skipped.append(f"{entry.name} (exists)")
+                    continue
+                if result.total_bytes + entry.size > limit:
+                    raise ArchiveError(_limit_message(limit, max_total_bytes))
+                _makedirs(os.path.dirname(target), created_dirs)
+                partial = os.path.join(
+                    os.path.dirname(target), f".{os.path.basename(target)}.{uuid.uuid4().hex[:8]}.part"
+                )
+                with opener() as source, open(partial, "xb") as dest:
+                    # 成员头中的大小可能是伪造的，按实际读出的字节数计数
+                    while chunk := source.read(_COPY_SIZE):
+                        result.total_bytes += len(chunk)
+                        if result.total_bytes > limit:
+                            raise ArchiveError(_limit_message(limit, max_total_bytes))
+                        dest.write(chunk)
+                if not os.path.lexists(target):
+                    created.append(target)
+                os.replace(partial, target)
+                partial = None
+                result.files.append(target)
+    except BaseException:
+        # 损坏的压缩数据（zlib.error、lzma.LZMAError）、加密的 zip（RuntimeError）、不支持的压缩方法
+        # （NotImplementedError）和取消等都会走到这里，不留下部分输出
+        for file in created + ([partial] if partial else []):
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+        for directory in reversed(created_dirs):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        raise
+    return result
+
+
+def _makedirs(path: str, created: List[str]) -> None:
+    """创建 path 及缺少的上级目录，把本次新建的目录按创建顺序记入 created"""
+    missing = []
+    while not os.path.isdir(path):
+        missing.append(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    for directory in reversed(missing):
+        try:
+            os.mkdir(directory)
+        except FileExistsError:
+            if not os.path.isdir(directory):
+                raise
+            continue
+        created.append(directory)
+
+
+def _limit_message(limit: float, max_total_bytes: int) -> str:
+    if limit < max_total_bytes:
+        return f"Extraction aborted: decompressed data exceeds the compression ratio limit ({int(limit)} bytes)"
+    return f"Extraction aborted: decompressed data exceeds {max_total_bytes} bytes"
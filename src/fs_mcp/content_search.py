@@ -0,0 +1,230 @@
+"""
+文件内容搜索
+
+grep_files 的实现，输出格式与 grep -rn 相同：匹配行为 "路径:行号:内容"，上下文行为 "路径-行号-内容"，
+不相邻的片段之间用 "--" 分隔。
+
+- 目录遍历与 grep -r 一致，不跟随符号链接，搜索范围不会越出起始目录
+- 读取文件开头 SNIFF_SIZE 字节，含有 NUL 字节的视为二进制文件跳过
+- 超过 MMAP_THRESHOLD 的文件使用 mmap，正则直接在映射的页面上匹配，只有输出的行会被复制和解码
+- 按 UTF-8 字节匹配；忽略大小写且模式含非 ASCII 字符时，改为解码后按字符串匹配
+"""
+
+import fnmatch
+import mmap
+import os
+import re
+import threading
+from typing import Iterator, List, Optional, Sequence, Union
+
+from fs_mcp.text_reader import MMAP_THRESHOLD
+
+# 判断二进制文件时读取的字节数
+SNIFF_SIZE = 8192
+# 超过该大小的文件不搜索
+MAX_FILE_SIZE = 256 * 1024 * 1024
+# 输出的单行最多保留的字符数，避免压缩过的代码一行就占满结果
+MAX_LINE_LENGTH = 500
+
+Buffer = Union[bytes, str, mmap.mmap]
+
+
+def compile_pattern(pattern: str, literal: bool = False, ignore_case: bool = False) -> "re.Pattern":
+    """
+    编译搜索模式
+
+    Args:
+        pattern: 正则表达式或普通字符串
+        literal: 为 True 时按普通字符串匹配
+        ignore_case: 忽略大小写
+
+    Returns:
+        bytes 正则；忽略大小写且模式含非 ASCII 字符时为 str 正则（bytes 正则只能忽略 ASCII 字母的大小写）
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    source = re.escape(pattern) if literal else pattern
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    if ignore_case and not pattern.isascii():
+        return re.compile(source, flags)
+    return re.compile(source.encode("utf-8"), flags)
+
+
+def _matches_any(name: str, relative: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relative, p) for p in patterns)
+
+
+def iter_files(
+    base: str, include: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None
+) -> Iterator[str]:
+    """
+    遍历 base 下需要搜索的文件
+
+    Args:
+        base: 起始目录，或单个文件
+        include: 文件名或相对路径需匹配其中之一的通配符，为空时不限制
+        exclude: 匹配的文件和目录（整个子树）被跳过
+
+    Returns:
+        文件路径，按目录顺序排列
+    """
+    if os.path.isfile(base):
+        yield base
+        return
+    stack = [base]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            relative = os.path.relpath(entry.path, base)
+            if exclude and _matches_any(entry.name, relative, exclude):
+                continue
+            try:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                elif entry.is_file() and (not include or _matches_any(entry.name, relative, include)):
+                    yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+class FileResult:
+    """单个文件的搜索结果"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lines: List[str] = []
+        # 每个匹配行在 lines 中的位置
+        self.match_lines: List[int] = []
+        self.matches = 0
+        self.skipped: Optional[str] = None
+        self.truncated = False
+
+
+def _decode(line: Buffer) -> str:
+    text = line.decode("utf-8", errors="replace") if isinstance(line, bytes) else line
+    text = text.rstrip("\r")
+    if len(text) > MAX_LINE_LENGTH:
+        text = text[:MAX_LINE_LENGTH] + " …"
+    return text
+
+
+def _count_lines(data: Buffer, newline, start: int, end: int) -> int:
+    if not isinstance(data, mmap.mmap):
+        return data.count(newline, start, end)
+    # mmap 没有 count，分块复制计数，避免一次复制很大的区间
+    count = 0
+    for chunk_start in range(start, end, MMAP_THRESHOLD):
+        count += data[chunk_start : min(end, chunk_start + MMAP_THRESHOLD)].count(newline)
+    return count
+
+
+def _scan(result: FileResult, data: Buffer, regex: "re.Pattern", context: int, limit: int, stop: threading.Event):
+    newline = "\n" if isinstance(data, str) else b"\n"
+    size = len(data)
+    # 下一行尚未输出的行的起始位置和行号
+    emitted_end, emitted_line = 0, 0
+    after_remaining = 0
+    # 行号按增量计数：base_offset 处的行号为 base_line
+    base_offset, base_line = 0, 1
+
+    def emit(number: int, start: int, end: int, separator: str) -> None:
+        result.lines.append(f"{result.path}{separator}{number}{separator}{_decode(data[start:end])}")
+
+    def flush_after(limit_offset: int) -> None:
+        nonlocal emitted_end, emitted_line, after_remaining
+        while after_remaining and emitted_end < min(limit_offset, size):
+            end = data.find(newline, emitted_end)
+            end = size if end < 0 else end
+            emit(emitted_line + 1, emitted_end, end, "-")
+            emitted_end, emitted_line = end + 1, emitted_line + 1
+            after_remaining -= 1
+
+    position = 0
+    while position <= size and not stop.is_set():
+        match = regex.search(data, position)
+        if match is None or (match.start() == size and data[size - 1 : size] == newline):
+            # 末尾换行符之后的空串不是一行
+            break
+        line_start = data.rfind(newline, 0, match.start()) + 1
+        line_end = data.find(newline, match.start())
+        line_end = size if line_end < 0 else line_end
+        line_number = base_line + _count_lines(data, newline, base_offset, line_start)
+        base_offset, base_line = line_start, line_number
+
+        flush_after(line_start)
+        before = []
+        start = line_start
+        while len(before) < context and start > emitted_end:
+            start = data.rfind(newline, 0, start - 1) + 1
+            before.append(start)
+        first = before[-1] if before else line_start
+        if context and result.lines and first > emitted_end:
+            result.lines.append("--")
+        for offset, start in enumerate(reversed(before)):
+            end = data.find(newline, start)
+            emit(line_number - len(before) + offset, start, end, "-")
+        result.match_lines.append(len(result.lines))
+        emit(line_number, line_start, line_end, ":")
+        emitted_end, emitted_line = line_end + 1, line_number
+        after_remaining = context
+
+        result.matches += 1
+        if result.matches >= limit:
+            result.truncated = True
+            break
+        position = line_end + 1
+    flush_after(size)
+
+
+def search_file(
+    path: str, regex: "re.Pattern", context: int = 0, limit: int = 1000, stop: Optional[threading.Event] = None
+) -> FileResult:
+    """
+    在单个文件中搜索
+
+    Args:
+        path: 文件路径
+        regex: compile_pattern 编译的模式
+        context: 匹配行前后输出的上下文行数
+        limit: 最多输出的匹配行数，达到后停止搜索该文件
+        stop: 置位后尽快停止
+
+    Returns:
+        FileResult，skipped 非空时表示文件被跳过的原因
+    """
+    result = FileResult(path)
+    stop = stop or threading.Event()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return result
+            if size > MAX_FILE_SIZE:
+                result.skipped = "too large"
+                return result
+            head = f.read(SNIFF_SIZE)
+            if b"\0" in head:
+                result.skipped = "binary"
+                return result
+            if size >= MMAP_THRESHOLD and isinstance(regex.pattern, bytes):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    _scan(result, data, regex, context, limit, stop)
+                return result
+            data = head + f.read()
+    except OSError as e:
+        result.skipped = f"unreadable: {e.strerror or e}"
+        return result
+    if isinstance(regex.pattern, str):
+        data = data.decode("utf-8", errors="replace")
+    _scan(result, data, regex, context, limit, stop)
+    return result
@@ -0,0 +1,395 @@
+"""
+文件名索引
+
+search_files 原来每次都要 os.walk 整棵目录树。这里为每个允许访问的目录维护一个持久化的文件名索引：
+
+- 存储在 SQLite 中，文件名（小写）建立 FTS5 trigram 索引，子串查询和含 3 个以上连续字面字符的通配符查询
+  只需查询索引；结果仍按原来的规则在 Python 中复核，与 os.walk 的结果一致
+- 每个目录记录 mtime：刷新时只重新列出 mtime 变化的目录（目录中有文件增删、改名时 mtime 会变），
+  未变化的目录只需一次 stat
+- 首次使用时在后台建立索引，建立完成前的查询由调用方退回到 os.walk；距离上次刷新超过 refresh_interval 秒时，
+  查询前先同步增量刷新，结果最多滞后 refresh_interval 秒。这次刷新在查询调用中执行，要 stat 索引中的每个目录，
+  耗时随目录数量线性增长（目录很多时可调大 MCP_FS_INDEX_REFRESH）
+- 本服务器的写入、移动、删除等操作通过 notify_changed 通知索引，下一次查询前立即重新列出相关目录
+- 查询的起始目录按真实路径映射到索引中的位置，经符号链接访问的目录同样可以使用索引
+
+索引文件默认位于 --cache-dir 下的 fs_index 目录；未开启持久化时放在系统临时目录的 mcp_fs_index 下，
+不会在未经配置的情况下写入用户主目录。可通过环境变量 MCP_FS_INDEX_DIR 指定；MCP_FS_INDEX=0 关闭索引，
+退回到 os.walk。
+"""
+
+import fnmatch
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 查询前增量刷新的间隔（秒）
+DEFAULT_REFRESH_INTERVAL = 5.0
+_GLOB_CHARS = frozenset("*?[")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY, parent_id INTEGER, path TEXT NOT NULL UNIQUE, mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent_id);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY, dir_id INTEGER NOT NULL, name TEXT NOT NULL, name_lower TEXT NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    name_lower, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO names(rowid, name_lower) VALUES (new.id, new.name_lower);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO names(names, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+END;
+"""
+
+
+def name_matcher(pattern: str) -> Callable[[str], bool]:
+    """
+    返回判断文件名（小写）是否匹配的函数：含 * ? [ 时按通配符匹配整个文件名，否则按子串匹配，都不区分大小写
+    """
+    pattern = pattern.lower()
+    if _GLOB_CHARS & set(pattern):
+        return lambda name: fnmatch.fnmatchcase(name, pattern)
+    return lambda name: pattern in name
+
+
+def _literal(pattern: str) -> str:
+    """模式中最长的一段字面字符，用于在索引中预筛选"""
+    pattern = pattern.lower()
+    if not _GLOB_CHARS & set(pattern):
+        return pattern
+    runs, current, in_class = [], "", False
+    for char in pattern:
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            runs.append(current)
+            current = ""
+        elif char in "*?":
+            runs.append(current)
+            current = ""
+        else:
+            current += char
+    runs.append(current)
+    return max(runs, key=len)
+
+
+def _subtree(path: str) -> Tuple[str, str, str]:
+    """path 本身，以及按字符串排序时 path 的子孙路径所在的区间"""
+    prefix = path.rstrip(os.sep) + os.sep
+    return path, prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class FileIndex:
+    """
+    一个目录树的文件名索引
+
+    Args:
+        root: 被索引的目录（绝对路径）
+        db_path: SQLite 数据库文件路径
+        refresh_interval: 查询前增量刷新的间隔（秒）
+    """
+
+    def __init__(self, root: str, db_path: str, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.root = os.path.normpath(root)
+        self._real_root = os.path.realpath(self.root)
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # 写连接只在 _write_lock 内使用；查询使用每个线程各自的连接，WAL 模式下读写互不阻塞
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        self._local = threading.local()
+        self._state_lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._building = False
+        self._last_refresh = 0.0
+        row = self._writer.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        self._built = row is not None and row[0] == self.root
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def notify_changed(self, path: str) -> None:
+        """path 被创建、删除或移动，下一次查询前重新列出它所在的目录"""
+        parent = self._index_path(os.path.dirname(os.path.normpath(path)))
+        if parent is not None:
+            with self._state_lock:
+                self._dirty.add(parent)
+
+    def refresh(self, dirs: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        增量刷新索引
+
+        Args:
+            dirs: 强制重新列出的目录；为 None 时从根目录开始检查所有目录的 mtime
+
+        Returns:
+            检查的目录数、重新列出的目录数、新增和删除的条目数
+        """
+        with self._write_lock:
+            return self._refresh_locked(dirs)
+
+    def _refresh_locked(self, dirs: Optional[Iterable[str]]) -> Dict[str, int]:
+        started = time.perf_counter()
+        stats = self._sync(self._writer, dirs)
+        if not self._built:
+            self._writer.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (self.root,))
+            self._built = True
+        if dirs is None:
+            self._last_refresh = time.monotonic()
+        logger.debug(f"文件名索引已刷新: {self.root} {stats}, 耗时 {time.perf_counter() - started:.3f}s")
+        return stats
+
+    def _sync(self, conn: sqlite3.Connection, force: Optional[Iterable[str]]) -> Dict[str, int]:
+        known: Dict[str, Tuple[int, int]] = {}
+        children: Dict[int, List[str]] = defaultdict(list)
+        for dir_id, parent_id, path, mtime_ns in conn.execute("SELECT id, parent_id, path, mtime_ns FROM dirs"):
+            known[path] = (dir_id, mtime_ns)
+            children[parent_id].append(path)
+
+        forced = set()
+        for path in force or ():
+            # 新建的多级目录从最近的已索引的上级目录开始列出
+            path = os.path.normpath(path)
+            while path not in known and path != self.root and path.startswith(self.root + os.sep):
+                path = os.path.dirname(path)
+            forced.add(path)
+        stack = sorted(forced) if force is not None else [self.root]
+        stats = {"checked": 0, "listed": 0, "added": 0, "removed": 0}
+        conn.execute("BEGIN")
+        try:
+            while stack:
+                path = stack.pop()
+                if path != self.root and not path.startswith(self.root + os.sep):
+                    continue
+                stats["checked"] += 1
+                record = known.get(path)
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    if record is not None:
+                        stats["removed"] += self._drop_subtree(conn, path)
+                    continue
+                if record is not None and record[1] == mtime_ns and path not in forced:
+                    # 完整刷新时检查所有目录；只处理变更通知时，未变化的子目录不再深入
+                    if force is None:
+                        stack.extend(children[record[0]])
+                    continue
+                if record is None:
+                    parent = known.get(os.path.dirname(path))
+                    dir_id = conn.execute(
+                        "INSERT INTO dirs (parent_id, path, mtime_ns) VALUES (?, ?, ?)",
+                        (parent[0] if parent else None, path, mtime_ns),
+                    ).lastrowid
+                    known[path] = (dir_id, mtime_ns)
+                else:
+                    dir_id = record[0]
+                    conn.execute("UPDATE dirs SET mtime_ns = ? WHERE id = ?", (mtime_ns, dir_id))
+                stats["listed"] += 1
+                stack.extend(self._sync_listing(conn, path, dir_id, stats))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return stats
+
+    def _sync_listing(self, conn: sqlite3.Connection, path: str, dir_id: int, stats: Dict[str, int]) -> List[str]:
+        """重新列出一个目录，更新其中的条目，返回需要继续检查的子目录"""
+        listing: Dict[str, Tuple[bool, bool]] = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                        # 与 os.walk 一致：指向目录的符号链接算作目录，但不进入
+                        listing[entry.name] = (is_dir, is_dir and not entry.is_symlink())
+                    except OSError:
+                        listing[entry.name] = (False, False)
+        except OSError as e:
+            logger.warning(f"无法列出目录 {path}: {e}")
+        stored = {
+            name: (entry_id, bool(is_dir))
+            for entry_id, name, is_dir in conn.execute(
+                "SELECT id, name, is_dir FROM entries WHERE dir_id = ?", (dir_id,)
+            )
+        }
+        for name, (entry_id, is_dir) in stored.items():
+            if name not in listing or listing[name][0] != is_dir:
+                conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                stats["removed"] += 1
+                if is_dir:
+                    stats["removed"] += self._drop_subtree(conn, os.path.join(path, name))
+        for name, (is_dir, _) in listing.items():
+            if name not in stored or stored[name][1] != is_dir:
+                conn.execute(
+                    "INSERT INTO entries (dir_id, name, name_lower, is_dir) VALUES (?, ?, ?, ?)",
+                    (dir_id, name, name.lower(), int(is_dir)),
+                )
+                stats["added"] += 1
+        return [os.path.join(path, name) for name, (_, descend) in listing.items() if descend]
+
+    def _drop_subtree(self, conn: sqlite3.Connection, path: str) -> int:
+        exact, low, high = _subtree(path)
+        where = "path = ? OR (path >= ? AND path < ?)"
+        removed = conn.execute(
+            f"DELETE FROM entries WHERE dir_id IN (SELECT id FROM dirs WHERE {where})", (exact, low, high)
+        ).rowcount
+        conn.execute(f"DELETE FROM dirs WHERE {where}", (exact, low, high))
+        return removed
+
+    def _prepare(self) -> bool:
+        """
+        查询前保证索引可用：尚未建立时在后台建立并返回 False；有变更通知时重新列出相关目录，
+        距离上次刷新超过 refresh_interval 时同步增量刷新：当前查询要等待对索引中每个目录的一次 stat，
+        耗时与目录数量成正比
+        """
+        if not self._built:
+            with self._state_lock:
+                start = not self._building
+                self._building = True
+            if start:
+                logger.info(f"正在后台建立文件名索引: {self.root}")
+                threading.Thread(target=self._background_build, name="fs-index-build", daemon=True).start()
+            return False
+        with self._state_lock:
+            dirty, self._dirty = self._dirty, set()
+        if dirty:
+            self.refresh(dirty)
+        if time.monotonic() - self._last_refresh > self.refresh_interval:
+            with self._write_lock:
+                # 等待锁期间其他查询可能已经刷新过
+                if time.monotonic() - self._last_refresh > self.refresh_interval:
+                    self._refresh_locked(None)
+        return True
+
+    def _background_build(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"文件名索引建立失败: {self.root}, 错误: {e}")
+        finally:
+            with self._state_lock:
+                self._building = False
+
+    def _index_path(self, path: str) -> Optional[str]:
+        """path 在索引中的路径：按真实路径相对于根目录定位，不在根目录之内时返回 None"""
+        real = os.path.realpath(path)
+        if real == self._real_root:
+            return self.root
+        if not real.startswith(self._real_root.rstrip(os.sep) + os.sep):
+            return None
+        return os.path.join(self.root, os.path.relpath(real, self._real_root))
+
+    def search(self, base: str, pattern: str, exclude_patterns: Optional[List[str]] = None) -> Optional[List[str]]:
+        """
+        在 base 目录（含子目录）下查找名称匹配 pattern 的文件和目录
+
+        Args:
+            base: 搜索的起始目录，需位于 root 之内
+            pattern: 子串或通配符模式，不区分大小写
+            exclude_patterns: 排除的模式，规则与 pattern 相同
+
+        Returns:
+            "[DIR] 路径" / "[FILE] 路径" 列表，路径以 base 开头，按所在目录排列，同一目录中目录在前；
+            索引尚未建立完成或 base 不在 root 之内时返回 None，由调用方遍历目录
+        """
+        base = os.path.normpath(base)
+        indexed_base = self._index_path(base)
+        if indexed_base is None or not self._prepare():
+            return None
+        matches = name_matcher(pattern)
+        excludes = [name_matcher(p) for p in exclude_patterns or []]
+        exact, low, high = _subtree(indexed_base)
+        sql = (
+            "SELECT d.path, e.name, e.name_lower, e.is_dir FROM entries e JOIN dirs d ON d.id = e.dir_id "
+            "WHERE (d.path = ? OR (d.path >= ? AND d.path < ?))"
+        )
+        params: list = [exact, low, high]
+        literal = _literal(pattern)
+        if literal:
+            escaped = literal.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql += " AND e.id IN (SELECT rowid FROM names WHERE name_lower LIKE ? ESCAPE '\\')"
+            params.append(f"%{escaped}%")
+        sql += " ORDER BY d.path, e.is_dir DESC, e.name"
+
+        results = []
+        for dir_path, name, name_lower, is_dir in self._reader().execute(sql, params):
+            if matches(name_lower) and not any(exclude(name_lower) for exclude in excludes):
+                # 结果路径换回调用方给出的 base 之下
+                path = base + os.path.join(dir_path, name)[len(indexed_base) :]
+                results.append(f"[{'DIR' if is_dir else 'FILE'}] {path}")
+        return results
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
+
+
+# 允许访问的目录 -> 索引
+_indexes: Dict[str, FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv("MCP_FS_INDEX", "1").lower() not in ("0", "false", "no", "off")
+
+
+def index_dir() -> str:
+    """索引文件所在目录：MCP_FS_INDEX_DIR > --cache-dir/fs_index > 系统临时目录/mcp_fs_index"""
+    configured = os.getenv("MCP_FS_INDEX_DIR")
+    if configured:
+        return os.path.abspath(configured)
+    from common.cache import get_persist_dir
+
+    persist_dir = get_persist_dir()
+    if persist_dir:
+        return os.path.join(persist_dir, "fs_index")
+    return os.path.join(tempfile.gettempdir(), "mcp_fs_index")
+
+
+def get_index(root: str) -> FileIndex:
+    """获取（必要时创建）某个允许访问的目录的索引"""
+    root = os.path.normpath(os.path.abspath(root))
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            digest = hashlib.sha1(os.path.normcase(root).encode("utf-8")).hexdigest()[:16]
+            interval = float(os.getenv("MCP_FS_INDEX_REFRESH", DEFAULT_REFRESH_INTERVAL))
+            index = _indexes[root] = FileIndex(root, os.path.join(index_dir(), f"{digest}.sqlite3"), interval)
+        return index
+
+
+def notify_changed(*paths: str) -> None:
+    """通知已打开的索引这些路径被创建、删除或移动"""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for path in paths:
+        for index in indexes:
+            index.notify_changed(path)
@@ -3,23 +3,34 @@ MCP服务器
 支持文件系统操作
 """
 
+import asyncio
 import base64
+import binascii
+import codecs
+import functools
 import logging
+import mmap
 import os
+import re
 import shutil
+import sqlite3
 import stat
 import sys
+import threading
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 
 import click
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 from starlette.middleware.cors import CORSMiddleware
 
 from common.mcp_cli import with_mcp_options, run_mcp_server
+from fs_mcp import archive_reader, content_search, file_index, text_edit, text_reader, zip_writer
 
 # 配置日志
 logging.basicConfig(
@@ -40,12 +51,13 @@ def get_system_resource() -> Dict[str, Any]:
     """
     try:
         # 返回允许的目录列表
+        allowed_directories = get_allowed_directories()
         return {
             "contents": [
                 {
                     "type": "text",
-                    "text": "\n".join(ALLOWED_DIRECTORIES)
-                    if ALLOWED_DIRECTORIES
+                    "text": "\n".join(allowed_directories)
+                    if allowed_directories
                     else "No allowed directories configured",
                 }
             ]
@@ -56,6 +68,10 @@ def get_system_resource() -> Dict[str, Any]:
 
 # 全局变量：允许访问的目录列表
 ALLOWED_DIRECTORIES: List[str] = []
+# 允许访问的目录经 normcase 规范化后的集合，在 initialize_allowed_directories 中计算一次：
+# 前者同时包含字面路径和解析符号链接后的真实路径，用于检查请求的路径；后者只包含真实路径，用于检查 realpath
+_ALLOWED_ROOTS: frozenset = frozenset()
+_ALLOWED_REAL_ROOTS: frozenset = frozenset()
 
 
 def initialize_allowed_directories(*directories: str) -> None:
@@ -63,7 +79,7 @@ def initialize_allowed_directories(*directories: str) -> None:
     初始化允许访问的目录列表。
     支持通过环境变量 MCP_ALLOWED_DIRECTORIES 配置（用分号分隔多个目录）。
     """
-    global ALLOWED_DIRECTORIES
+    global ALLOWED_DIRECTORIES, _ALLOWED_ROOTS, _ALLOWED_REAL_ROOTS
     # 判断 .env 文件是否存在
     env_file = Path(__file__).parent.parent.parent / ".env"
     if env_file.exists():
@@ -85,36 +101,92 @@ def initialize_allowed_directories(*directories: str) -> None:
         # 如果没有指定目录，默认允许当前工作目录
         ALLOWED_DIRECTORIES = [os.getcwd()]
 
+    _ALLOWED_REAL_ROOTS = frozenset(os.path.normcase(os.path.realpath(d)) for d in ALLOWED_DIRECTORIES)
+    _ALLOWED_ROOTS = frozenset(os.path.normcase(d) for d in ALLOWED_DIRECTORIES) | _ALLOWED_REAL_ROOTS
+
     logging.info(f"MCP FileSystem Server - Allowed directories: {ALLOWED_DIRECTORIES}")
 
 
+def get_allowed_directories() -> List[str]:
+    """
+    获取允许访问的目录列表，第一次调用时才读取 .env 和环境变量完成初始化，
+    避免导入模块时的文件系统访问拖慢启动。
+    """
+    if not ALLOWED_DIRECTORIES:
+        initialize_allowed_directories()
+    return ALLOWED_DIRECTORIES
+
+
+def _within(path: str, roots: frozenset) -> bool:
+    """path 或它的某一级上级目录是否在 roots 中，只做 O(路径深度) 次集合查找"""
+    while path not in roots:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+
 def validate_path(path: str) -> str:
     """
     验证路径是否在允许的目录范围内。
+    路径本身和解析符号链接后的真实路径都必须位于允许的目录之内，指向外部的符号链接会被拒绝。
     返回规范化的绝对路径。
     """
     abs_path = os.path.abspath(path)
-
-    # 检查路径是否在允许的目录范围内
-    for allowed_dir in ALLOWED_DIRECTORIES:
-        try:
-            # 规范化路径并转换为小写进行比较（Windows大小写不敏感）
-            norm_abs_path = os.path.normpath(abs_path).lower()
-            norm_allowed_dir = os.path.normpath(allowed_dir).lower()
-
-            # 使用 os.path.commonpath 检查路径是否在允许的目录下
-            common_path = os.path.commonpath([norm_abs_path, norm_allowed_dir])
-            if common_path == norm_allowed_dir:
-                return abs_path
-        except ValueError:
-            # 不同驱动器的路径会抛出 ValueError
-            continue
+    get_allowed_directories()
+    # normcase 在 Windows 上统一大小写和分隔符，在 POSIX 上保持原样；
+    # 解析符号链接的检查每次都执行，目录被替换为指向外部的符号链接后立即拒绝
+    if _within(os.path.normcase(abs_path), _ALLOWED_ROOTS) and _within(
+        os.path.normcase(os.path.realpath(abs_path)), _ALLOWED_REAL_ROOTS
+    ):
+        return abs_path
 
     raise PermissionError(f"Access denied: Path '{path}' is outside allowed directories")
 
 
-# 初始化允许的目录（支持环境变量配置）
-initialize_allowed_directories()
+# 单次工具调用内并行处理多个文件（内容搜索、批量读取）的线程池，与执行工具调用的线程池分开，
+# 避免工具线程等待自己提交的任务时占满同一个线程池
+_io_pool: Optional[ThreadPoolExecutor] = None
+_io_workers = 0
+_io_pool_lock = threading.Lock()
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """获取文件 I/O 线程池，大小由环境变量 MCP_FS_IO_WORKERS 指定，默认 min(16, CPU 数 + 4)"""
+    global _io_pool, _io_workers
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_workers = int(os.getenv("MCP_FS_IO_WORKERS", "0")) or min(16, (os.cpu_count() or 1) + 4)
+            _io_pool = ThreadPoolExecutor(_io_workers, thread_name_prefix="fs-io")
+        return _io_pool
+
+
+async def _map_bounded(
+    fn: Callable[[Any], Any], items: Iterable[Any], window: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    在文件 I/O 线程池中对每个元素执行 fn，同时最多提交 window 个（默认为线程数的 2 倍），
+    按完成顺序产出 (序号, 结果)。提前结束迭代时取消尚未开始的任务。
+    """
+    pool = get_io_pool()
+    window = window or _io_workers * 2
+    pending: Dict[asyncio.Future, int] = {}
+    iterator = enumerate(items)
+    try:
+        while True:
+            for index, item in iterator:
+                pending[asyncio.wrap_future(pool.submit(fn, item))] = index
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        for future in pending:
+            future.cancel()
 
 
 @mcp.tool()
@@ -123,18 +195,32 @@ def read_text_file(
     head: int = Field(0, description="要读取的文件的前N行"),
     tail: int = Field(0, description="要读取的文件的后N行"),
     encoding: str = Field("utf-8", description="文件的编码"),
+    offset: int = Field(0, ge=0, description="起始字节偏移；与head同时使用时读取从该偏移开始的前N行"),
+    length: int = Field(0, ge=0, description="从offset开始读取的字节数，0表示读到文件末尾"),
 ) -> Dict[str, Any]:
     """
     从文件系统中读取文件的完整内容为文本格式。
     支持多种文本编码，并在文件无法读取时提供详细的错误信息。
     当需要检查单个文件的内容时使用此工具。
     使用'head'参数仅读取文件的前N行，
-    或使用'tail'参数仅读取文件的最后N行。
+    或使用'tail'参数仅读取文件的最后N行，
+    或使用'offset'/'length'按字节范围分段读取大文件（UTF-8 会对齐到字符边界）。
     无论文件扩展名如何，都将其作为文本文件处理。
     仅在允许的目录范围内工作。
     """
     try:
         validated_path = validate_path(path)
+        ranged = head > 0 or tail > 0 or offset > 0 or length > 0
+        if ranged and text_reader.supports_ranges(encoding):
+            # 只读取需要的部分，耗时与返回内容的大小有关，而与文件大小无关
+            if head > 0:
+                content = text_reader.read_head(validated_path, head, encoding, offset)
+            elif tail > 0:
+                content = text_reader.read_tail(validated_path, tail, encoding)
+            else:
+                content = text_reader.read_range(validated_path, offset, length, encoding)
+            return {"content": [{"type": "text", "text": content}]}
+
         with open(validated_path, "r", encoding=encoding) as f:
             content = f.read()
 
@@ -145,6 +231,9 @@ def read_text_file(
             elif tail > 0:
                 lines = content.splitlines()
                 content = "\n".join(lines[-tail:])
+            elif offset > 0 or length > 0:
+                # UTF-16 等编码无法按字节切分，按字符范围截取
+                content = content[offset : offset + length] if length else content[offset:]
 
         return {"content": [{"type": "text", "text": content}]}
 
@@ -156,12 +245,47 @@ def read_text_file(
         return {"content": [{"type": "text", "text": f"Error reading file: {e}"}]}
 
 
+# 一次返回整个媒体文件的大小上限，更大的文件需要分段读取
+MEDIA_MAX_BYTES = int(os.getenv("MCP_FS_MEDIA_MAX_BYTES", str(32 * 1024 * 1024)))
+# 分段读取时单段的大小上限
+MEDIA_MAX_CHUNK_BYTES = 8 * 1024 * 1024
+# 增量编码 base64 时每次处理的字节数，为 3 的倍数，各块的编码结果可以直接拼接
+_BASE64_BLOCK = 3 * 256 * 1024
+
+
+def _encode_base64(path: str, offset: int, length: int) -> str:
+    """
+    把文件中 [offset, offset + length) 的字节编码为 base64。
+    大文件通过 mmap 按块编码，不会把整个文件复制到内存中再整体编码。
+    """
+    if length <= 0:
+        return ""
+    with open(path, "rb") as f:
+        if length < text_reader.MMAP_THRESHOLD:
+            f.seek(offset)
+            return base64.b64encode(f.read(length)).decode("ascii")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            end = offset + length
+            return "".join(
+                binascii.b2a_base64(view[start : min(start + _BASE64_BLOCK, end)], newline=False).decode("ascii")
+                for start in range(offset, end, _BASE64_BLOCK)
+            )
+
+
 @mcp.tool()
-def read_media_file(path: str = Field(..., description="要读取的媒体文件路径")) -> Dict[str, Any]:
+def read_media_file(
+    path: str = Field(..., description="要读取的媒体文件路径"),
+    offset: int = Field(0, ge=0, description="分段读取的起始字节偏移，使用上一段返回的 next_offset 继续读取"),
+    length: int = Field(
+        0, ge=0, description=f"分段读取的字节数（最大 {MEDIA_MAX_CHUNK_BYTES} 字节），0 表示一次读取整个文件"
+    ),
+) -> Dict[str, Any]:
     """
     读取媒体文件（图片、音频等）并返回base64编码的数据。
     支持多种媒体格式，包括图片（png, jpg, gif等）和音频（mp3, wav等）。
     根据文件扩展名自动识别MIME类型。
+    超过大小上限的文件需要指定 length 分段读取：每段返回 base64 片段和 next_offset，
+    段长按 3 字节对齐，从 0 开始依次读取的各段 base64 可以直接拼接；读到末尾时 next_offset 为 null。
     """
     try:
         validated_path = validate_path(path)
@@ -189,11 +313,39 @@ def read_media_file(path: str = Field(..., description="要读取的媒体文件
 
         # 获取MIME类型
         mime_type = mime_types.get(extension, "application/octet-stream")
+        size = os.path.getsize(validated_path)
+
+        if length:
+            # 分段读取：片段不是完整的媒体文件，统一以 blob 返回
+            length = max(3, min(length, MEDIA_MAX_CHUNK_BYTES) // 3 * 3)
+            start = min(offset, size)
+            end = min(start + length, size)
+            next_offset = end if end < size else None
+            return {
+                "content": [
+                    {"type": "blob", "data": _encode_base64(validated_path, start, end - start), "mimeType": mime_type},
+                    {"type": "text", "text": f"Bytes {start}-{end} of {size}, next offset: {next_offset}"},
+                ],
+                "offset": start,
+                "length": end - start,
+                "total_size": size,
+                "next_offset": next_offset,
+            }
+
+        if size > MEDIA_MAX_BYTES:
+            return {
+                "content": [
+                    {
+                        "type": "text",
+                        "text": f"Error: File is {_format_size(size)}, larger than the {_format_size(MEDIA_MAX_BYTES)} "
+                        f"limit for a single read; use offset/length to read it in chunks",
+                    }
+                ],
+                "total_size": size,
+            }
 
         # 读取文件并转换为base64
-        with open(validated_path, "rb") as f:
-            file_data = f.read()
-            base64_data = base64.b64encode(file_data).decode("utf-8")
+        base64_data = _encode_base64(validated_path, 0, size)
 
         # 确定内容类型
         if mime_type.startswith("image/"):
@@ -231,6 +383,7 @@ def write_file(
         os.makedirs(os.path.dirname(validated_path), exist_ok=True)
         with open(validated_path, "w", encoding=encoding) as f:
             f.write(content)
+        _notify_changed(validated_path)
         return {"content": [{"type": "text", "text": f"File written successfully: {path}"}]}
     except Exception as e:
         return {"content": [{"type": "text", "text": f"Error writing file: {e}"}]}
@@ -246,6 +399,7 @@ def create_directory(path: str = Field(..., description="要创建的目录路
     try:
         validated_path = validate_path(path)
         os.makedirs(validated_path, exist_ok=True)
+        _notify_changed(validated_path)
         return {"content": [{"type": "text", "text": f"Directory created successfully: {path}"}]}
     except Exception as e:
         return {"content": [{"type": "text", "text": f"Error creating directory: {e}"}]}
@@ -283,29 +437,83 @@ def list_allowed_directories() -> Dict[str, Any]:
     列出服务器允许访问的所有目录。
     无需输入参数。
     """
-    if not ALLOWED_DIRECTORIES:
+    allowed_directories = get_allowed_directories()
+    if not allowed_directories:
         return {"content": [{"type": "text", "text": "No allowed directories configured"}]}
 
     return {
-        "content": [{"type": "text", "text": "\n".join([f"[ALLOWED] {dir_path}" for dir_path in ALLOWED_DIRECTORIES])}]
+        "content": [{"type": "text", "text": "\n".join([f"[ALLOWED] {dir_path}" for dir_path in allowed_directories])}]
     }
 
 
+# read_multiple_files 的默认字节预算
+READ_MULTIPLE_MAX_FILE_BYTES = 256 * 1024
+READ_MULTIPLE_MAX_TOTAL_BYTES = 4 * 1024 * 1024
+
+
+def _file_size(path: str) -> int:
+    """文件当前大小，路径无效或无法访问时返回 0（错误留到读取时报告）"""
+    try:
+        return os.path.getsize(validate_path(path))
+    except Exception:
+        return 0
+
+
+def _allocate_budget(sizes: List[int], max_file_bytes: int, max_total_bytes: int) -> List[int]:
+    """按输入顺序为每个文件分配可读取的字节数，使截断结果与读取完成的先后无关"""
+    remaining = max_total_bytes
+    grants = []
+    for size in sizes:
+        granted = min(size, max_file_bytes, remaining)
+        remaining -= granted
+        grants.append(granted)
+    return grants
+
+
+def _read_granted(path: str, granted: int) -> str:
+    """读取单个文件的前 granted 字节，返回带标题的文本块，未读完的部分注明截断"""
+    try:
+        validated_path = validate_path(path)
+        with open(validated_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size and not granted:
+                return f"=== {path} ===\n[skipped: total size limit reached, file is {_format_size(size)}]"
+            data = f.read(granted)
+        if len(data) >= size:
+            return f"=== {path} ===\n{data.decode('utf-8')}"
+        # 截断处可能位于多字节字符中间，增量解码器会丢弃末尾不完整的字符
+        content = codecs.getincrementaldecoder("utf-8")().decode(data, final=False)
+        return f"=== {path} ===\n{content}\n[truncated: showed {len(data)} of {size} bytes]"
+    except Exception as e:
+        return f"=== {path} ===\nError: {e}"
+
+
 @mcp.tool()
-def read_multiple_files(paths: List[str] = Field(..., description="要读取的文件路径列表")) -> Dict[str, Any]:
+async def read_multiple_files(
+    ctx: Context,
+    paths: List[str] = Field(..., description="要读取的文件路径列表"),
+    max_bytes_per_file: int = Field(READ_MULTIPLE_MAX_FILE_BYTES, ge=1, description="每个文件最多读取的字节数"),
+    max_total_bytes: int = Field(READ_MULTIPLE_MAX_TOTAL_BYTES, ge=1, description="所有文件合计最多读取的字节数"),
+) -> Dict[str, Any]:
     """
     同时读取多个文件。
     失败的读取不会停止整个操作。
+    文件并行读取，超过单个文件或合计字节预算的内容会被截断并标注，合计预算按路径列表的顺序分配；
+    客户端请求进度通知时，每个文件读取完成后发送一条进度消息。
     """
-    results = []
-    for path in paths:
-        try:
-            validated_path = validate_path(path)
-            with open(validated_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            results.append(f"=== {path} ===\n{content}")
-        except Exception as e:
-            results.append(f"=== {path} ===\nError: {e}")
+    sizes = [0] * len(paths)
+    async with aclosing(_map_bounded(_file_size, paths)) as stats:
+        async for index, size in stats:
+            sizes[index] = size
+    grants = _allocate_budget(sizes, max_bytes_per_file, max_total_bytes)
+
+    results: List[str] = [""] * len(paths)
+    completed = 0
+    async with aclosing(_map_bounded(lambda job: _read_granted(*job), zip(paths, grants))) as reads:
+        async for index, block in reads:
+            results[index] = block
+            completed += 1
+            await ctx.report_progress(completed, len(paths), f"read {paths[index]}")
 
     return {"content": [{"type": "text", "text": "\n\n".join(results)}]}
 
@@ -335,11 +543,43 @@ def move_file(
             os.makedirs(dest_dir, exist_ok=True)
 
         shutil.move(validated_source, validated_destination)
+        _notify_changed(validated_source, validated_destination)
         return {"content": [{"type": "text", "text": f"Successfully moved '{source}' to '{destination}'"}]}
     except Exception as e:
         return {"content": [{"type": "text", "text": f"Error moving file: {e}"}]}
 
 
+def _index_root(validated_path: str) -> Optional[str]:
+    """包含该路径的允许访问的目录（最内层），索引关闭或不在任何目录内时返回 None"""
+    if not file_index.enabled():
+        return None
+    roots = [
+        d for d in get_allowed_directories() if validated_path == d or validated_path.startswith(d.rstrip(os.sep) + os.sep)
+    ]
+    return max(roots, key=len) if roots else None
+
+
+def _walk_search(validated_path: str, pattern: str, exclude_patterns: Optional[List[str]]) -> List[str]:
+    """不使用索引，遍历目录查找匹配的文件和目录"""
+    matches = []
+    is_match = file_index.name_matcher(pattern)
+    excludes = [file_index.name_matcher(p) for p in exclude_patterns or []]
+
+    for root, dirs, files in os.walk(validated_path):
+        for names, kind in ((dirs, "DIR"), (files, "FILE")):
+            for name in names:
+                name_lower = name.lower()
+                if is_match(name_lower) and not any(exclude(name_lower) for exclude in excludes):
+                    matches.append(f"[{kind}] {os.path.join(root, name)}")
+    return matches
+
+
+def _notify_changed(*paths: str) -> None:
+    """通知文件名索引这些路径被创建、删除或移动"""
+    if file_index.enabled():
+        file_index.notify_changed(*paths)
+
+
 @mcp.tool()
 def search_files(
     path: str = Field(..., description="搜索的起始目录路径"),
@@ -348,7 +588,7 @@ def search_files(
 ) -> Dict[str, Any]:
     """
     递归搜索文件和目录。
-    支持通配符模式匹配，不区分大小写。
+    模式中不含 * ? [ 时按子串匹配，否则按通配符匹配整个名称，不区分大小写。
     返回匹配项的完整路径。
     """
     try:
@@ -356,36 +596,16 @@ def search_files(
         if not os.path.isdir(validated_path):
             return {"content": [{"type": "text", "text": f"Error: '{path}' is not a directory"}]}
 
-        matches = []
-        pattern_lower = pattern.lower()
-        exclude_patterns_lower = [p.lower() for p in (exclude_patterns or [])]
-
-        for root, dirs, files in os.walk(validated_path):
-            # 检查目录
-            for dir_name in dirs:
-                if pattern_lower in dir_name.lower():
-                    full_path = os.path.join(root, dir_name)
-                    # 检查是否应该排除
-                    should_exclude = False
-                    for exclude_pattern in exclude_patterns_lower:
-                        if exclude_pattern in dir_name.lower():
-                            should_exclude = True
-                            break
-                    if not should_exclude:
-                        matches.append(f"[DIR] {full_path}")
-
-            # 检查文件
-            for file_name in files:
-                if pattern_lower in file_name.lower():
-                    full_path = os.path.join(root, file_name)
-                    # 检查是否应该排除
-                    should_exclude = False
-                    for exclude_pattern in exclude_patterns_lower:
-                        if exclude_pattern in file_name.lower():
-                            should_exclude = True
-                            break
-                    if not should_exclude:
-                        matches.append(f"[FILE] {full_path}")
+        matches = None
+        root = _index_root(validated_path)
+        if root is not None:
+            try:
+                matches = file_index.get_index(root).search(validated_path, pattern, exclude_patterns)
+            except sqlite3.Error as e:
+                logger.warning(f"文件名索引不可用，改为遍历目录: {e}")
+        # 索引关闭、尚未建立完成或路径不在索引范围内时遍历目录
+        if matches is None:
+            matches = _walk_search(validated_path, pattern, exclude_patterns)
 
         if not matches:
             return {
@@ -397,6 +617,97 @@ def search_files(
         return {"content": [{"type": "text", "text": f"Error searching files: {e}"}]}
 
 
+# grep_files 每个任务搜索的文件数
+GREP_BATCH_SIZE = 32
+
+
+@mcp.tool()
+async def grep_files(
+    ctx: Context,
+    path: str = Field(..., description="搜索的起始目录或文件路径"),
+    pattern: str = Field(..., description="要搜索的正则表达式，literal 为 true 时为普通字符串"),
+    literal: bool = Field(False, description="按普通字符串匹配，不解析正则表达式"),
+    ignore_case: bool = Field(False, description="忽略大小写"),
+    include: Optional[List[str]] = Field(None, description="只搜索文件名或相对路径匹配这些通配符的文件，如 ['*.py']"),
+    exclude: Optional[List[str]] = Field(
+        None, description="跳过文件名或相对路径匹配这些通配符的文件和目录，如 ['node_modules', '*.min.js']"
+    ),
+    context_lines: int = Field(0, ge=0, le=10, description="匹配行前后输出的上下文行数"),
+    max_results: int = Field(200, ge=1, le=2000, description="最多返回的匹配行数，达到后停止搜索"),
+) -> Dict[str, Any]:
+    """
+    在文件内容中搜索正则表达式或字符串，输出格式同 grep -rn（路径:行号:内容）。
+    多个文件并行搜索，跳过二进制文件，不跟随符号链接。
+    客户端请求进度通知时，每个文件的匹配结果在搜索过程中通过进度消息实时推送。
+    """
+    try:
+        validated_path = validate_path(path)
+        if not os.path.exists(validated_path):
+            return {"content": [{"type": "text", "text": f"Error: '{path}' does not exist"}]}
+        try:
+            regex = content_search.compile_pattern(pattern, literal, ignore_case)
+        except re.error as e:
+            return {"content": [{"type": "text", "text": f"Error: Invalid regular expression: {e}"}]}
+
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(
+            get_io_pool(), lambda: list(content_search.iter_files(validated_path, include, exclude))
+        )
+
+        stop = threading.Event()
+        search = functools.partial(
+            content_search.search_file, regex=regex, context=context_lines, limit=max_results, stop=stop
+        )
+        # 每个任务处理一批文件，减少小文件较多时线程池和事件循环的调度开销
+        batches = [files[i : i + GREP_BATCH_SIZE] for i in range(0, len(files), GREP_BATCH_SIZE)]
+        found: Dict[int, content_search.FileResult] = {}
+        total_matches = skipped = scanned = 0
+        async with aclosing(_map_bounded(lambda batch: [search(f) for f in batch], batches)) as completed:
+            async for batch_index, results in completed:
+                scanned += len(results)
+                matched = []
+                for offset, result in enumerate(results):
+                    if result.skipped:
+                        skipped += 1
+                    if result.matches:
+                        found[batch_index * GREP_BATCH_SIZE + offset] = result
+                        total_matches += result.matches
+                        matched.append("\n".join(result.lines))
+                await ctx.report_progress(scanned, len(files), "\n".join(matched) if matched else None)
+                if total_matches >= max_results:
+                    stop.set()
+                    break
+
+        if not found:
+            return {
+                "content": [
+                    {"type": "text", "text": f"No matches found for pattern '{pattern}' ({scanned} files searched)"}
+                ]
+            }
+
+        # 按遍历顺序输出，超出 max_results 的匹配在文件内截断
+        blocks, remaining = [], max_results
+        for index in sorted(found):
+            result = found[index]
+            lines = result.lines
+            if result.matches > remaining:
+                lines = lines[: result.match_lines[remaining - 1] + 1]
+            blocks.append("\n".join(lines))
+            remaining -= min(result.matches, remaining)
+            if not remaining:
+                break
+        text = ("\n--\n" if context_lines else "\n").join(blocks)
+        summary = f"Found {min(total_matches, max_results)} matches in {len(blocks)} files ({scanned} files searched"
+        if skipped:
+            summary += f", {skipped} binary or unreadable skipped"
+        summary += ")"
+        if total_matches >= max_results:
+            summary += f"; results limited to max_results={max_results}, search stopped early"
+        return {"content": [{"type": "text", "text": f"{text}\n\n{summary}"}]}
+    except Exception as e:
+        return {"content": [{"type": "text", "text": f"Error searching file contents: {e}"}]}
+
+
 @mcp.tool()
 def get_file_info(path: str = Field(..., description="要获取信息的文件或目录路径")) -> Dict[str, Any]:
     """
@@ -522,45 +833,31 @@ def edit_file(
             original_content = f.read()
 
         lines = original_content.splitlines()
-        modified_content = original_content
-        changes_made = []
 
         # 检测缩进样式
         indent_style = _detect_indent_style(lines)
 
-        # 应用编辑操作
-        for i, edit_op in enumerate(edits):
-            old_text = edit_op.old_text
-            new_text = edit_op.new_text
-
-            if old_text in modified_content:
-                # 记录更改信息
-                old_lines = old_text.splitlines()
-                new_lines = new_text.splitlines()
-
-                # 保持缩进风格
-                if old_lines and new_lines:
-                    # 检测原始文本的缩进
-                    original_indent = _get_line_indent(old_lines[0])
-                    if original_indent:
-                        # 应用相同的缩进到新文本
-                        new_lines = [original_indent + line.lstrip() if line.strip() else line for line in new_lines]
-                        new_text = "\n".join(new_lines)
-
-                # 执行替换
-                modified_content = modified_content.replace(old_text, new_text, 1)
-
-                changes_made.append(
-                    {
-                        "operation": i + 1,
-                        "old_text": old_text,
-                        "new_text": new_text,
-                        "lines_removed": len(old_lines),
-                        "lines_added": len(new_lines),
-                    }
-                )
-            else:
-                changes_made.append({"operation": i + 1, "error": f"Text not found: '{old_text[:50]}...'"})
+        # 所有编辑都在原始内容上定位，一次拼接出修改后的内容
+        modified_content, results = text_edit.apply_edits(
+            original_content, [(edit_op.old_text, edit_op.new_text) for edit_op in edits]
+        )
+        changes_made = []
+        for edit_result in results:
+            if edit_result.error:
+                changes_made.append({"operation": edit_result.operation, "error": edit_result.error})
+                continue
+            matched_text = original_content[edit_result.start : edit_result.end]
+            changes_made.append(
+                {
+                    "operation": edit_result.operation,
+                    "old_text": matched_text,
+                    "new_text": edit_result.new_text,
+                    "line": edit_result.line,
+                    "fuzzy": edit_result.fuzzy,
+                    "lines_removed": len(matched_text.splitlines()),
+                    "lines_added": len(edit_result.new_text.splitlines()),
+                }
+            )
 
         # 生成差异
         diff_output = _generate_diff(original_content, modified_content, path)
@@ -582,7 +879,7 @@ def edit_file(
                 if "error" in change:
                     result_text += f"Operation {change['operation']}: {change['error']}\n"
                 else:
-                    result_text += f"Operation {change['operation']}: Replace {change['lines_removed']} lines with {change['lines_added']} lines\n"
+                    result_text += f"Operation {change['operation']}: {_describe_change(change)}\n"
             result_text += f"\nDiff:\n{diff_output}"
             return {"content": [{"type": "text", "text": result_text}]}
         else:
@@ -596,7 +893,7 @@ def edit_file(
                 if "error" in change:
                     result_text += f"Operation {change['operation']}: {change['error']}\n"
                 else:
-                    result_text += f"Operation {change['operation']}: Replace {change['lines_removed']} lines with {change['lines_added']} lines\n"
+                    result_text += f"Operation {change['operation']}: {_describe_change(change)}\n"
             result_text += f"\nDiff:\n{diff_output}"
             return {"content": [{"type": "text", "text": result_text}]}
 
@@ -613,6 +910,7 @@ def delete_file(path: str = Field(..., description="要删除的文件路径"))
         if not os.path.exists(validated_path):
             return {"content": [{"type": "text", "text": f"Error: File '{path}' does not exist"}]}
         os.remove(validated_path)
+        _notify_changed(validated_path)
         return {"content": [{"type": "text", "text": f"File deleted successfully: {path}"}]}
     except Exception as e:
         return {"content": [{"type": "text", "text": f"Error deleting file: {e}"}]}
@@ -625,7 +923,17 @@ def compress_to_zip(
     output_dir: Optional[str] = Field(default=None, description="输出zip文件的目录，默认为源文件/目录的父目录"),
     compression_level: int = Field(default=6, description="压缩级别 (0-9)，0为无压缩，9为最高压缩", ge=0, le=9),
     follow_symlinks: bool = Field(default=False, description="是否跟随符号链接"),
-    exclude_patterns: Optional[List[str]] = Field(default=None, description="要排除的文件模式列表（支持通配符）")
+    exclude_patterns: Optional[List[str]] = Field(default=None, description="要排除的文件模式列表（支持通配符）"),
+    compression_method: str = Field(default="deflate", description="压缩方式：deflate，或 zstd（需要 Python 3.14+）"),
+    store_compressed_media: bool = Field(
+        default=True, description="图片、音视频、压缩包等已压缩格式的文件只存储不压缩"
+    ),
+    base_zip: Optional[str] = Field(
+        default=None, description="增量压缩的基准：之前生成的 zip 包，未变化的文件直接复用其中已压缩的数据"
+    ),
+    verify_hash: bool = Field(
+        default=False, description="复用基准中的数据前校验文件的 CRC32，能发现大小和修改时间都没变但内容变了的文件"
+    ),
 ) -> Dict[str, Any]:
     """
     将文件或目录压缩为zip包。
@@ -633,6 +941,8 @@ def compress_to_zip(
     如果输入是文件，则创建包含该文件的zip包。
     如果输入是目录，则创建包含该目录所有内容的zip包。
     zip包的名称基于源文件或目录的名称。
+    多个文件在线程池中并行压缩。
+    指定 base_zip 时，名称、大小和修改时间与基准中相同的文件不再重新压缩，直接复制基准中的压缩数据。
     """
     import fnmatch
     
@@ -689,97 +999,116 @@ def compress_to_zip(
             zip_path = os.path.join(validated_output_dir, zip_filename)
             counter += 1
         
-        # 设置压缩级别
-        compression_method = zipfile.ZIP_DEFLATED if compression_level > 0 else zipfile.ZIP_STORED
-        
+        # 设置压缩方式和级别
+        compress_type = zipfile.ZIP_DEFLATED
+        if compression_method == "zstd":
+            compress_type = getattr(zipfile, "ZIP_ZSTANDARD", None)
+            if compress_type is None:
+                return {"content": [{"type": "text", "text": "Error: zstd compression requires Python 3.14 or later"}]}
+        elif compression_method != "deflate":
+            return {"content": [{"type": "text", "text": f"Error: Unsupported compression method '{compression_method}'"}]}
+        if compression_level == 0:
+            compress_type = zipfile.ZIP_STORED
+
+        base = None
+        if base_zip:
+            validated_base = validate_path(base_zip)
+            if not zipfile.is_zipfile(validated_base):
+                return {"content": [{"type": "text", "text": f"Error: Base archive '{base_zip}' is not a zip file"}]}
+            base = zip_writer.BaseArchive(validated_base, verify_hash)
+
         # 创建zip文件
-        with zipfile.ZipFile(zip_path, 'w', compression_method, compresslevel=compression_level) as zipf:
-            if os.path.isfile(validated_path):
-                # 压缩单个文件
-                if _should_exclude_file(validated_path, exclude_patterns):
-                    return {"content": [{"type": "text", "text": f"File '{path}' matches exclude pattern and was skipped"}]}
-                
-                arcname = _get_actual_case_name(validated_path)
-                zipf.write(validated_path, arcname)
-                file_count = 1
-                dir_count = 0
-            else:
-                # 压缩目录
-                file_count = 0
-                dir_count = 0
-                empty_dirs = set()
-                processed_dirs = set()
-                dir_name = _get_actual_case_name(validated_path)
-                
-                for root, dirs, files in os.walk(validated_path, followlinks=follow_symlinks):
-                    # 检查符号链接循环
-                    if not follow_symlinks and os.path.islink(root):
-                        continue
-                    
-                    current_dir_has_files = False
-                    
-                    # 处理文件
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        
-                        # 检查符号链接
-                        if os.path.islink(file_path) and not follow_symlinks:
-                            continue
-                        
-                        # 检查文件权限
-                        if not os.access(file_path, os.R_OK):
-                            logger.warning(f"Skipping file due to permission: {file_path}")
-                            continue
-                        
-                        # 检查排除模式
-                        if _should_exclude_file(file_path, exclude_patterns):
-                            continue
-                        
-                        # 计算相对于源目录的路径，保持实际的大小写
-                        rel_path = _get_relative_path_with_case(file_path, validated_path)
-                        # 在zip中的路径应该以目录名开头
-                        arcname = os.path.join(dir_name, rel_path)
-                        
-                        try:
-                            zipf.write(file_path, arcname)
-                            file_count += 1
-                            current_dir_has_files = True
-                        except (OSError, IOError) as e:
-                            logger.warning(f"Failed to compress file {file_path}: {e}")
-                    
-                    # 记录目录状态
-                    processed_dirs.add(root)
-                    if not current_dir_has_files and not any(os.path.join(root, d) in processed_dirs for d in dirs):
-                        empty_dirs.add(root)
-                    
-                    # 处理目录
-                    for dir_name_item in dirs:
-                        dir_path = os.path.join(root, dir_name_item)
-                        
-                        # 检查符号链接
-                        if os.path.islink(dir_path) and not follow_symlinks:
+        with zipfile.ZipFile(zip_path, 'w', compress_type, compresslevel=compression_level) as zipf:
+            writer = zip_writer.ParallelZipWriter(
+                zipf,
+                get_io_pool(),
+                compression_level,
+                store_compressed_media,
+                None if compress_type == zipfile.ZIP_DEFLATED else compress_type,
+                base,
+            )
+            try:
+                if os.path.isfile(validated_path):
+                    # 压缩单个文件
+                    if _should_exclude_file(validated_path, exclude_patterns):
+                        return {"content": [{"type": "text", "text": f"File '{path}' matches exclude pattern and was skipped"}]}
+
+                    arcname = _get_actual_case_name(validated_path)
+                    writer.add_file(validated_path, arcname, os.stat(validated_path))
+                    dir_count = 0
+                else:
+                    # 压缩目录：一次遍历中收集文件和大小，os.walk 返回的名称就是文件系统中的实际大小写，
+                    # 只有源目录本身需要查找实际名称
+                    dir_count = 0
+                    dir_name = _get_actual_case_name(validated_path)
+
+                    for root, dirs, files in os.walk(validated_path, followlinks=follow_symlinks):
+                        # 检查符号链接循环
+                        if not follow_symlinks and os.path.islink(root):
                             continue
-                        
-                        dir_count += 1
-                
-                # 为空目录创建条目
-                for empty_dir in empty_dirs:
-                    if os.path.exists(empty_dir) and not os.listdir(empty_dir):
-                        rel_path = _get_relative_path_with_case(empty_dir, validated_path)
-                        arcname = os.path.join(dir_name, rel_path) + '/'
-                        zipf.writestr(arcname, '')
-        
+
+                        rel_root = os.path.relpath(root, validated_path)
+                        arc_root = dir_name if rel_root == "." else os.path.join(dir_name, rel_root)
+
+                        # 处理文件
+                        for file in files:
+                            file_path = os.path.join(root, file)
+                            # 输出的zip文件可能位于源目录中
+                            if file_path == zip_path:
+                                continue
+
+                            try:
+                                st = os.stat(file_path) if follow_symlinks else os.lstat(file_path)
+                            except OSError as e:
+                                logger.warning(f"Skipping file {file_path}: {e}")
+                                continue
+                            # 检查符号链接
+                            if stat.S_ISLNK(st.st_mode) or not stat.S_ISREG(st.st_mode):
+                                continue
+
+                            # 检查文件权限
+                            if not os.access(file_path, os.R_OK):
+                                logger.warning(f"Skipping file due to permission: {file_path}")
+                                continue
+
+                            # 检查排除模式
+                            if _should_exclude_file(file_path, exclude_patterns):
+                                continue
+
+                            writer.add_file(file_path, os.path.join(arc_root, file), st)
+
+                        # 为空目录创建条目
+                        if not files and not dirs:
+                            writer.add_directory(arc_root)
+
+                        # 处理目录
+                        for dir_name_item in dirs:
+                            dir_path = os.path.join(root, dir_name_item)
+
+                            # 检查符号链接
+                            if os.path.islink(dir_path) and not follow_symlinks:
+                                continue
+
+                            dir_count += 1
+                writer.flush()
+            except BaseException:
+                writer.cancel()
+                raise
+            finally:
+                if base is not None:
+                    base.close()
+
+        for error in writer.errors:
+            logger.warning(f"Failed to compress file {error}")
+        file_count = writer.file_count
+        original_size = writer.original_size
+
+        _notify_changed(zip_path)
+
         # 获取zip文件大小
         zip_size = os.path.getsize(zip_path)
-        
+
         # 计算压缩率
-        if os.path.isfile(validated_path):
-            original_size = os.path.getsize(validated_path)
-        else:
-            original_size = sum(os.path.getsize(os.path.join(root, file)) 
-                              for root, dirs, files in os.walk(validated_path) 
-                              for file in files if os.path.exists(os.path.join(root, file)))
-        
         compression_ratio = ((original_size - zip_size) / original_size * 100) if original_size > 0 else 0
         
         result_text = f"压缩完成！\n"
@@ -788,6 +1117,8 @@ def compress_to_zip(
         result_text += f"压缩了 {file_count} 个文件"
         if not os.path.isfile(validated_path):
             result_text += f"，{dir_count} 个目录"
+        if base is not None:
+            result_text += f"\n复用基准 {base_zip} 中未变化的文件: {writer.reused_count} 个"
         result_text += f"\n原始大小: {_format_size(original_size)}\n"
         result_text += f"压缩后大小: {_format_size(zip_size)}\n"
         result_text += f"压缩率: {compression_ratio:.1f}%\n"
@@ -802,6 +1133,7 @@ def compress_to_zip(
             ],
             "zip_path": zip_path,
             "file_count": file_count,
+            "reused_count": writer.reused_count,
             "original_size": original_size,
             "compressed_size": zip_size,
             "compression_ratio": compression_ratio
@@ -811,6 +1143,159 @@ def compress_to_zip(
         logger.error(f"Error creating zip file: {e}")
         return {"content": [{"type": "text", "text": f"Error creating zip file: {e}"}]}
 
+
+# read_archive_member 默认和最多返回的成员字节数
+ARCHIVE_MEMBER_MAX_BYTES = 1024 * 1024
+ARCHIVE_MEMBER_LIMIT_BYTES = 8 * 1024 * 1024
+
+
+@mcp.tool()
+def list_archive(
+    path: str = Field(..., description="zip、tar、tar.gz、tar.bz2、tar.xz 或 tar.zst 包的路径"),
+    max_entries: int = Field(1000, ge=1, description="最多列出的成员数"),
+) -> Dict[str, Any]:
+    """
+    列出压缩包中的成员，不解压。
+    每行为 [FILE] 或 [DIR] 加成员名和大小，zip 包同时给出压缩后的大小。
+    """
+    try:
+        validated_path = validate_path(path)
+        if not os.path.isfile(validated_path):
+            return {"content": [{"type": "text", "text": f"Error: File '{path}' does not exist"}]}
+        entries, truncated = archive_reader.list_entries(validated_path, max_entries)
+
+        lines = []
+        total_size = 0
+        for entry in entries:
+            total_size += entry.size
+            if entry.kind == "dir":
+                lines.append(f"[DIR] {entry.name}")
+                continue
+            line = f"[{entry.kind.upper()}] {entry.name} ({_format_size(entry.size)}"
+            if entry.compressed_size is not None:
+                line += f", compressed {_format_size(entry.compressed_size)}"
+            lines.append(line + ")")
+        summary = f"{len(entries)} entries, {_format_size(total_size)} uncompressed"
+        if truncated:
+            summary += f" (only the first {max_entries} entries are listed)"
+        lines.append(summary)
+        return {
+            "content": [{"type": "text", "text": "\n".join(lines)}],
+            "entry_count": len(entries),
+            "total_size": total_size,
+            "truncated": truncated,
+        }
+    except Exception as e:
+        return {"content": [{"type": "text", "text": f"Error listing archive: {e}"}]}
+
+
+@mcp.tool()
+def read_archive_member(
+    path: str = Field(..., description="压缩包路径"),
+    member: str = Field(..., description="要读取的成员名，与 list_archive 列出的名称相同"),
+    encoding: str = Field("utf-8", description="文本成员的编码"),
+    max_bytes: int = Field(
+        ARCHIVE_MEMBER_MAX_BYTES,
+        ge=1,
+        le=ARCHIVE_MEMBER_LIMIT_BYTES,
+        description=f"最多读取的字节数（最大 {ARCHIVE_MEMBER_LIMIT_BYTES} 字节）",
+    ),
+) -> Dict[str, Any]:
+    """
+    读取压缩包中单个成员的内容，不解压其它成员。
+    文本成员按 encoding 解码返回；二进制成员（含 NUL 字节或无法解码）以 base64 blob 返回。
+    超过 max_bytes 的成员只返回开头部分，并附加截断提示。
+    """
+    try:
+        validated_path = validate_path(path)
+        if not os.path.isfile(validated_path):
+            return {"content": [{"type": "text", "text": f"Error: File '{path}' does not exist"}]}
+        codecs.lookup(encoding)
+        # 多读一个字节用于判断是否截断
+        entry, data = archive_reader.read_member(validated_path, member, max_bytes + 1)
+        truncated = len(data) > max_bytes
+        data = data[:max_bytes]
+        marker = f"\n[truncated: showed {len(data)} of {entry.size} bytes]" if truncated else ""
+
+        text = None
+        if b"\0" not in data[: content_search.SNIFF_SIZE]:
+            try:
+                # 截断处可能切开多字节字符，忽略末尾不完整的字符
+                text = codecs.getincrementaldecoder(encoding)().decode(data, final=not truncated)
+            except UnicodeDecodeError:
+                text = None
+        if text is not None:
+            return {"content": [{"type": "text", "text": text + marker}], "size": entry.size, "truncated": truncated}
+        return {
+            "content": [
+                {"type": "blob", "data": base64.b64encode(data).decode("ascii"), "mimeType": "application/octet-stream"},
+                {"type": "text", "text": f"Binary member {entry.name} ({entry.size} bytes){marker}"},
+            ],
+            "size": entry.size,
+            "truncated": truncated,
+        }
+    except KeyError:
+        return {"content": [{"type": "text", "text": f"Error: Member '{member}' not found in {path}"}]}
+    except LookupError:
+        return {"content": [{"type": "text", "text": f"Error: Unknown encoding '{encoding}'"}]}
+    except Exception as e:
+        return {"content": [{"type": "text", "text": f"Error reading archive member: {e}"}]}
+
+
+@mcp.tool()
+def extract_archive(
+    path: str = Field(..., description="压缩包路径"),
+    output_dir: Optional[str] = Field(default=None, description="解压到的目录，默认为压缩包所在目录下与包同名的目录"),
+    members: Optional[List[str]] = Field(default=None, description="只解压这些成员（目录成员包含其下所有内容），默认全部"),
+    overwrite: bool = Field(default=False, description="是否覆盖已存在的文件，默认跳过"),
+    max_total_bytes: int = Field(
+        archive_reader.DEFAULT_MAX_TOTAL_BYTES, ge=1, description="解压出的数据总量上限（字节）"
+    ),
+) -> Dict[str, Any]:
+    """
+    按成员流式解压 zip、tar、tar.gz、tar.bz2、tar.xz 或 tar.zst 包。
+    每个输出路径都经过允许目录的校验；绝对路径、含 .. 的成员以及符号链接、设备文件会被跳过。
+    为防御压缩炸弹，解压出的数据超过 max_total_bytes、超过包大小的 200 倍（小包额外放宽 16MB）
+    或成员数超过 100000 时中止解压；中止时删除本次新建的文件和目录，已存在的文件保持不变。
+    """
+    try:
+        validated_path = validate_path(path)
+        if not os.path.isfile(validated_path):
+            return {"content": [{"type": "text", "text": f"Error: File '{path}' does not exist"}]}
+
+        if output_dir is None:
+            name = os.path.basename(validated_path)
+            for suffix in (".tar.gz", ".tar.bz2", ".tar.xz", ".tar.zst"):
+                if name.lower().endswith(suffix):
+                    name = name[: -len(suffix)]
+                    break
+            else:
+                name = os.path.splitext(name)[0]
+            output_dir = os.path.join(os.path.dirname(validated_path), name)
+        validated_output = validate_path(output_dir)
+
+        try:
+            # 每个成员的目标路径（包括解析符号链接后的真实路径）都由 validate_path 校验
+            result = archive_reader.extract(
+                validated_path, validated_output, validate_path, members, overwrite, max_total_bytes
+            )
+        finally:
+            _notify_changed(validated_output)
+
+        result_text = f"Extracted {len(result.files)} files ({_format_size(result.total_bytes)}) to {output_dir}"
+        if result.skipped:
+            result_text += f"\nSkipped {len(result.skipped)} entries:\n" + "\n".join(result.skipped)
+        return {
+            "content": [{"type": "text", "text": result_text}],
+            "output_dir": validated_output,
+            "file_count": len(result.files),
+            "total_bytes": result.total_bytes,
+            "skipped": result.skipped,
+        }
+    except Exception as e:
+        return {"content": [{"type": "text", "text": f"Error extracting archive: {e}"}]}
+
+
 def _detect_indent_style(lines: List[str]) -> str:
     """
     检测文件的缩进样式。
@@ -832,19 +1317,6 @@ def _detect_indent_style(lines: List[str]) -> str:
         return "mixed"
 
 
-def _get_line_indent(line: str) -> str:
-    """
-    获取行的缩进部分。
-    """
-    indent = ""
-    for char in line:
-        if char in [" ", "\t"]:
-            indent += char
-        else:
-            break
-    return indent
-
-
 def _get_actual_case_name(path: str) -> str:
     """
     获取文件系统中文件/目录的实际大小写名称。
@@ -870,38 +1342,12 @@ def _get_actual_case_name(path: str) -> str:
         return os.path.basename(path)
 
 
-def _get_relative_path_with_case(file_path: str, base_path: str) -> str:
-    """
-    获取保持原始大小写的相对路径。
-    逐级获取每个目录的实际大小写名称。
-    """
-    try:
-        # 将路径标准化
-        file_path = os.path.abspath(file_path)
-        base_path = os.path.abspath(base_path)
-        
-        # 获取相对路径的各个部分
-        rel_path = os.path.relpath(file_path, base_path)
-        
-        # 如果是当前目录，直接返回文件名
-        if rel_path == '.' or rel_path == os.path.basename(file_path):
-            return _get_actual_case_name(file_path)
-        
-        # 分割路径并重建
-        path_parts = []
-        current_path = base_path
-        
-        # 逐级构建路径，获取每一级的实际大小写
-        for part in rel_path.split(os.sep):
-            current_path = os.path.join(current_path, part)
-            actual_name = _get_actual_case_name(current_path)
-            path_parts.append(actual_name)
-        
-        return os.path.join(*path_parts) if path_parts else rel_path
-        
-    except (OSError, IOError, ValueError):
-        # 出现错误时，返回原始相对路径
-        return os.path.relpath(file_path, base_path)
+def _describe_change(change: Dict[str, Any]) -> str:
+    """edit_file 结果中单个编辑的描述"""
+    text = f"Replace {change['lines_removed']} lines with {change['lines_added']} lines at line {change['line']}"
+    if change["fuzzy"]:
+        text += " (matched ignoring whitespace)"
+    return text
 
 
 def _generate_diff(original: str, modified: str, filename: str) -> str:
@@ -0,0 +1,193 @@
+"""
+多处文本替换
+
+edit_file 的实现。所有编辑都在原始内容上定位，最后一次拼接生成结果，不再为每个编辑复制和重新扫描整个文件：
+
+- 每个编辑替换原始内容中第一处与之前的编辑不重叠的 old_text；old_text 相同的多个编辑依次替换后续出现的位置
+- 编辑之间互不影响，后面的编辑不会匹配到前面编辑插入的文本
+- 找不到完全相同的文本时，按行忽略空白差异匹配（行首缩进、行尾空白、行内连续空白），
+  并把 new_text 的缩进平移到匹配行的实际缩进
+- 与已定位的编辑重叠的编辑不执行，在结果中报告
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class EditResult:
+    """单个编辑的定位结果"""
+
+    def __init__(self, operation: int, old_text: str, new_text: str):
+        self.operation = operation
+        self.old_text = old_text
+        self.new_text = new_text
+        # 在原始内容中替换的范围，error 非空时无效
+        self.start = -1
+        self.end = -1
+        # 替换范围起始处的行号，从 1 开始
+        self.line = 0
+        # 是否为忽略空白的匹配
+        self.fuzzy = False
+        self.error: Optional[str] = None
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip(" \t"))]
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _reindent(text: str, old_indent: str, new_indent: str) -> str:
+    """把 text 中以 old_indent 开头的非空行改为以 new_indent 开头，保持各行的相对缩进"""
+    if old_indent == new_indent:
+        return text
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        if line.strip() and line.startswith(old_indent):
+            lines[i] = new_indent + line[len(old_indent) :]
+    return "\n".join(lines)
+
+
+class _Spans:
+    """已定位的替换范围，按起始位置排序"""
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.items: List[EditResult] = []
+
+    def conflict(self, start: int, end: int) -> Optional[EditResult]:
+        """与 [start, end) 重叠的已定位编辑"""
+        i = bisect.bisect_right(self.starts, start)
+        if i and (self.items[i - 1].end > start or self.items[i - 1].start == start):
+            return self.items[i - 1]
+        if i < len(self.items) and self.items[i].start < end:
+            return self.items[i]
+        return None
+
+    def add(self, result: EditResult) -> None:
+        i = bisect.bisect_right(self.starts, result.start)
+        self.starts.insert(i, result.start)
+        self.items.insert(i, result)
+
+
+class _Lines:
+    """原始内容按行切分后的忽略空白匹配索引，只在需要时构建"""
+
+    def __init__(self, content: str):
+        self.lines = content.split("\n")
+        self.offsets = []
+        offset = 0
+        for line in self.lines:
+            self.offsets.append(offset)
+            offset += len(line) + 1
+        self.normalized = [_normalize(line) for line in self.lines]
+        self.by_first: Dict[str, List[int]] = {}
+        for i, line in enumerate(self.normalized):
+            if line:
+                self.by_first.setdefault(line, []).append(i)
+
+    def candidates(self, old_lines: List[str]):
+        """依次产出与 old_lines 忽略空白后逐行相同的起始行号"""
+        target = [_normalize(line) for line in old_lines]
+        for i in self.by_first.get(target[0], ()):
+            if self.normalized[i : i + len(target)] == target:
+                yield i
+
+
+def _locate_exact(content: str, result: EditResult, spans: _Spans) -> Optional[EditResult]:
+    """查找第一处不与已定位编辑重叠的 old_text，找到时返回 None，否则返回挡住它的编辑"""
+    old_text = result.old_text
+    position = 0
+    blocker = None
+    while (start := content.find(old_text, position)) >= 0:
+        end = start + len(old_text)
+        blocker = spans.conflict(start, end)
+        if blocker is None:
+            result.start, result.end = start, end
+            return None
+        # 从 blocker 范围内开始的出现位置都会与它重叠
+        position = max(blocker.end, start + 1)
+    return blocker or result
+
+
+def _locate_fuzzy(index: _Lines, result: EditResult, spans: _Spans) -> Optional[EditResult]:
+    """按行忽略空白匹配，找到时返回 None，否则返回挡住它的编辑"""
+    old_lines = result.old_text.split("\n")
+    trailing_newline = len(old_lines) > 1 and not old_lines[-1].strip()
+    # 首尾的空行不参与匹配
+    while old_lines and not old_lines[-1].strip():
+        old_lines.pop()
+    while old_lines and not old_lines[0].strip():
+        old_lines.pop(0)
+    if not old_lines:
+        return result
+
+    blocker = None
+    for i in index.candidates(old_lines):
+        last = i + len(old_lines) - 1
+        start = index.offsets[i]
+        end = index.offsets[last] + len(index.lines[last])
+        # old_text 以换行结尾时连同匹配的最后一行的换行符一起替换
+        with_newline = trailing_newline and last + 1 < len(index.lines)
+        if with_newline:
+            end += 1
+        blocker = spans.conflict(start, end)
+        if blocker is not None:
+            continue
+        new_text = result.new_text
+        if not with_newline and new_text.endswith("\n"):
+            new_text = new_text[:-1]
+        result.new_text = _reindent(new_text, _indent(old_lines[0]), _indent(index.lines[i]))
+        result.start, result.end = start, end
+        result.fuzzy = True
+        return None
+    return blocker or result
+
+
+def apply_edits(content: str, edits: Sequence[Tuple[str, str]]) -> Tuple[str, List[EditResult]]:
+    """
+    在 content 上执行多处替换
+
+    Args:
+        content: 原始内容
+        edits: (old_text, new_text) 列表
+
+    Returns:
+        (替换后的内容, 每个编辑的结果)，未执行的编辑 error 非空
+    """
+    results = []
+    spans = _Spans()
+    index: Optional[_Lines] = None
+    for operation, (old_text, new_text) in enumerate(edits, 1):
+        result = EditResult(operation, old_text, new_text)
+        results.append(result)
+        if not old_text:
+            result.error = "old_text is empty"
+            continue
+        blocker = _locate_exact(content, result, spans)
+        if blocker is result:
+            if index is None:
+                index = _Lines(content)
+            blocker = _locate_fuzzy(index, result, spans)
+        if blocker is result:
+            preview = old_text[:50] + ("..." if len(old_text) > 50 else "")
+            result.error = f"Text not found: '{preview}'"
+        elif blocker is not None:
+            result.error = f"Text overlaps the text replaced by operation {blocker.operation}"
+        else:
+            spans.add(result)
+
+    # 按位置顺序拼接，行号增量计算
+    parts = []
+    position, line = 0, 1
+    for result in spans.items:
+        line += content.count("\n", position, result.start)
+        result.line = line
+        line += content.count("\n", result.start, result.end)
+        parts.append(content[position : result.start])
+        parts.append(result.new_text)
+        position = result.end
+    parts.append(content[position:])
+    return "".join(parts), results
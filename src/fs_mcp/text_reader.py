@@ -0,0 +1,181 @@
+"""
+按范围读取文本文件
+
+read_text_file 的 head / tail / offset / length 都只读取需要的部分，耗时与内存只与返回的内容大小有关：
+
+- head：从 offset 开始顺序查找换行符，找到第 N 个就停止
+- tail：从文件末尾按块向前查找换行符
+- offset / length：按字节范围读取
+
+超过 MMAP_THRESHOLD 的文件使用 mmap，换行符的查找直接在映射的页面上进行，只有返回的片段会被复制。
+行的划分与整体读取时的 str.splitlines() 一致：在字节层面查找 \n、\r\n、\r 和其他 ASCII 行分隔符
+（UTF-8 还包括 U+0085、U+2028、U+2029），解码后再按 splitlines() 截取前 / 后 N 行。
+这只适用于 ASCII 字符编码为单字节的编码（UTF-8、GBK、Latin-1 等），UTF-16 / UTF-32 等编码由调用方退回到整体读取。
+"""
+
+import codecs
+import mmap
+import os
+import re
+from typing import Optional, Pattern, Tuple, Union
+
+# 超过该大小的文件使用 mmap
+MMAP_THRESHOLD = 1024 * 1024
+# tail 向前查找时每次查找的块大小
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# str.splitlines() 的行分隔符在字节层面的形式，\r\n 算作一个
+_ASCII_BREAKS = re.compile(rb"\r\n|[\n\r\x0b\x0c\x1c-\x1e]")
+_UTF8_BREAKS = re.compile(rb"\r\n|[\n\r\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+
+def supports_ranges(encoding: str) -> bool:
+    """编码的换行符是否为单字节 0x0A，只有这类编码可以在字节层面按行切分"""
+    try:
+        return "\n".encode(encoding) == b"\n"
+    except LookupError:
+        return False
+
+
+def _is_utf8(encoding: str) -> bool:
+    return codecs.lookup(encoding).name in ("utf-8", "utf-8-sig")
+
+
+def _breaks(encoding: str) -> Pattern[bytes]:
+    """
+    编码的行分隔符模式。非 UTF-8 编码只查找 ASCII 分隔符：漏掉的分隔符只会让读取的范围变大，
+    解码后按 splitlines() 截取时结果仍然正确
+    """
+    return _UTF8_BREAKS if _is_utf8(encoding) else _ASCII_BREAKS
+
+
+class _Source:
+    """打开的文件：大文件为 mmap，小文件整体读入内存"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map: Optional[mmap.mmap] = None
+        if self.size >= MMAP_THRESHOLD:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data: Union[mmap.mmap, bytes] = self.map
+        else:
+            self.data = self.file.read()
+            self.size = len(self.data)
+
+    def read(self, start: int, end: int) -> bytes:
+        start, end = max(0, start), min(end, self.size)
+        if start >= end:
+            return b""
+        return self.data[start:end]
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> "_Source":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _head_end(source: _Source, start: int, lines: int, breaks: Pattern[bytes]) -> int:
+    """从 start 开始第 lines 个行分隔符之后的位置，不足 lines 个时为文件末尾"""
+    for count, match in enumerate(breaks.finditer(source.data, start), 1):
+        if count >= lines:
+            return match.end()
+    return source.size
+
+
+def _tail_start(source: _Source, lines: int, breaks: Pattern[bytes]) -> int:
+    """文件最后 lines 行的起始位置，末尾的行分隔符不算作空行"""
+    remaining = lines
+    block_end = source.size
+    while block_end > 0:
+        block_start = max(0, block_end - TAIL_BLOCK_SIZE)
+        # 块的边界不能落在 \r\n 或多字节字符的中间，否则同一个分隔符会被前后两块各算一次
+        while block_start > 0 and (source.data[block_start - 1] == 0x0D or 0x80 <= source.data[block_start] < 0xC0):
+            block_start -= 1
+        for match in reversed(list(breaks.finditer(source.data, block_start, block_end))):
+            if match.end() == source.size:
+                continue
+            remaining -= 1
+            if not remaining:
+                return match.end()
+        block_end = block_start
+    return 0
+
+
+def _align_utf8(source: _Source, start: int, end: int) -> Tuple[int, int]:
+    """
+    把字节范围对齐到 UTF-8 字符边界：跳过开头不完整字符的后续字节，把末尾不完整的字符读完整。
+    相邻的两个范围（前一个的 end 等于后一个的 start）拼接后既不会丢字符，也不会重复
+    """
+    while start < source.size and 0x80 <= source.read(start, start + 1)[0] < 0xC0:
+        start += 1
+    if start >= end:
+        # 范围内只有前一个字符的后续字节，这个字符属于前一个范围
+        return start, start
+    while end < source.size and 0x80 <= source.read(end, end + 1)[0] < 0xC0:
+        end += 1
+    return start, end
+
+
+def _decode_lines(data: bytes, encoding: str, lines: int, tail: bool = False) -> str:
+    # 与整体读取时 splitlines() 截取后再 "\n".join 的输出保持一致
+    split = data.decode(encoding).splitlines()
+    return "\n".join(split[-lines:] if tail else split[:lines])
+
+
+def read_head(path: str, lines: int, encoding: str = "utf-8", offset: int = 0) -> str:
+    """
+    读取从字节偏移 offset 开始的前 lines 行
+
+    Args:
+        path: 文件路径
+        lines: 行数
+        encoding: 文件编码
+        offset: 起始字节偏移
+    """
+    with _Source(path) as source:
+        start = offset
+        if offset and _is_utf8(encoding):
+            start, _ = _align_utf8(source, offset, source.size)
+        end = _head_end(source, start, lines, _breaks(encoding))
+        return _decode_lines(source.read(start, end), encoding, lines)
+
+
+def read_tail(path: str, lines: int, encoding: str = "utf-8") -> str:
+    """
+    读取文件的最后 lines 行
+
+    Args:
+        path: 文件路径
+        lines: 行数
+        encoding: 文件编码
+    """
+    with _Source(path) as source:
+        start = _tail_start(source, lines, _breaks(encoding))
+        return _decode_lines(source.read(start, source.size), encoding, lines, tail=True)
+
+
+def read_range(path: str, offset: int, length: int = 0, encoding: str = "utf-8") -> str:
+    """
+    按字节范围读取文件
+
+    Args:
+        path: 文件路径
+        offset: 起始字节偏移
+        length: 读取的字节数，0 表示读到文件末尾
+        encoding: 文件编码；UTF-8 会对齐到字符边界，其他多字节编码的边界上可能出现替换字符
+    """
+    with _Source(path) as source:
+        end = source.size if not length else min(source.size, offset + length)
+        if offset >= end:
+            return ""
+        if _is_utf8(encoding):
+            start, end = _align_utf8(source, offset, end)
+            return source.read(start, end).decode(encoding)
+        return source.read(offset, end).decode(encoding, errors="replace")
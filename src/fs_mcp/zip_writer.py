@@ -0,0 +1,309 @@
+"""
+并行写入 zip 包
+
+compress_to_zip 原来逐个调用 ZipFile.write，所有文件在一个线程中依次压缩。这里把压缩放到线程池中：
+
+- 工作线程读取文件并用 zlib 计算原始 deflate 流和 CRC（zlib 压缩时会释放 GIL，可以真正并行）
+- 写入线程按提交顺序取回结果，生成本地文件头后直接写入压缩好的数据，zip 中条目的顺序与遍历顺序一致
+- 正在压缩和等待写入的文件总大小受 MAX_PENDING_BYTES 限制，超过 PARALLEL_MAX_FILE_SIZE 的大文件
+  仍由写入线程通过 ZipFile.write 流式压缩，内存占用不随文件大小增长
+- 扩展名属于已压缩格式（图片、音视频、压缩包）的文件只存储不压缩，省去几乎无收益的 deflate
+- 指定旧的 zip 包作为基准时，名称、大小、修改时间（可选 CRC32）都没变的文件直接复制旧包中的压缩数据
+
+写入预压缩数据使用了 ZipFile 的内部属性（fp、start_dir、_writecheck 等），写法与 ZipFile.mkdir 相同。
+"""
+
+import functools
+import os
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Iterable, Iterator, Optional, Tuple, Union
+
+# 已经压缩过的格式，再做 deflate 几乎没有收益
+COMPRESSED_EXTENSIONS = frozenset(
+    {
+        ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+        ".mp3", ".aac", ".m4a", ".ogg", ".opus", ".flac",
+        ".mp4", ".m4v", ".mkv", ".mov", ".webm", ".avi",
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".jar", ".apk", ".whl",
+        ".woff", ".woff2", ".pdf", ".docx", ".xlsx", ".pptx",
+    }
+)  # fmt: skip
+# 超过该大小的文件不做并行预压缩，由写入线程流式压缩
+PARALLEL_MAX_FILE_SIZE = 16 * 1024 * 1024
+# 正在并行压缩、等待写入的文件总大小上限
+MAX_PENDING_BYTES = 64 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+
+
+def zip_info(arcname: str, st: os.stat_result) -> zipfile.ZipInfo:
+    """按 stat 结果构造 ZipInfo，与 ZipInfo.from_file(strict_timestamps=False) 相同，但不再重复 stat"""
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    elif date_time[0] > 2107:
+        date_time = (2107, 12, 31, 23, 59, 59)
+    zinfo = zipfile.ZipInfo(arcname, date_time)
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    return zinfo
+
+
+def deflate_file(path: str, level: int) -> Tuple[bytes, int, int]:
+    """
+    读取并压缩整个文件
+
+    Returns:
+        (原始 deflate 数据, CRC32, 原始大小)
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunks = []
+    crc = size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(_READ_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk))
+    chunks.append(compressor.flush())
+    return b"".join(chunks), crc, size
+
+
+def write_raw(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, data: Union[bytes, Iterable[bytes]]) -> None:
+    """
+    把已压缩的数据作为一个条目写入 zip 包，zinfo 中的 compress_type、CRC、file_size 需已正确设置。
+    data 为分块的可迭代对象时，需预先设置 zinfo.compress_size
+    """
+    if isinstance(data, bytes):
+        zinfo.compress_size = len(data)
+        data = (data,)
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    with zipf._lock:
+        if zipf._seekable:
+            zipf.fp.seek(zipf.start_dir)
+        zinfo.header_offset = zipf.fp.tell()
+        zipf._writecheck(zinfo)
+        zipf._didModify = True
+        zipf.fp.write(zinfo.FileHeader(zip64))
+        for chunk in data:
+            zipf.fp.write(chunk)
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+        zipf.start_dir = zipf.fp.tell()
+
+
+def file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(_READ_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+class BaseArchive:
+    """
+    作为增量压缩基准的旧 zip 包：文件未变化时直接复用其中已压缩的数据，不再重新压缩
+
+    Args:
+        path: 旧 zip 包路径
+        verify_hash: 复用前计算文件的 CRC32 并与旧包中的记录比较，能发现大小和修改时间都没变但内容变了的文件
+    """
+
+    def __init__(self, path: str, verify_hash: bool = False):
+        self.path = path
+        self.verify_hash = verify_hash
+        self._zip = zipfile.ZipFile(path)
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()
+
+    def find(self, zinfo: zipfile.ZipInfo, compress_type: int) -> Optional[zipfile.ZipInfo]:
+        """
+        查找可以复用的旧条目：名称、大小、修改时间（zip 中精确到 2 秒）和压缩方式都相同，且未加密
+        """
+        info = self._zip.NameToInfo.get(zinfo.filename)
+        if (
+            info is None
+            or info.is_dir()
+            or info.flag_bits & 0x1
+            or info.file_size != zinfo.file_size
+            or info.compress_type != compress_type
+            or info.date_time[:5] != zinfo.date_time[:5]
+            or info.date_time[5] // 2 != zinfo.date_time[5] // 2
+        ):
+            return None
+        return info
+
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        with self._lock:
+            self._file.seek(info.header_offset)
+            header = self._file.read(zipfile.sizeFileHeader)
+        if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        return info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+
+    def iter_raw(self, info: zipfile.ZipInfo) -> Iterator[bytes]:
+        """按块读取条目的压缩数据"""
+        offset = self._data_offset(info)
+        remaining = info.compress_size
+        while remaining:
+            with self._lock:
+                self._file.seek(offset)
+                chunk = self._file.read(min(_READ_SIZE, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+            offset += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+
+    def unchanged(self, path: str, info: zipfile.ZipInfo) -> bool:
+        return not self.verify_hash or file_crc32(path) == info.CRC
+
+    def close(self) -> None:
+        self._zip.close()
+        self._file.close()
+
+
+# 工作线程返回的结果：(压缩数据, CRC32, 原始大小, 压缩方式, 是否复用了旧包中的数据)
+_Compressed = Tuple[bytes, int, int, int, bool]
+
+
+class ParallelZipWriter:
+    """
+    按添加顺序写入条目、在线程池中并行压缩的 zip 写入器
+
+    Args:
+        zipf: 以 "w" 模式打开的 ZipFile
+        executor: 执行压缩的线程池
+        compression_level: 0 表示全部只存储；1-9 为 deflate 级别
+        store_compressed_media: 已压缩格式的文件只存储不压缩
+        compress_type: 非并行路径使用的压缩方式，如 zipfile.ZIP_ZSTANDARD（Python 3.14+）；
+            为 None 时使用 deflate，并行预压缩只用于 deflate
+        base: 增量压缩的基准 zip 包，未变化的文件复用其中的压缩数据（保留原来的压缩级别）
+    """
+
+    def __init__(
+        self,
+        zipf: zipfile.ZipFile,
+        executor: Executor,
+        compression_level: int = 6,
+        store_compressed_media: bool = True,
+        compress_type: Optional[int] = None,
+        base: Optional[BaseArchive] = None,
+    ):
+        self.zipf = zipf
+        self.executor = executor
+        self.compression_level = compression_level
+        self.store_compressed_media = store_compressed_media
+        self.compress_type = compress_type
+        self.base = base
+        # (ZipInfo, 源文件路径, 任务, 计入 _pending_bytes 的字节数)。
+        # 任务为 Future 时由工作线程压缩，写入线程写入其结果；为函数时在写入线程中直接写入该条目（流式处理大文件、空目录）
+        self._pending: Deque[Tuple[zipfile.ZipInfo, str, Union[Future, Callable[[zipfile.ZipInfo], None]], int]] = (
+            deque()
+        )
+        self._pending_bytes = 0
+        self.file_count = 0
+        self.reused_count = 0
+        self.original_size = 0
+        self.errors = []
+
+    def _method(self, path: str) -> int:
+        if self.compression_level == 0:
+            return zipfile.ZIP_STORED
+        if self.store_compressed_media and os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return self.compress_type if self.compress_type is not None else zipfile.ZIP_DEFLATED
+
+    def add_file(self, path: str, arcname: str, st: os.stat_result) -> None:
+        """添加文件，st 为遍历时得到的 stat 结果"""
+        zinfo = zip_info(arcname, st)
+        zinfo.compress_type = self._method(path)
+        base_info = self.base.find(zinfo, zinfo.compress_type) if self.base else None
+        small = (base_info.compress_size if base_info else st.st_size) <= PARALLEL_MAX_FILE_SIZE
+
+        if base_info is not None and small and zinfo.compress_type in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):
+            job = self.executor.submit(self._reuse_or_compress, path, base_info)
+        elif base_info is not None:
+            job = functools.partial(self._copy_or_write, path, base_info)
+        elif zinfo.compress_type == zipfile.ZIP_DEFLATED and small:
+            job = self.executor.submit(self._deflate, path)
+        else:
+            job = functools.partial(self._write_file, path)
+        self._pending.append((zinfo, path, job, st.st_size if isinstance(job, Future) else 0))
+        self._pending_bytes += self._pending[-1][3]
+        self._write_ready()
+
+    def _write_ready(self) -> None:
+        # 队首已压缩完成或是在写入线程中处理的任务时立即写入；等待写入的数据超过上限时阻塞等待队首完成
+        while self._pending:
+            head = self._pending[0][2]
+            if isinstance(head, Future) and not head.done() and self._pending_bytes <= MAX_PENDING_BYTES:
+                break
+            self._write_next()
+
+    def _deflate(self, path: str) -> _Compressed:
+        data, crc, size = deflate_file(path, self.compression_level)
+        return data, crc, size, zipfile.ZIP_DEFLATED, False
+
+    def _reuse_or_compress(self, path: str, info: zipfile.ZipInfo) -> _Compressed:
+        if self.base.unchanged(path, info):
+            return b"".join(self.base.iter_raw(info)), info.CRC, info.file_size, info.compress_type, True
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            return self._deflate(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        return data, zlib.crc32(data), len(data), zipfile.ZIP_STORED, False
+
+    def _write_file(self, path: str, zinfo: zipfile.ZipInfo) -> None:
+        self.zipf.write(path, zinfo.filename, compress_type=zinfo.compress_type)
+
+    def _copy_or_write(self, path: str, info: zipfile.ZipInfo, zinfo: zipfile.ZipInfo) -> None:
+        if not self.base.unchanged(path, info):
+            self._write_file(path, zinfo)
+            return
+        zinfo.CRC, zinfo.file_size, zinfo.compress_size = info.CRC, info.file_size, info.compress_size
+        write_raw(self.zipf, zinfo, self.base.iter_raw(info))
+        self.reused_count += 1
+
+    def add_directory(self, arcname: str) -> None:
+        """添加空目录条目，与文件一起按添加顺序写入，不等待正在压缩的文件"""
+        zinfo = zipfile.ZipInfo(arcname.rstrip("/") + "/")
+        self._pending.append((zinfo, arcname, self._write_directory, 0))
+        self._write_ready()
+
+    def _write_directory(self, zinfo: zipfile.ZipInfo) -> None:
+        self.zipf.writestr(zinfo.filename, "")
+
+    def _write_next(self) -> None:
+        zinfo, path, job, reserved = self._pending.popleft()
+        self._pending_bytes -= reserved
+        try:
+            if isinstance(job, Future):
+                data, zinfo.CRC, zinfo.file_size, zinfo.compress_type, reused = job.result()
+                write_raw(self.zipf, zinfo, data)
+                self.reused_count += reused
+            else:
+                job(zinfo)
+        except (OSError, zipfile.BadZipFile) as e:
+            self.errors.append(f"{path}: {e}")
+            return
+        if zinfo.is_dir():
+            return
+        self.original_size += zinfo.file_size
+        self.file_count += 1
+
+    def flush(self) -> None:
+        """写入所有已添加的条目"""
+        while self._pending:
+            self._write_next()
+
+    def cancel(self) -> None:
+        for _, _, job, _ in self._pending:
+            if isinstance(job, Future):
+                job.cancel()
+        self._pending.clear()
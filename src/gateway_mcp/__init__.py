@@ -0,0 +1 @@
+# gateway_mcp package
@@ -0,0 +1,153 @@
+"""
+多服务网关
+
+在一个进程中挂载多个 MCP 服务器，共享线程池、缓存和调用指标，减少进程数量、内存占用和冷启动时间：
+
+- HTTP 传输下每个服务器挂载在各自的路径前缀下，例如 /fs/mcp、/mysql/mcp（SSE 为 /fs/sse）
+- stdio 传输下把所有启用的服务器的工具、资源、提示词合并为一个服务器
+"""
+
+import contextlib
+import importlib
+import logging
+from typing import Dict, Iterable
+
+import click
+from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.types import ASGIApp
+
+from common.mcp_cli import create_http_app, prepare_server, run_http_app, run_mcp_server, with_mcp_options
+
+# 日志输出到 stderr，stdio 传输占用 stdout
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# 可挂载的服务器：名称 -> (模块, 路径前缀)
+SERVERS: Dict[str, tuple] = {
+    "fs": ("fs_mcp.server", "/fs"),
+    "mysql": ("mysql_mcp.server", "/mysql"),
+    "template": ("template_mcp.server", "/template"),
+    "knowledge": ("knowledge_mcp.server", "/knowledge"),
+    "element_plus": ("element_plus_mcp.server", "/element-plus"),
+    "demo": ("demo_mcp.server", "/demo"),
+}
+
+
+def load_servers(names: Iterable[str]) -> Dict[str, FastMCP]:
+    """
+    导入启用的服务器模块
+
+    Args:
+        names: 服务器名称列表
+
+    Returns:
+        服务器名称到 FastMCP 实例的映射
+    """
+    return {name: importlib.import_module(SERVERS[name][0]).mcp for name in names}
+
+
+def create_gateway_app(transport: str, names: tuple) -> ASGIApp:
+    """
+    创建挂载多个服务器的 ASGI 应用
+
+    Args:
+        transport: 传输方式 ("sse", "streamable")
+        names: 启用的服务器名称
+
+    Returns:
+        Starlette 应用
+    """
+    servers = load_servers(names)
+    routes = []
+    endpoints = {}
+    for name, mcp in servers.items():
+        prepare_server(mcp)
+        prefix = SERVERS[name][1]
+        path = mcp.settings.sse_path if transport == "sse" else mcp.settings.streamable_http_path
+        endpoints[name] = prefix + path
+        routes.append(Mount(prefix, app=create_http_app(mcp, transport)))
+
+    async def index(request):
+        return JSONResponse({"transport": transport, "servers": endpoints})
+
+    async def metrics(request):
+        from common.metrics import registry
+
+        return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    # 挂载的子应用不会执行各自的 lifespan，streamable 的会话管理器由网关统一启动
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with contextlib.AsyncExitStack() as stack:
+            if transport == "streamable":
+                for mcp in servers.values():
+                    await stack.enter_async_context(mcp.session_manager.run())
+            yield
+
+    routes = [Route("/", index), Route("/metrics", metrics)] + routes
+    logger.info(f"网关已挂载: {endpoints}")
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def merge_servers(servers: Dict[str, FastMCP]) -> FastMCP:
+    """
+    把多个服务器的工具、资源、提示词合并到一个 FastMCP 实例（stdio 传输使用），重名时保留先注册的
+
+    Args:
+        servers: 服务器名称到 FastMCP 实例的映射
+    """
+    gateway = FastMCP("gateway_mcp_server")
+    for name, mcp in servers.items():
+        registries = (
+            (mcp._tool_manager._tools, gateway._tool_manager._tools),
+            (mcp._resource_manager._resources, gateway._resource_manager._resources),
+            (mcp._resource_manager._templates, gateway._resource_manager._templates),
+            (mcp._prompt_manager._prompts, gateway._prompt_manager._prompts),
+        )
+        for source, target in registries:
+            for key, item in source.items():
+                if key in target:
+                    logger.warning(f"{name} 中的 {key} 与已挂载的服务器重名，已忽略")
+                    continue
+                target[key] = item
+    return gateway
+
+
+def _server_option(name: str):
+    flag = name.replace("_", "-")
+    return click.option(
+        f"--{flag}/--no-{flag}", name, default=None, help=f"Mount {SERVERS[name][0]} under {SERVERS[name][1]}"
+    )
+
+
+def _with_server_options(f):
+    for name in reversed(list(SERVERS)):
+        f = _server_option(name)(f)
+    return f
+
+
+@with_mcp_options(3000)
+@_with_server_options
+def main(transport: str, port: int, **enabled):
+    """
+    启动网关。通过 --fs、--mysql 等选项选择要挂载的服务器，
+    只指定 --no-xxx 时表示挂载除这些以外的全部服务器，都不指定时挂载全部服务器。
+    """
+    if any(enabled.values()):
+        names = tuple(name for name in SERVERS if enabled.get(name))
+    else:
+        names = tuple(name for name in SERVERS if enabled.get(name) is not False)
+    if not names:
+        raise click.UsageError("至少需要启用一个服务器")
+
+    if transport == "stdio":
+        run_mcp_server(merge_servers(load_servers(names)), transport)
+    else:
+        run_http_app(create_gateway_app, transport, "0.0.0.0", port, names)
+
+
+if __name__ == "__main__":
+    main()
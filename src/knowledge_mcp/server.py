@@ -7,13 +7,16 @@ import os
 import sys
 from typing import List, Dict, Optional, Any
 
-import psycopg
-import requests
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field
 
+from common.lazy import lazy_import
 from common.mcp_cli import with_mcp_options, run_mcp_server
 
+# psycopg 与 requests 导入较慢，第一次检索时再加载
+psycopg = lazy_import("psycopg")
+requests = lazy_import("requests")
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
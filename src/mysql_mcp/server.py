@@ -2,21 +2,25 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Optional, Union
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 from mcp.types import TextContent
-from mysql.connector import connect, Error
 from pydantic import Field
 
 from common.mcp_cli import with_mcp_options, run_mcp_server
 from common.cache import Cache
-from mysql_mcp.gen.gen import select_table_by_name,select_table_columns_by_name
+from common.lazy import lazy_import
+from common.tool_cache import cached_tool
 from mysql_mcp.gen.types import GenTable, VelocityContext
-from mysql_mcp.gen.utils import init_column_field, set_pk_column, prepare_context
 from mysql_mcp.types import MysqlDatabaseConfig
 
+# 数据库驱动和代码生成模块在第一次访问数据库时才导入，加快服务器启动
+mysql_connector = lazy_import("mysql.connector")
+gen = lazy_import("mysql_mcp.gen.gen")
+gen_utils = lazy_import("mysql_mcp.gen.utils")
+
 # 从 .env 文件读取环境变量
 # 如果 MYSQL_HOST 环境变量未配置，则尝试从 .env 文件加载
 if not os.getenv("MYSQL_HOST"):
@@ -30,7 +34,8 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(level
 logger = logging.getLogger("mysql_mcp_server")
 
 # 创建全局缓存实例
-cache = Cache()
+# 过期后 10 分钟内先返回旧的表结构并在后台刷新，热点表在过期前 30 秒提前刷新
+cache = Cache(name="mysql_mcp", persistent=True, stale_ttl=600, refresh_ahead=0.1)
 
 # 读取数据库配置
 def get_db_config() -> MysqlDatabaseConfig:
@@ -52,6 +57,14 @@ def get_db_config() -> MysqlDatabaseConfig:
     return config
 
 
+def connection_identity(config: MysqlDatabaseConfig) -> str:
+    """
+    缓存键中区分数据库的部分。缓存会持久化，重启后可能连接到另一台服务器上的同名数据库，
+    因此包含服务器地址、端口和用户名，而不只是数据库名
+    """
+    return f"{config['user']}@{config['host']}:{config['port']}/{config['database']}"
+
+
 # 初始化mcp服务
 mcp = FastMCP("mysql_mcp_server")
 
@@ -71,7 +84,7 @@ def read_resource(table_name: Annotated[str, Field(description="Name of the tabl
     table = parts[0]
 
     try:
-        with connect(**config) as conn:
+        with mysql_connector.connect(**config) as conn:
             with conn.cursor() as cursor:
                 cursor.execute(f"SELECT * FROM {table} LIMIT 100")
                 columns = [desc[0] for desc in cursor.description]
@@ -79,7 +92,7 @@ def read_resource(table_name: Annotated[str, Field(description="Name of the tabl
                 result = [",".join(map(str, row)) for row in rows]
                 return "\n".join([",".join(columns)] + result)
 
-    except Error as e:
+    except mysql_connector.Error as e:
         logger.error(f"Database error reading resource {table_name}: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
 
@@ -92,7 +105,7 @@ def read_query(query: Annotated[str, Field(description="SELECT SQL query to exec
     if not query.upper().startswith("SELECT"):
         raise ValueError("read_query 只允许 SELECT 查询")
     try:
-        with connect(**config) as conn:
+        with mysql_connector.connect(**config) as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query)
                 columns = [desc[0] for desc in cursor.description]
@@ -100,7 +113,7 @@ def read_query(query: Annotated[str, Field(description="SELECT SQL query to exec
                 result = [",".join(columns)]
                 result.extend([",".join(map(str, row)) for row in rows])
                 return [TextContent(type="text", text="\n".join(result))]
-    except Error as e:
+    except mysql_connector.Error as e:
         logger.error(f"数据库错误: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
     except Exception as e:
@@ -113,15 +126,18 @@ def describe_table(table_name: Annotated[str, Field(description="Name of the tab
     """Get the schema information for a specific table"""
     config = get_db_config()
     logger.info(f"获取表 {table_name} 的结构")
-    cache_key = f"table_structure_{config['database']}_{table_name}"
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        logger.info(f"从缓存获取表 {table_name} 的结构")
-        return [TextContent(type="text", text=cached_result)]
-    try:
-        with connect(**config) as conn:
+    cache_key = f"table_structure_{connection_identity(config)}_{table_name}"
+
+    def load_table_structure() -> Optional[str]:
+        with mysql_connector.connect(**config) as conn:
             with conn.cursor(dictionary=True) as cursor:
-                cursor.execute(f"SHOW FULL COLUMNS FROM {table_name}")
+                try:
+                    cursor.execute(f"SHOW FULL COLUMNS FROM {table_name}")
+                except mysql_connector.Error as e:
+                    if e.errno == mysql_connector.errorcode.ER_NO_SUCH_TABLE:
+                        # 表不存在作为负结果缓存，避免反复查询数据库
+                        return None
+                    raise
                 columns = cursor.fetchall()
                 # 格式化表结构信息
                 result = [f"Table {table_name} structure:"]
@@ -140,12 +156,15 @@ def describe_table(table_name: Annotated[str, Field(description="Name of the tab
                         str(col[8]) if col[8] is not None else "",  # Comment
                     ]
                     result.append(" | ".join(field_info))
+                return "\n".join(result)
 
-                result_text = "\n".join(result)
-                # 存入缓存
-                cache.set(cache_key, result_text)
-                return [TextContent(type="text", text=result_text)]
-    except Error as e:
+    try:
+        # 并发请求同一张表时只会有一个请求真正查询数据库
+        result_text = cache.get_or_compute(cache_key, load_table_structure, negative=lambda text: text is None)
+        if result_text is None:
+            raise ValueError(f"表 {table_name} 不存在")
+        return [TextContent(type="text", text=result_text)]
+    except mysql_connector.Error as e:
         logger.error(f"数据库错误: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
     except Exception as e:
@@ -153,18 +172,21 @@ def describe_table(table_name: Annotated[str, Field(description="Name of the tab
         raise RuntimeError(f"Execution error: {str(e)}")
 
 
+# 按服务器和数据库区分结果；空库按负结果缓存，新建表后能尽快可见
 @mcp.tool()
+@cached_tool(
+    key=lambda: connection_identity(get_db_config()),
+    cache=cache,
+    negative=lambda r: "\n" not in r[0].text,
+    tags=["schema"],
+)
 def list_tables() -> list[TextContent]:
     """List all tables in the SQLite database"""
     config = get_db_config()
     logger.info("获取数据库中的所有表")
-    cache_key = f"tables_{config['database']}"
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        logger.info("从缓存获取表列表")
-        return [TextContent(type="text", text=cached_result)]
+
     try:
-        with connect(**config) as conn:
+        with mysql_connector.connect(**config) as conn:
             with conn.cursor() as cursor:
                 # 获取表名和注释信息
                 cursor.execute(
@@ -178,15 +200,11 @@ def list_tables() -> list[TextContent]:
                     (config["database"],),
                 )
                 tables = cursor.fetchall()
-                result = [f"Tables in {config['database']}:"]
-                # 使用冒号分隔表名和注释
-                result.extend([f"{table[0]}: {table[1] if table[1] else '无注释'}" for table in tables])
-                result_text = "\n".join(result)
-
-                # 存入缓存
-                cache.set(cache_key, result_text)
-                return [TextContent(type="text", text=result_text)]
-    except Error as e:
+        result = [f"Tables in {config['database']}:"]
+        # 使用冒号分隔表名和注释
+        result.extend([f"{table[0]}: {table[1] if table[1] else '无注释'}" for table in tables])
+        return [TextContent(type="text", text="\n".join(result))]
+    except mysql_connector.Error as e:
         logger.error(f"数据库错误: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
     except Exception as e:
@@ -199,28 +217,34 @@ def prepare_template_context(
     table_name: Annotated[str, Field(description="Name of the table to prepare template context")],
 ) -> VelocityContext:
     """Prepare template context for a specific table"""
-    if cache.get(table_name):
-        logger.info(f"从缓存获取表 {table_name} 的模板上下文")
-        return cache.get(table_name)
     config = get_db_config()
-    try:
-        with connect(**config) as conn:
+    cache_key = f"template_context_{connection_identity(config)}_{table_name}"
+
+    def load_template_context() -> Union[VelocityContext, str]:
+        """返回模板上下文；表或字段不存在时返回错误信息（作为负结果缓存）"""
+        with mysql_connector.connect(**config) as conn:
             with conn.cursor() as cursor:
                 # 获取表信息
-                gen_table:GenTable = select_table_by_name(cursor, table_name)
+                gen_table:GenTable = gen.select_table_by_name(cursor, table_name)
                 if not gen_table:
-                    raise ValueError(f"表 {table_name} 不存在")
+                    return f"表 {table_name} 不存在"
                 # 获取字段信息
-                columns = select_table_columns_by_name(cursor, table_name)
+                columns = gen.select_table_columns_by_name(cursor, table_name)
                 if not columns:
-                    raise ValueError(f"表 {table_name} 不存在字段")
+                    return f"表 {table_name} 不存在字段"
                 # 初始化字段内容
-                [init_column_field(column,gen_table) for column in columns]
-                set_pk_column(columns, gen_table)
-                template_context = prepare_context(gen_table)
-                cache.set(table_name, template_context)
-                return template_context
-    except Error as e:
+                [gen_utils.init_column_field(column,gen_table) for column in columns]
+                gen_utils.set_pk_column(columns, gen_table)
+                return gen_utils.prepare_context(gen_table)
+
+    try:
+        template_context = cache.get_or_compute(
+            cache_key, load_template_context, negative=lambda result: isinstance(result, str)
+        )
+        if isinstance(template_context, str):
+            raise ValueError(template_context)
+        return template_context
+    except mysql_connector.Error as e:
         logger.error(f"数据库错误: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
     except Exception as e:
@@ -11,11 +11,8 @@ from mcp.server.fastmcp import FastMCP,Context
 from mcp.types import TextContent, Prompt, PromptMessage
 from pydantic import Field
 
-from common.cache import Cache
 from common.mcp_cli import with_mcp_options, run_mcp_server
-
-# 创建全局缓存实例
-cache = Cache()
+from common.tool_cache import cached_tool
 
 # 配置日志
 logging.basicConfig(
@@ -187,6 +184,8 @@ def list_templates() -> Prompt:
 
 
 @mcp.tool()
+# 模板文件随代码发布，内容在进程内不变；读取失败的结果按负结果短期缓存
+@cached_tool(ttl=600, key=["template_name"], tags=["templates"], negative=lambda r: r[0].text.startswith("错误"))
 def get_template_content(
     template_name: Annotated[str,Field(..., description="模板文件名称，支持的模板名称请参考 list_templates prompt")],
     ctx: Context
@@ -199,11 +198,11 @@ def get_template_content(
     Returns:
         List[TextContent]: 包含模板文件内容的文本内容列表
     """
-    headers = ctx.request_context.request.headers
-    logger.info(f"获取到header中的随机字符：{headers.get("x-random")}")
-    
-    if cache.get(template_name):
-        return [TextContent(type="text", text=cache.get(template_name))]
+    # stdio 传输没有 HTTP 请求对象
+    request = ctx.request_context.request
+    if request is not None:
+        logger.info(f"获取到header中的随机字符：{request.headers.get("x-random")}")
+
     try:
         # 验证模板名称
         if not validate_template_name(template_name):
@@ -230,7 +229,6 @@ def get_template_content(
         result += "\n```"
 
         logger.info(f"成功获取模板内容: {template_name}")
-        cache.set(template_name, result)
         return [TextContent(type="text", text=result)]
 
     except FileNotFoundError as e:
@@ -317,6 +315,7 @@ def get_sample_content(
 
 
 @mcp.tool()
+@cached_tool(ttl=600, tags=["templates"])
 def list_template_categories() -> List[TextContent]:
     """列出所有模板类别及其包含的模板
 
@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from common.cache import Cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = Cache(max_entries=2, persistent=False)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_rejects_oversized_values():
+    cache = Cache(max_bytes=10_000, persistent=False)
+    cache.set("small", "x" * 100)
+    cache.set("huge", "x" * 20_000)
+    assert "huge" not in cache
+    assert cache.get("small") == "x" * 100
+    assert cache.size_bytes <= 10_000
+
+
+def test_ttl_expiry_and_per_key_override():
+    cache = Cache(ttl=60, persistent=False)
+    cache.set("short", 1, ttl=0.05)
+    cache.set("long", 2)
+    time.sleep(0.1)
+    assert cache.lookup("short") == (False, None)
+    assert cache.lookup("long") == (True, 2)
+
+
+def test_sweep_removes_expired_entries():
+    cache = Cache(ttl=0.05, persistent=False)
+    for i in range(5):
+        cache.set(str(i), i)
+    time.sleep(0.1)
+    assert cache.sweep() == 5
+    assert len(cache) == 0
+    assert cache.size_bytes == 0
+
+
+def test_lookup_distinguishes_cached_falsy_values():
+    cache = Cache(persistent=False)
+    cache.set("none", None)
+    assert cache.lookup("none") == (True, None)
+    assert cache.lookup("missing") == (False, None)
+
+
+def test_get_or_compute_runs_once_for_concurrent_misses():
+    cache = Cache(persistent=False)
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+
+
+def test_get_or_compute_shares_errors_and_does_not_cache_them():
+    cache = Cache(persistent=False)
+
+    def fail():
+        raise ValueError("boom")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: 1) == 1
+
+
+def test_persistent_cache_requires_unique_name(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.cache._persist_dir", str(tmp_path))
+    with pytest.raises(ValueError):
+        Cache(persistent=True)
+    first = Cache(name="test_persistent_unique", persistent=True)
+    with pytest.raises(ValueError):
+        Cache(name="test_persistent_unique", persistent=True)
+    assert first.store.path == str(tmp_path / "test_persistent_unique.sqlite3")
+
+
+def test_persistent_entries_survive_a_new_instance(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.cache._persist_dir", str(tmp_path))
+    first = Cache(name="test_persistent_reload", persistent=True)
+    first.set("k", {"v": 1})
+    first.store.close()
+    del first
+
+    second = Cache(name="test_persistent_reload", persistent=True)
+    assert second.lookup("k") == (True, {"v": 1})
+    assert second.stats()["disk_hits"] == 1
+    # 匿名缓存默认不持久化
+    assert Cache().store is None
+
+
+def test_stale_value_is_served_while_refreshing():
+    cache = Cache(ttl=0.05, stale_ttl=60, persistent=False)
+    cache.get_or_compute("k", lambda: "old")
+    time.sleep(0.1)
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_compute("k", refresh) == "old"
+    assert refreshed.wait(1)
+    for _ in range(50):
+        if cache.get("k") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("k") == "new"
+
+
+def test_negative_results_expire_after_negative_ttl_despite_stale_ttl():
+    cache = Cache(ttl=60, stale_ttl=600, negative_ttl=0.05, persistent=False)
+    is_missing = lambda value: value is None  # noqa: E731
+    assert cache.get_or_compute("table", lambda: None, negative=is_missing) is None
+    assert cache.get_or_compute("table", lambda: "created", negative=is_missing) is None
+    time.sleep(0.1)
+    # 负结果过期后不再作为旧值返回，而是立即重新计算
+    assert cache.get_or_compute("table", lambda: "created", negative=is_missing) == "created"
+    assert cache.stats()["stale_hits"] == 0
+
+
+def test_negative_results_are_not_persisted(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.cache._persist_dir", str(tmp_path))
+    cache = Cache(name="test_negative_not_persisted", persistent=True)
+    cache.set("k", "positive")
+    cache.set("k", None, negative=True)
+    assert cache.store.get("k") is None
+    assert cache.lookup("k") == (True, None)
+
+
+def test_store_errors_fall_back_to_memory(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr("common.cache._persist_dir", str(tmp_path))
+    cache = Cache(name="test_store_errors", persistent=True)
+    cache.set("before", 1)
+    # 另一个进程持有写锁（多个工作进程共用 --cache-dir 时）
+    other = sqlite3.connect(cache.store.path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.set("k", "v")
+        assert cache.lookup("k") == (True, "v")
+        cache.delete("before")
+        assert cache.lookup("before") == (False, None)
+        assert cache.sweep() == 0
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert "持久化缓存操作失败" in caplog.text
+    # 删除失败的键不会从磁盘上的旧值恢复，锁释放后补做删除
+    assert cache.lookup("before") == (False, None)
+    assert cache.store.get("before") is None
+
+
+def test_unavailable_store_directory_keeps_cache_in_memory(tmp_path, monkeypatch):
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.setattr("common.cache._persist_dir", str(blocker))
+    cache = Cache(name="test_store_unavailable", persistent=True)
+    assert cache.store is None
+    cache.set("k", 1)
+    assert cache.get("k") == 1
@@ -0,0 +1,111 @@
+import json
+import zlib
+
+import anyio
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from common.compression import CompressionMiddleware, available_encodings, negotiate_encoding
+
+
+def make_client(chunk_size=64 * 1024):
+    payload = {"items": [f"item {i}" for i in range(2000)]}
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def large(request):
+        return JSONResponse(payload)
+
+    async def image(request):
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    app = Starlette(routes=[Route("/small", small), Route("/large", large), Route("/image", image)])
+    return TestClient(CompressionMiddleware(app, chunk_size=chunk_size)), payload
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+        ("*", "zstd"),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    if expected not in (None, "gzip") and expected not in available_encodings():
+        pytest.skip(f"{expected} is not installed")
+    assert negotiate_encoding(header) == expected
+
+
+def decode(encoding, data):
+    if encoding == "gzip":
+        return zlib.decompress(data, 31)
+    if encoding == "br":
+        import brotli
+
+        return brotli.decompress(data)
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_large_json_is_compressed(encoding):
+    if encoding not in available_encodings():
+        pytest.skip(f"{encoding} is not installed")
+    client, payload = make_client()
+    with client.stream("GET", "/large", headers={"accept-encoding": encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == encoding
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) == len(raw) < len(json.dumps(payload))
+    assert json.loads(decode(encoding, raw)) == payload
+
+
+def test_small_and_binary_responses_are_not_compressed():
+    client, _ = make_client()
+    for path in ("/small", "/image"):
+        response = client.get(path, headers={"accept-encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+def test_large_body_is_sent_in_chunks():
+    client, payload = make_client(chunk_size=1024)
+    response = client.get("/large", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.json() == payload
+
+
+def test_streaming_events_are_flushed_individually():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": f"data: event {i}\n\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    anyio.run(CompressionMiddleware(app), scope, receive, send)
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    decoder = zlib.decompressobj(31)
+    # 每个事件发送后即可完整解码，不会被压缩器缓冲
+    for i, message in enumerate(sent[1:4]):
+        assert decoder.decompress(message["body"]) == f"data: event {i}\n\n".encode()
+    assert sent[-1]["more_body"] is False
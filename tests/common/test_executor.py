@@ -0,0 +1,31 @@
+import threading
+
+import anyio
+from mcp.server.fastmcp import FastMCP
+
+from common.executor import install_executor, not_thread_safe
+
+
+def test_install_executor_skips_tools_marked_not_thread_safe():
+    mcp = FastMCP("test")
+
+    @mcp.tool()
+    def pooled() -> str:
+        return threading.current_thread().name
+
+    @mcp.tool()
+    @not_thread_safe
+    def inline() -> str:
+        return threading.current_thread().name
+
+    install_executor(mcp)
+    tools = {tool.name: tool for tool in mcp._tool_manager.list_tools()}
+    assert tools["pooled"].is_async
+    assert not tools["inline"].is_async
+
+    async def call(name):
+        result = await mcp.call_tool(name, {})
+        return result[0][0].text
+
+    assert anyio.run(call, "pooled").startswith("mcp-tool")
+    assert anyio.run(call, "inline") == threading.current_thread().name
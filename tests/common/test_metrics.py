@@ -0,0 +1,68 @@
+import anyio
+import pytest
+from mcp.server.fastmcp import FastMCP
+from starlette.testclient import TestClient
+
+from common.cache import Cache
+from common.metrics import Histogram, install_metrics, merge_prometheus, registry
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(1.0) == 0.4
+    assert Histogram().quantile(0.5) is None
+
+
+def test_metrics_endpoint_reports_calls_and_caches():
+    registry.reset()
+    cache = Cache(name="test_metrics_cache")
+    cache.set("k", 1)
+    cache.get("k")
+    mcp = FastMCP("metrics_test")
+
+    @mcp.tool()
+    def echo(text: str) -> str:
+        return text
+
+    @mcp.tool()
+    def fail() -> str:
+        raise ValueError("boom")
+
+    install_metrics(mcp)
+
+    async def call():
+        await mcp.call_tool("echo", {"text": "hello"})
+        try:
+            await mcp.call_tool("fail", {})
+        except Exception:
+            pass
+
+    anyio.run(call)
+    response = TestClient(mcp.streamable_http_app()).get("/metrics")
+    assert response.status_code == 200
+    text = response.text
+    assert 'mcp_calls_total{server="metrics_test",kind="tool",name="echo"} 1' in text
+    assert 'mcp_errors_total{server="metrics_test",kind="tool",name="fail"} 1' in text
+    assert 'mcp_cache_hits_total{cache="test_metrics_cache"} 1' in text
+    assert "mcp_executor_running " in text
+
+    snapshot = {item["name"]: item for item in registry.snapshot()}
+    assert snapshot["echo"]["calls"] == 1
+    assert snapshot["echo"]["bytes_out"] > 0
+
+
+def test_merge_prometheus_labels_workers_and_groups_families():
+    first = '# HELP a A\n# TYPE a counter\na 1\n# TYPE b gauge\nb{x="1"} 2\n'
+    second = "# HELP a A\n# TYPE a counter\na 3\n"
+    merged = merge_prometheus([first, second])
+    assert merged.splitlines() == [
+        "# HELP a A",
+        "# TYPE a counter",
+        'a{worker="0"} 1',
+        'a{worker="1"} 3',
+        "# TYPE b gauge",
+        'b{worker="0",x="1"} 2',
+    ]
@@ -0,0 +1,108 @@
+import json
+
+import anyio
+
+from common.ratelimit import RATE_LIMITED_ERROR_CODE, RateLimitMiddleware, TokenBucket
+
+
+def make_scope(ip="10.0.0.1", session=None, method="POST", path="/mcp", accept="application/json"):
+    headers = [(b"accept", accept.encode())]
+    if session:
+        headers.append((b"mcp-session-id", session.encode()))
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": headers,
+        "client": (ip, 1234),
+    }
+
+
+async def call(middleware, scope, body=b'{"jsonrpc": "2.0", "id": 7, "method": "ping"}'):
+    """发送一次请求，返回 (状态码, 响应头, 响应体)"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_token_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=1, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert 0 < bucket.acquire() <= 1
+
+
+def test_ip_rate_limit_returns_jsonrpc_error_with_retry_after():
+    middleware = RateLimitMiddleware(ok_app, ip_rate=1)
+
+    async def run():
+        return [await call(middleware, make_scope()) for _ in range(3)]
+
+    results = anyio.run(run)
+    assert [status for status, _, _ in results] == [200, 200, 429]
+    _, headers, body = results[2]
+    assert headers[b"retry-after"] == b"1"
+    error = json.loads(body)
+    assert error["id"] == 7
+    assert error["error"]["code"] == RATE_LIMITED_ERROR_CODE
+    # 其他 IP 和豁免路径不受影响
+    assert anyio.run(call, middleware, make_scope(ip="10.0.0.2"))[0] == 200
+    assert anyio.run(call, middleware, make_scope(path="/metrics"))[0] == 200
+
+
+def test_session_rate_limit_is_per_session():
+    middleware = RateLimitMiddleware(ok_app, session_rate=0.5)
+
+    async def run():
+        return [
+            (await call(middleware, make_scope(session="a")))[0],
+            (await call(middleware, make_scope(session="a")))[0],
+            (await call(middleware, make_scope(session="b")))[0],
+        ]
+
+    assert anyio.run(run) == [200, 429, 200]
+
+
+def test_concurrency_limit_rejects_without_queueing():
+    events = {}
+
+    async def slow_app(scope, receive, send):
+        if scope["method"] == "POST":
+            events["started"].set()
+            await events["release"].wait()
+        await ok_app(scope, receive, send)
+
+    middleware = RateLimitMiddleware(slow_app, ip_max_concurrent=1)
+    statuses = []
+
+    async def run():
+        events.update(started=anyio.Event(), release=anyio.Event())
+
+        async def first():
+            statuses.append((await call(middleware, make_scope()))[0])
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(first)
+            await events["started"].wait()
+            statuses.append((await call(middleware, make_scope()))[0])
+            # SSE 长连接不计入并发数
+            sse = make_scope(method="GET", accept="text/event-stream")
+            statuses.append((await call(middleware, sse))[0])
+            events["release"].set()
+        statuses.append((await call(middleware, make_scope()))[0])
+
+    anyio.run(run)
+    assert statuses == [429, 200, 200, 200]
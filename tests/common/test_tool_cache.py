@@ -0,0 +1,118 @@
+from typing import Optional
+
+from mcp.server.fastmcp import Context
+
+from common.cache import Cache, SqliteCacheStore
+from common.tool_cache import cached_tool
+
+
+def test_equivalent_calls_share_one_cache_entry():
+    calls = []
+
+    @cached_tool(cache=Cache(persistent=False))
+    def tool(name: str, limit: int = 10, ctx: Context = None):
+        calls.append((name, limit))
+        return [name, limit]
+
+    assert tool("a") == ["a", 10]
+    assert tool("a", 10) == ["a", 10]
+    assert tool(name="a", limit=10, ctx=object()) == ["a", 10]
+    assert tool("a", 5) == ["a", 5]
+    assert calls == [("a", 10), ("a", 5)]
+
+
+def test_cached_results_are_copies():
+    @cached_tool(cache=Cache(persistent=False))
+    def tool():
+        return {"items": [1]}
+
+    tool()["items"].append(2)
+    assert tool() == {"items": [1]}
+
+
+def test_key_function_receives_context_to_separate_credentials():
+    calls = []
+
+    def by_token(ctx: Optional[object] = None, **arguments):
+        return {**arguments, "token": getattr(ctx, "token", None)}
+
+    @cached_tool(cache=Cache(persistent=False), key=by_token)
+    def tool(path: str, ctx: Context):
+        calls.append((path, ctx.token))
+        return f"{path} as {ctx.token}"
+
+    class Ctx:
+        def __init__(self, token):
+            self.token = token
+
+    assert tool("repo", Ctx("a")) == "repo as a"
+    assert tool("repo", Ctx("b")) == "repo as b"
+    assert tool("repo", Ctx("a")) == "repo as a"
+    assert calls == [("repo", "a"), ("repo", "b")]
+
+    tool.invalidate("repo", ctx=Ctx("a"))
+    tool("repo", Ctx("a"))
+    assert calls == [("repo", "a"), ("repo", "b"), ("repo", "a")]
+
+
+def test_negative_results_use_negative_ttl():
+    cache = Cache(ttl=60, negative_ttl=0, persistent=False)
+    calls = []
+
+    @cached_tool(cache=cache, negative=lambda result: result is None)
+    def tool(name: str):
+        calls.append(name)
+        return None if name == "missing" else name
+
+    tool("missing")
+    tool("missing")
+    tool("found")
+    tool("found")
+    assert calls == ["missing", "missing", "found"]
+
+
+def test_invalidate_all_survives_restart(tmp_path):
+    path = str(tmp_path / "tool_results.sqlite3")
+    calls = []
+
+    def make_tool():
+        @cached_tool(cache=Cache(store=SqliteCacheStore(path)))
+        def tool(name: str):
+            calls.append(name)
+            return f"{name} #{len(calls)}"
+
+        return tool
+
+    tool = make_tool()
+    assert tool("a") == "a #1"
+    assert make_tool()("a") == "a #1"
+    tool.invalidate_all()
+
+    # 重启后代数从 0 开始，失效前的条目已从磁盘上清除
+    assert make_tool()("a") == "a #2"
+    assert calls == ["a", "a"]
+
+
+def test_keys_are_prefixed_with_server_name():
+    cache = Cache(persistent=False)
+
+    @cached_tool(cache=cache, namespace="first")
+    def tool():
+        return "first"
+
+    first = tool
+
+    @cached_tool(cache=cache, namespace="second")
+    def tool():
+        return "second"
+
+    assert (first(), tool()) == ("first", "second")
+    first.invalidate_all()
+    assert len(cache) == 1
+
+    @cached_tool(cache=cache)
+    def default():
+        return None
+
+    default()
+    assert "tool:test_tool_cache:default:0:{}" in cache
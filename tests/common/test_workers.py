@@ -0,0 +1,50 @@
+import anyio
+import httpx
+
+from common.workers import SessionAffinityProxy
+
+
+def _forwarded_accept_encoding(method, headers):
+    """经代理转发一次请求，返回工作进程收到的 Accept-Encoding"""
+    seen = []
+
+    def upstream(request):
+        seen.append(request.headers.get("accept-encoding"))
+        return httpx.Response(200, headers={"content-type": "application/json"}, stream=httpx.ByteStream(b"{}"))
+
+    proxy = SessionAffinityProxy(["http://worker"])
+    proxy._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/mcp",
+        "raw_path": b"/mcp",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+    }
+    messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await anyio.sleep_forever()
+
+    async def send(message):
+        pass
+
+    anyio.run(proxy, scope, receive, send)
+    return seen[0]
+
+
+def test_proxy_forwards_identity_when_client_sends_no_accept_encoding():
+    assert _forwarded_accept_encoding("POST", [(b"mcp-session-id", b"abc")]) == "identity"
+
+
+def test_proxy_forwards_client_accept_encoding():
+    headers = [(b"mcp-session-id", b"abc"), (b"accept-encoding", b"gzip")]
+    assert _forwarded_accept_encoding("POST", headers) == "gzip"
+
+
+def test_proxy_requests_plain_text_for_new_sse_streams():
+    assert _forwarded_accept_encoding("GET", [(b"accept-encoding", b"gzip")]) == "identity"
@@ -0,0 +1,56 @@
+from element_plus_mcp import github
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class _Requests:
+    """记录请求使用的 Authorization 头，按令牌返回不同的响应"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, headers, timeout):
+        authorization = headers.get("Authorization")
+        self.calls.append(authorization)
+        return _Response({"url": url, "authorization": authorization})
+
+
+def test_responses_are_cached_per_token(monkeypatch):
+    fake = _Requests()
+    monkeypatch.setattr(github, "requests", fake)
+    monkeypatch.delenv("GITHUB_API_KEY", raising=False)
+    github.cache.clear()
+    url = "https://api.github.com/repos/owner/private/contents/?ref=main"
+
+    assert github.make_github_request(url, "token-a")["authorization"] == "token token-a"
+    assert github.make_github_request(url, "token-b")["authorization"] == "token token-b"
+    assert github.make_github_request(url)["authorization"] is None
+    assert github.make_github_request(url, "token-a")["authorization"] == "token token-a"
+    assert fake.calls == ["token token-a", "token token-b", None]
+
+
+def test_token_fingerprint_does_not_contain_the_token(monkeypatch):
+    monkeypatch.setenv("GITHUB_API_KEY", "env-token")
+    assert github.token_fingerprint() == github.token_fingerprint("env-token")
+    assert github.token_fingerprint("other") != github.token_fingerprint()
+    assert "env-token" not in github.token_fingerprint()
+
+
+def test_directory_contents_uses_the_requested_repository(monkeypatch):
+    fake = _Requests()
+    monkeypatch.setattr(github, "requests", fake)
+    github.cache.clear()
+
+    (item,) = github.get_directory_contents("src", "main", owner="someone", repo="project")
+    assert item["url"] == "https://api.github.com/repos/someone/project/contents/src?ref=main"
+    (item,) = github.get_directory_contents("src")
+    assert item["url"] == "https://api.github.com/repos/element-plus/element-plus/contents/src?ref=dev"
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from element_plus_mcp import server
+
+
+def _context(token):
+    request = SimpleNamespace(headers={"X-GITHUB-API-KEY": token})
+    return SimpleNamespace(request_context=SimpleNamespace(request=request))
+
+
+def test_tool_cache_key_depends_on_the_request_token(monkeypatch):
+    monkeypatch.delenv("GITHUB_API_KEY", raising=False)
+    key_a = server.github_cache_key(_context("token-a"), path="packages")
+    key_b = server.github_cache_key(_context("token-b"), path="packages")
+    assert key_a != key_b
+    assert key_a == server.github_cache_key(_context("token-a"), path="packages")
+    assert "token-a" not in str(key_a)
+
+
+def test_stdio_context_falls_back_to_the_environment_token(monkeypatch):
+    monkeypatch.setenv("GITHUB_API_KEY", "env-token")
+    stdio = SimpleNamespace(request_context=SimpleNamespace(request=None))
+    assert server.get_api_key_from_context(stdio) == "env-token"
+    assert server.github_cache_key(stdio) == server.github_cache_key(None)
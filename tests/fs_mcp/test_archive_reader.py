@@ -0,0 +1,150 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from fs_mcp import archive_reader
+from fs_mcp.archive_reader import ArchiveError
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def make_tar(path, members, symlinks=()):
+    with tarfile.open(path, "w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        for name, target in symlinks:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tf.addfile(info)
+    return str(path)
+
+
+def extract(archive, output_dir, **kwargs):
+    return archive_reader.extract(archive, str(output_dir), lambda path: path, **kwargs)
+
+
+def listing(directory):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory) for root, _, files in os.walk(directory) for name in files
+    )
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("a/b.txt", "a/b.txt"),
+        ("./a/./b.txt", "a/b.txt"),
+        ("../evil.txt", None),
+        ("a/../../evil.txt", None),
+        ("/etc/passwd", None),
+        ("C:/evil.txt", None),
+        ("..\\evil.txt", None),
+        (".", None),
+    ],
+)
+def test_safe_member_path(tmp_path, name, expected):
+    target = archive_reader.safe_member_path(str(tmp_path), name)
+    assert target == (os.path.join(str(tmp_path), *expected.split("/")) if expected else None)
+
+
+def test_extract_skips_unsafe_paths_and_links(tmp_path):
+    out = tmp_path / "out"
+    zip_path = make_zip(tmp_path / "a.zip", {"ok/a.txt": b"a", "../evil.txt": b"x", "/abs.txt": b"x"})
+    result = extract(zip_path, out)
+    assert listing(out) == ["ok/a.txt"]
+    assert sorted(result.skipped) == ["../evil.txt (unsafe path)", "/abs.txt (unsafe path)"]
+    assert not (tmp_path / "evil.txt").exists()
+
+    tar_path = make_tar(tmp_path / "a.tar.gz", {"./b.txt": b"b"}, symlinks=[("link", "/etc/passwd")])
+    result = extract(tar_path, tmp_path / "tar_out")
+    assert listing(tmp_path / "tar_out") == ["b.txt"]
+    assert result.skipped == ["link (symlink)"]
+
+
+def test_existing_files_are_skipped_without_overwrite(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "a.txt").write_text("original")
+    result = extract(make_zip(tmp_path / "a.zip", {"a.txt": b"new", "b.txt": b"b"}), out)
+    assert (out / "a.txt").read_text() == "original"
+    assert result.skipped == ["a.txt (exists)"]
+    assert result.files == [str(out / "b.txt")]
+
+
+def test_compression_ratio_limit_aborts_and_removes_created_files(tmp_path):
+    out = tmp_path / "out"
+    bomb = make_zip(tmp_path / "bomb.zip", {"first.txt": b"small", "zeros.bin": bytes(40 * 1024 * 1024)})
+    assert os.path.getsize(bomb) < 1024 * 1024
+    with pytest.raises(ArchiveError, match="compression ratio"):
+        extract(bomb, out)
+    assert listing(out) == []
+
+
+def test_total_size_limit_aborts_and_removes_created_files(tmp_path):
+    out = tmp_path / "out"
+    archive = make_tar(tmp_path / "a.tar.gz", {"a.bin": b"a" * 600, "b.bin": b"b" * 600})
+    with pytest.raises(ArchiveError, match="exceeds 1000 bytes"):
+        extract(archive, out, max_total_bytes=1000)
+    assert listing(out) == []
+
+
+def test_entry_limit(tmp_path):
+    archive = make_zip(tmp_path / "a.zip", {f"{i}.txt": b"x" for i in range(3)})
+    with pytest.raises(ArchiveError, match="more than 2 entries"):
+        extract(archive, tmp_path / "out", max_entries=2)
+
+
+def test_abort_with_overwrite_keeps_files_that_existed_before(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "kept.txt").write_text("original kept")
+    (out / "big.bin").write_text("original big")
+    archive = make_zip(tmp_path / "a.zip", {"kept.txt": b"new", "created.txt": b"created", "big.bin": b"x" * 2000})
+    with pytest.raises(ArchiveError):
+        extract(archive, out, overwrite=True, max_total_bytes=1000)
+    # 解压前已存在的文件不会被删除，中止时正在写入的文件保持原内容，本次新建的文件和临时文件被删除
+    assert listing(out) == ["big.bin", "kept.txt"]
+    assert (out / "big.bin").read_text() == "original big"
+
+
+def corrupt_member(path, name):
+    """把 zip 中某个成员的压缩数据改为无效的 deflate 流"""
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name)
+    with open(path, "r+b") as f:
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = int.from_bytes(f.read(2), "little"), int.from_bytes(f.read(2), "little")
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        f.write(b"\xff" * min(info.compress_size, 16))
+
+
+def test_corrupt_member_removes_created_files_and_directories(tmp_path):
+    out = tmp_path / "out"
+    archive = make_zip(tmp_path / "a.zip", {"one.txt": b"one", "nested/deep/two.txt": b"two" * 1000})
+    corrupt_member(archive, "nested/deep/two.txt")
+    with pytest.raises(Exception) as excinfo:
+        extract(archive, out)
+    assert not isinstance(excinfo.value, ArchiveError)
+    # 输出目录由本次调用创建，连同其中的文件、子目录和临时文件一起删除
+    assert not out.exists()
+
+
+def test_abort_keeps_directories_that_existed_before(tmp_path):
+    out = tmp_path / "out"
+    (out / "existing").mkdir(parents=True)
+    archive = make_zip(tmp_path / "a.zip", {"existing/new/a.txt": b"a", "big.bin": b"x" * 2000})
+    with pytest.raises(ArchiveError):
+        extract(archive, out, max_total_bytes=1000)
+    assert sorted(os.listdir(out)) == ["existing"]
+    assert os.listdir(out / "existing") == []
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+from fs_mcp import file_index
+from fs_mcp.file_index import FileIndex
+
+
+def walk(base, pattern, exclude_patterns=()):
+    """与 search_files 退回的遍历规则相同"""
+    matches = file_index.name_matcher(pattern)
+    excludes = [file_index.name_matcher(p) for p in exclude_patterns]
+    found = []
+    for root, dirs, files in os.walk(base):
+        for names, kind in ((dirs, "DIR"), (files, "FILE")):
+            for name in names:
+                if matches(name.lower()) and not any(exclude(name.lower()) for exclude in excludes):
+                    found.append(f"[{kind}] {os.path.join(root, name)}")
+    return sorted(found)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "root"
+    for rel in ["src/app.py", "src/util/Helpers.py", "src/util/data.json", "docs/readme.md", "docs/app_notes.md"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    return root
+
+
+def make_index(tmp_path, root, refresh_interval=60.0):
+    index = FileIndex(str(root), str(tmp_path / "index" / "root.sqlite3"), refresh_interval)
+    index.refresh()
+    return index
+
+
+@pytest.mark.parametrize(
+    "pattern, excludes",
+    [("app", ()), ("*.py", ()), ("HELP", ()), ("*.md", ["app*"]), ("u", ["*.json"]), ("[dr]*", ())],
+)
+def test_search_matches_walk(tmp_path, tree, pattern, excludes):
+    index = make_index(tmp_path, tree)
+    assert sorted(index.search(str(tree), pattern, list(excludes))) == walk(str(tree), pattern, excludes)
+    assert sorted(index.search(str(tree / "src"), pattern, list(excludes))) == walk(
+        str(tree / "src"), pattern, excludes
+    )
+
+
+def test_search_returns_none_until_background_build_completes(tmp_path, tree):
+    index = FileIndex(str(tree), str(tmp_path / "index" / "root.sqlite3"))
+    assert index.search(str(tree / "src"), "app") is None
+    for _ in range(200):
+        result = index.search(str(tree / "src"), "app")
+        if result is not None:
+            break
+        time.sleep(0.01)
+    assert result == [f"[FILE] {tree / 'src' / 'app.py'}"]
+
+
+def test_stale_index_is_refreshed_before_answering(tmp_path, tree):
+    index = make_index(tmp_path, tree, refresh_interval=0.05)
+    assert index.search(str(tree), "late") == []
+    time.sleep(0.1)
+    (tree / "docs" / "late.txt").write_text("x")
+    assert index.search(str(tree), "late") == [f"[FILE] {tree / 'docs' / 'late.txt'}"]
+
+
+def test_notify_changed_is_visible_immediately(tmp_path, tree):
+    index = make_index(tmp_path, tree)
+    new_dir = tree / "src" / "new" / "deep"
+    new_dir.mkdir(parents=True)
+    (new_dir / "fresh.py").write_text("x")
+    (tree / "docs" / "readme.md").unlink()
+    index.notify_changed(str(new_dir / "fresh.py"))
+    index.notify_changed(str(tree / "src" / "new"))
+    index.notify_changed(str(tree / "docs" / "readme.md"))
+    assert index.search(str(tree), "fresh") == [f"[FILE] {new_dir / 'fresh.py'}"]
+    assert index.search(str(tree), "readme") == []
+
+
+def test_symlinked_base_reports_paths_under_the_link(tmp_path, tree):
+    link = tree / "link"
+    link.symlink_to(tree / "src", target_is_directory=True)
+    index = make_index(tmp_path, tree)
+    assert sorted(index.search(str(link), "py")) == walk(str(link), "py")
+    assert len(walk(str(link), "py")) == 2
+
+
+def test_symlinked_root_and_outside_base(tmp_path, tree):
+    root_link = tmp_path / "root_link"
+    root_link.symlink_to(tree, target_is_directory=True)
+    index = make_index(tmp_path, root_link)
+    assert sorted(index.search(str(root_link / "src"), "app")) == walk(str(root_link / "src"), "app")
+    assert index.search(str(tmp_path), "app") is None
+
+
+def test_index_dir_defaults_to_temp_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("MCP_FS_INDEX_DIR", raising=False)
+    monkeypatch.setattr("common.cache._persist_dir", None)
+    assert file_index.index_dir() == os.path.join(tempfile.gettempdir(), "mcp_fs_index")
+    monkeypatch.setattr("common.cache._persist_dir", str(tmp_path))
+    assert file_index.index_dir() == str(tmp_path / "fs_index")
+    monkeypatch.setenv("MCP_FS_INDEX_DIR", str(tmp_path / "custom"))
+    assert file_index.index_dir() == str(tmp_path / "custom")
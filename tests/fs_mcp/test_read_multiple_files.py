@@ -0,0 +1,63 @@
+import anyio
+import pytest
+
+from fs_mcp import server
+
+
+class FakeContext:
+    def __init__(self):
+        self.progress = []
+
+    async def report_progress(self, progress, total, message=None):
+        self.progress.append((progress, total, message))
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.delenv("MCP_ALLOWED_DIRECTORIES", raising=False)
+    server.initialize_allowed_directories(str(tmp_path))
+    yield tmp_path
+    server.initialize_allowed_directories()
+
+
+def read(ctx, paths, max_bytes_per_file=100, max_total_bytes=1000):
+    result = anyio.run(server.read_multiple_files, ctx, paths, max_bytes_per_file, max_total_bytes)
+    return result["content"][0]["text"]
+
+
+def test_total_budget_is_assigned_in_input_order(root):
+    paths = []
+    for name, size in (("a", 40), ("b", 40), ("c", 40), ("d", 10)):
+        (root / name).write_text(name * size)
+        paths.append(str(root / name))
+    missing = str(root / "missing")
+
+    expected = (
+        f"=== {paths[0]} ===\n{'a' * 40}\n\n"
+        f"=== {missing} ===\nError: [Errno 2] No such file or directory: '{missing}'\n\n"
+        f"=== {paths[1]} ===\n{'b' * 40}\n\n"
+        f"=== {paths[2]} ===\n{'c' * 20}\n[truncated: showed 20 of 40 bytes]\n\n"
+        f"=== {paths[3]} ===\n[skipped: total size limit reached, file is 10.0 B]"
+    )
+    order = [paths[0], missing, paths[1], paths[2], paths[3]]
+    # 多次运行结果相同，与线程完成顺序无关
+    for _ in range(5):
+        assert read(FakeContext(), order, max_total_bytes=100) == expected
+
+
+def test_per_file_limit_truncates_on_character_boundary(root):
+    path = root / "utf8.txt"
+    path.write_text("中文内容", encoding="utf-8")
+    text = read(FakeContext(), [str(path)], max_bytes_per_file=4)
+    assert text == f"=== {path} ===\n中\n[truncated: showed 4 of 12 bytes]"
+
+
+def test_progress_messages_do_not_repeat_file_content(root):
+    paths = []
+    for name in ("a", "b"):
+        (root / name).write_text("content " * 10)
+        paths.append(str(root / name))
+    ctx = FakeContext()
+    read(ctx, paths)
+    assert [(progress, total) for progress, total, _ in ctx.progress] == [(1, 2), (2, 2)]
+    assert sorted(message for _, _, message in ctx.progress) == [f"read {path}" for path in paths]
@@ -0,0 +1,55 @@
+from fs_mcp.text_edit import apply_edits
+
+
+def test_repeated_anchor_replaces_successive_occurrences():
+    content, results = apply_edits("x = 1\nx = 1\nx = 1\n", [("x = 1", "a"), ("x = 1", "b")])
+    assert content == "a\nb\nx = 1\n"
+    assert [r.line for r in results] == [1, 2]
+    assert all(r.error is None for r in results)
+
+
+def test_edits_do_not_match_text_inserted_by_earlier_edits():
+    content, results = apply_edits("foo bar", [("foo", "bar"), ("bar", "baz")])
+    assert content == "bar baz"
+
+    content, results = apply_edits("a", [("a", "ab"), ("b", "c")])
+    assert content == "ab"
+    assert results[1].error == "Text not found: 'b'"
+
+
+def test_overlapping_edit_is_reported_and_skipped():
+    content, results = apply_edits("hello world", [("hello world", "X"), ("world", "Y")])
+    assert content == "X"
+    assert results[0].error is None
+    assert results[1].error == "Text overlaps the text replaced by operation 1"
+
+
+def test_empty_and_missing_old_text():
+    content, results = apply_edits("abc", [("", "x"), ("z" * 60, "y")])
+    assert content == "abc"
+    assert results[0].error == "old_text is empty"
+    assert results[1].error == f"Text not found: '{'z' * 50}...'"
+
+
+def test_line_numbers_follow_positions_not_edit_order():
+    content, results = apply_edits("1\n2\n3\n4\n", [("4", "D"), ("2", "B\nB")])
+    assert content == "1\nB\nB\n3\nD\n"
+    assert [r.line for r in results] == [4, 2]
+
+
+def test_fuzzy_match_reindents_new_text():
+    original = "def f():\n    if x:\n        return 1\n"
+    content, results = apply_edits(original, [("if x:\n    return 1", "if y:\n    return 2")])
+    assert content == "def f():\n    if y:\n        return 2\n"
+    assert results[0].fuzzy
+    assert results[0].line == 2
+
+
+def test_fuzzy_match_trailing_newline():
+    # old_text 以换行结尾时连同整行删除
+    content, results = apply_edits("a\n  b\nc\n", [(" b  \n", "")])
+    assert content == "a\nc\n"
+    assert results[0].fuzzy
+    # old_text 不以换行结尾时，new_text 末尾的换行不会多出一个空行
+    content, _ = apply_edits("a\n  b\nc\n", [("  b  ", "B\n")])
+    assert content == "a\nB\nc\n"
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from fs_mcp import text_reader
+
+# splitlines() 的各种行分隔符，以及多字节字符
+PIECES = ["a", "bc", "é", "中文", " ", "\n", "\r", "\r\n", "\x0b", "\x0c", "\x1c", "\x1e", "\x85", "\u2028", "\u2029"]
+
+
+def whole_file_lines(path, encoding):
+    """整体读取时的结果：文本模式读入后按 splitlines() 切分"""
+    with open(path, "r", encoding=encoding) as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture(params=["buffered", "mmap"])
+def mode(request, monkeypatch):
+    if request.param == "mmap":
+        # 非空文件都使用 mmap，并用很小的块检查块边界
+        monkeypatch.setattr(text_reader, "MMAP_THRESHOLD", 1)
+    monkeypatch.setattr(text_reader, "TAIL_BLOCK_SIZE", 3)
+    return request.param
+
+
+def test_head_and_tail_match_whole_file_reads(tmp_path, mode):
+    rng = random.Random(16)
+    path = tmp_path / "random.txt"
+    for _ in range(500):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+        path.write_bytes(text.encode("utf-8"))
+        lines = whole_file_lines(path, "utf-8")
+        n = rng.randint(1, 6)
+        assert text_reader.read_head(str(path), n) == "\n".join(lines[:n]), repr(text)
+        assert text_reader.read_tail(str(path), n) == "\n".join(lines[-n:]), repr(text)
+
+
+def test_cr_only_file_head_returns_one_line(tmp_path, mode):
+    path = tmp_path / "cr.txt"
+    path.write_bytes(b"first\rsecond\rthird\r")
+    assert text_reader.read_head(str(path), 1) == "first"
+    assert text_reader.read_tail(str(path), 2) == "second\nthird"
+
+
+def test_non_utf8_encoding(tmp_path, mode):
+    path = tmp_path / "gbk.txt"
+    text = "第一行\r\n第二行\n第三行\r第四行\n"
+    path.write_bytes(text.encode("gbk"))
+    assert text_reader.read_head(str(path), 2, "gbk") == "第一行\n第二行"
+    assert text_reader.read_tail(str(path), 2, "gbk") == "第三行\n第四行"
+
+
+def test_head_from_offset_inside_multibyte_character(tmp_path, mode):
+    path = tmp_path / "utf8.txt"
+    path.write_bytes("中文\n第二行\n".encode("utf-8"))
+    # 偏移 1 落在 "中" 的中间，对齐到 "文"
+    assert text_reader.read_head(str(path), 1, offset=1) == "文"
+    assert text_reader.read_head(str(path), 1, offset=7) == "第二行"
+
+
+def test_adjacent_ranges_join_to_whole_text(tmp_path, mode):
+    path = tmp_path / "utf8.txt"
+    text = "héllo 中文 wörld 😀 末尾\n" * 3
+    path.write_bytes(text.encode("utf-8"))
+    size = path.stat().st_size
+    for length in (1, 2, 5, 7):
+        parts = [text_reader.read_range(str(path), offset, length) for offset in range(0, size, length)]
+        assert "".join(parts) == text
+    assert text_reader.read_range(str(path), size) == ""
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from fs_mcp import server
+
+
+@pytest.fixture
+def allowed(tmp_path, monkeypatch):
+    monkeypatch.delenv("MCP_ALLOWED_DIRECTORIES", raising=False)
+    root = tmp_path / "allowed"
+    (root / "sub").mkdir(parents=True)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    server.initialize_allowed_directories(str(root))
+    yield root, outside
+    server.initialize_allowed_directories()
+
+
+def test_paths_outside_allowed_directories_are_rejected(allowed):
+    root, outside = allowed
+    assert server.validate_path(str(root / "sub" / "new.txt")) == os.path.abspath(root / "sub" / "new.txt")
+    with pytest.raises(PermissionError):
+        server.validate_path(str(outside / "file.txt"))
+    with pytest.raises(PermissionError):
+        server.validate_path(str(root / ".." / "outside"))
+
+
+def test_directory_replaced_by_symlink_is_rejected(allowed):
+    root, outside = allowed
+    target = root / "sub" / "file.txt"
+    assert server.validate_path(str(target)) == str(target)
+    (root / "sub").rmdir()
+    (root / "sub").symlink_to(outside, target_is_directory=True)
+    with pytest.raises(PermissionError):
+        server.validate_path(str(target))
@@ -0,0 +1,46 @@
+import os
+import threading
+import zipfile
+from concurrent.futures import Future
+
+from fs_mcp.zip_writer import ParallelZipWriter
+
+
+class ManualExecutor:
+    """提交的任务在调用 run_all 之前不会完成，模拟仍在压缩中的文件"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.jobs.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        for future, fn, args in self.jobs:
+            future.set_result(fn(*args))
+
+
+def test_empty_directories_are_queued_in_order_without_waiting(tmp_path):
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text(name * 100)
+    executor = ManualExecutor()
+    with zipfile.ZipFile(tmp_path / "out.zip", "w") as zipf:
+        writer = ParallelZipWriter(zipf, executor)
+        writer.add_file(str(tmp_path / "a.txt"), "a.txt", os.stat(tmp_path / "a.txt"))
+        adding = threading.Thread(target=writer.add_directory, args=("empty",), daemon=True)
+        adding.start()
+        adding.join(timeout=5)
+        # 空目录不等待正在压缩的文件
+        assert not adding.is_alive()
+        writer.add_file(str(tmp_path / "b.txt"), "b.txt", os.stat(tmp_path / "b.txt"))
+        executor.run_all()
+        writer.flush()
+
+    with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+        assert zipf.namelist() == ["a.txt", "empty/", "b.txt"]
+        assert zipf.read("b.txt") == b"b.txt" * 100
+        assert zipf.getinfo("empty/").is_dir()
+    assert writer.file_count == 2
+    assert writer.original_size == 1000
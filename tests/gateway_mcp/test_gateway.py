@@ -0,0 +1,56 @@
+from mcp.server.fastmcp import FastMCP
+from starlette.testclient import TestClient
+
+from gateway_mcp.server import create_gateway_app, merge_servers
+
+
+def test_merge_servers_keeps_first_registration():
+    first = FastMCP("first")
+    second = FastMCP("second")
+
+    @first.tool(name="shared")
+    def shared_first() -> str:
+        return "first"
+
+    @second.tool(name="shared")
+    def shared_second() -> str:
+        return "second"
+
+    @second.tool()
+    def only_second() -> str:
+        return "second"
+
+    @second.prompt()
+    def greeting() -> str:
+        return "hi"
+
+    gateway = merge_servers({"first": first, "second": second})
+    tools = {tool.name: tool for tool in gateway._tool_manager.list_tools()}
+    assert sorted(tools) == ["only_second", "shared"]
+    assert tools["shared"].fn() == "first"
+    assert [prompt.name for prompt in gateway._prompt_manager.list_prompts()] == ["greeting"]
+
+
+def test_gateway_mounts_servers_under_prefixes():
+    app = create_gateway_app("streamable", ("demo",))
+    # MCP 的 DNS 重绑定防护只接受带端口的 localhost Host
+    with TestClient(app, base_url="http://localhost:3000") as client:
+        assert client.get("/").json() == {"transport": "streamable", "servers": {"demo": "/demo/mcp"}}
+        assert client.get("/metrics").status_code == 200
+        response = client.post(
+            "/demo/mcp",
+            headers={"accept": "application/json, text/event-stream"},
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-03-26",
+                    "capabilities": {},
+                    "clientInfo": {"name": "test", "version": "1.0"},
+                },
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers.get("mcp-session-id")
+        assert "DemoMcpServer" in response.text